@@ -1,3 +1,14 @@
 from django.contrib import admin
+from .models import RefreshToken
 
 # Register your models here.
+
+
+@admin.register(RefreshToken)
+class RefreshTokenAdmin(admin.ModelAdmin):
+    list_display = ('user', 'family', 'created_at', 'expires_at', 'revoked_at')
+    list_select_related = ('user',)
+    search_fields = ('=user__username', '=family')
+    raw_id_fields = ('user', 'replaced_by')
+    readonly_fields = ('token_hash',)
+    ordering = ('-id',)
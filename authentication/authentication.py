@@ -0,0 +1,175 @@
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from saveMore.caches import cache_is_shared
+
+from .tokens import read_access_token, user_from_claims
+from .users import user_from_snapshot, user_snapshot
+
+# Seconds a token stays in a process's own LRU
+TOKEN_CACHE_LOCAL_TTL = getattr(settings, 'TOKEN_CACHE_LOCAL_TTL', 5)
+# Seconds a token stays in the shared cache, when there is one
+TOKEN_CACHE_TTL = getattr(settings, 'TOKEN_CACHE_TTL', 300)
+TOKEN_CACHE_SIZE = getattr(settings, 'TOKEN_CACHE_SIZE', 10000)
+
+
+class TokenCache:
+    """token key -> user_snapshot() values, in a per-process LRU.
+
+    When the default cache is shared between processes (Redis or
+    Memcached) it backs the LRU, so a token is looked up in the database
+    once for all workers. Every lookup then reads the token's generation
+    from the shared cache and only trusts entries stamped with it;
+    invalidating bumps the generation, so every process stops accepting
+    the token on its next request. With a per-process cache (LocMem)
+    entries stay local only and other processes keep them for up to
+    TOKEN_CACHE_LOCAL_TTL seconds (authentication.W001 warns about it).
+    Entries hold plain user fields, never the password hash, and keys are
+    stored hashed so raw tokens never reach the cache backend.
+    """
+
+    def __init__(self, size=TOKEN_CACHE_SIZE, local_ttl=TOKEN_CACHE_LOCAL_TTL, shared_ttl=TOKEN_CACHE_TTL,
+                 shared=None):
+        self.size = size
+        self.local_ttl = local_ttl
+        self.shared_ttl = shared_ttl
+        self.shared = cache_is_shared() if shared is None else shared
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.stats = Counter()
+
+    @staticmethod
+    def cache_key(key):
+        return f"auth:token:{hashlib.sha256(key.encode()).hexdigest()}"
+
+    @classmethod
+    def generation_key(cls, key):
+        return f"{cls.cache_key(key)}:gen"
+
+    def generation(self, key):
+        """Current generation of a token; 0 until it is first invalidated"""
+        if not self.shared:
+            return 0
+        return cache.get(self.generation_key(key), 0)
+
+    def get(self, key, generation=None):
+        """Cached values for the token, or None.
+
+        Pass the generation read before a database lookup to set() so an
+        invalidation racing with the lookup isn't overwritten.
+        """
+        if generation is None:
+            generation = self.generation(key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now and entry[1] == generation:
+                self._entries.move_to_end(key)
+                self.stats['local_hits'] += 1
+                return entry[2]
+        entry = cache.get(self.cache_key(key)) if self.shared else None
+        if entry is None or entry[0] != generation:
+            self.stats['misses'] += 1
+            return None
+        self.stats['shared_hits'] += 1
+        self._remember(key, generation, entry[1], now)
+        return entry[1]
+
+    def set(self, key, value, generation=0):
+        if self.shared:
+            cache.set(self.cache_key(key), (generation, value), self.shared_ttl)
+        self._remember(key, generation, value, time.monotonic())
+
+    def _remember(self, key, generation, value, now):
+        with self._lock:
+            self._entries[key] = (now + self.local_ttl, generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Forget a token now and again once the surrounding transaction commits"""
+        self._forget(key)
+        transaction.on_commit(lambda: self._forget(key))
+
+    def _forget(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared:
+            # Outlives any entry stamped with the previous generation
+            cache.set(self.generation_key(key), time.time_ns(), 2 * self.shared_ttl)
+            cache.delete(self.cache_key(key))
+        self.stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        """Counters of this process plus the hit rate"""
+        stats = dict(self.stats)
+        lookups = stats.get('local_hits', 0) + stats.get('shared_hits', 0) + stats.get('misses', 0)
+        hits = lookups - stats.get('misses', 0)
+        stats['hit_rate'] = round(hits / lookups, 4) if lookups else None
+        stats['local_entries'] = len(self._entries)
+        return stats
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the Token + User query on cache hits.
+
+    Entries are dropped when a token is deleted (logout) and whenever its
+    user is saved, which covers deactivation (see authentication.signals).
+    """
+
+    def authenticate_credentials(self, key):
+        generation = token_cache.generation(key)
+        cached = token_cache.get(key, generation)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user_snapshot(user), generation)
+            return user, token
+        # Fresh instances per request, built from plain values
+        user = user_from_snapshot(cached)
+        if not user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+        token = self.get_model().from_db(DEFAULT_DB_ALIAS, ['key', 'user_id'], [key, user.pk])
+        token.user = user
+        return user, token
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """`Authorization: Bearer <access token>`, verified by signature alone.
+
+    request.user is built from the token claims without a query and
+    request.auth holds the claims. Sits next to the legacy `Token` scheme so
+    clients can move over one at a time.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed('Invalid bearer header.')
+        try:
+            claims = read_access_token(auth[1].decode())
+        except (UnicodeError, signing.BadSignature, ValueError):
+            raise AuthenticationFailed('Invalid or expired access token.')
+        return user_from_claims(claims), claims
+
+    def authenticate_header(self, request):
+        return self.keyword
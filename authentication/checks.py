@@ -0,0 +1,34 @@
+from django.core.checks import Error, Warning, register
+
+
+@register()
+def signed_tokens_need_shared_cache(app_configs, **kwargs):
+    """Access token revocation only works when every process reads the same cache"""
+    from saveMore.caches import cache_is_shared
+    from .tokens import ISSUE_SIGNED_TOKENS
+    if ISSUE_SIGNED_TOKENS and not cache_is_shared():
+        return [Error(
+            "AUTH_ISSUE_SIGNED_TOKENS needs an in-memory cache shared by all processes.",
+            hint="Configure CACHES with a Redis or Memcached backend; token pairs are not issued "
+                 "while the default cache is per-process or stored in the database.",
+            id='authentication.E001',
+        )]
+    return []
+
+
+@register(deploy=True)
+def token_cache_needs_shared_cache(app_configs, **kwargs):
+    """Without a shared cache a logout reaches other processes' token caches only after their local TTL"""
+    from django.conf import settings
+    from .authentication import CachedTokenAuthentication
+    from saveMore.caches import cache_is_shared
+    classes = getattr(settings, 'REST_FRAMEWORK', {}).get('DEFAULT_AUTHENTICATION_CLASSES', [])
+    path = f"{CachedTokenAuthentication.__module__}.{CachedTokenAuthentication.__name__}"
+    if path in classes and not cache_is_shared():
+        return [Warning(
+            "CachedTokenAuthentication without a cache shared by all processes.",
+            hint="Configure CACHES with a Redis or Memcached backend; until then other processes keep "
+                 "accepting a deleted token or deactivated user for TOKEN_CACHE_LOCAL_TTL seconds.",
+            id='authentication.W001',
+        )]
+    return []
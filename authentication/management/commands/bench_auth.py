@@ -0,0 +1,61 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from authentication.authentication import CachedTokenAuthentication, SignedTokenAuthentication, token_cache
+from authentication.tokens import issue_access_token
+from saveMore.caches import cache_is_shared
+
+
+class Command(BaseCommand):
+    help = ("Time authenticating one request with the legacy token, the cached token "
+            "and a signed access token, counting database queries and cache reads. "
+            "Uses a throwaway user.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        backend = caches[DEFAULT_CACHE_ALIAS]
+        self.stdout.write(f"default cache: {type(backend).__name__} ({'shared' if cache_is_shared() else 'not shared'})")
+        if not cache_is_shared():
+            self.stdout.write(self.style.WARNING(
+                "Signed tokens and the shared token cache tier need Redis or Memcached; "
+                "numbers below are for a per-process cache."
+            ))
+        user = User.objects.create_user(f"bench-auth-{int(time.time() * 1000)}")
+        try:
+            key = Token.objects.create(user=user).key
+            factory = RequestFactory()
+            schemes = [
+                ('Token (database)', TokenAuthentication(), f"Token {key}"),
+                ('Token (cached)', CachedTokenAuthentication(), f"Token {key}"),
+                ('Bearer (signed)', SignedTokenAuthentication(), f"Bearer {issue_access_token(user)}"),
+            ]
+            token_cache.clear()
+            for name, authenticator, header in schemes:
+                request = factory.get('/', HTTP_AUTHORIZATION=header)
+                # Warm up (fills the token cache)
+                authenticator.authenticate(request)
+                with CaptureQueriesContext(connection) as queries, \
+                        mock.patch.object(backend, 'get', wraps=backend.get) as cache_get:
+                    started = time.perf_counter()
+                    for _ in range(iterations):
+                        authenticator.authenticate(request)
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{name:<18} {elapsed / iterations * 1e6:8.1f} us/request  "
+                    f"{len(queries) / iterations:.2f} queries/request  "
+                    f"{cache_get.call_count / iterations:.2f} cache reads/request"
+                )
+        finally:
+            user.delete()
@@ -1,4 +1,34 @@
+import hashlib
+import uuid
+
+from django.contrib.auth.models import User
 from django.db import models
 
 
 # Create your models here.
+class RefreshToken(models.Model):
+    """Long-lived token exchanged for signed access tokens (see authentication.tokens).
+
+    Only a hash of the token is stored. Each refresh revokes the token and
+    issues its replacement in the same family; presenting a revoked token
+    again revokes the whole family.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='refresh_tokens')
+    token_hash = models.CharField(max_length=64, unique=True)
+    family = models.UUIDField(default=uuid.uuid4, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(null=True, blank=True)
+    replaced_by = models.OneToOneField('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='replaces')
+
+    def __str__(self):
+        return f"Refresh token for {self.user_id} ({'revoked' if self.revoked_at else 'active'})"
+
+    @staticmethod
+    def hash(raw):
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    class Meta:
+        db_table = 'auth_refresh_tokens'
+        verbose_name = 'Refresh Token'
+        verbose_name_plural = 'Refresh Tokens'
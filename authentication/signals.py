@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .tokens import revoke_access_tokens, revoke_refresh_tokens
+from .users import USER_FIELDS
+
+# Fields that cached and signed credentials depend on
+CREDENTIAL_FIELDS = [name for name in USER_FIELDS if name != 'id'] + ['password']
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """Logout deletes the token; stop accepting it from the cache"""
+    token_cache.invalidate(instance.key)
+
+
+@receiver(pre_save, sender=User)
+def compare_credential_fields(sender, instance, update_fields=None, **kwargs):
+    """Note which fields carried by credentials the save changes.
+
+    Saves limited to other fields (last_login on every login) skip the
+    comparison query.
+    """
+    fields = CREDENTIAL_FIELDS
+    if update_fields is not None:
+        fields = [name for name in CREDENTIAL_FIELDS if name in update_fields]
+    previous = None
+    if instance.pk is not None and fields:
+        previous = User.objects.filter(pk=instance.pk).values_list(*fields).first()
+    instance._changed_credentials = {
+        name for name, value in zip(fields, previous or ()) if value != getattr(instance, name)
+    }
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created=False, **kwargs):
+    """Cached users and signed tokens must not outlive deactivation, permission or password changes"""
+    changed = getattr(instance, '_changed_credentials', None)
+    if created or changed == set():
+        return
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        token_cache.invalidate(key)
+    revoke_access_tokens(instance.pk)
+    # None: saved without the pre_save comparison, assume the worst
+    if changed is None or not instance.is_active or 'password' in changed:
+        revoke_refresh_tokens(instance)
@@ -1,3 +1,183 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from saveMore.caches import cache_is_shared
+
+from .authentication import TokenCache, token_cache
+from .checks import signed_tokens_need_shared_cache
+from .models import RefreshToken
+from .tokens import issue_access_token, issue_token_pair, rotate_refresh_token
+
+
+class AuthTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = User.objects.create_user('alice', password='secret', email='alice@example.com')
+
+    def bearer_client(self, access):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return client
+
+
+class RefreshTokenTests(AuthTestCase):
+    def test_rotation_issues_new_pair_and_revokes_old_token(self):
+        pair = issue_token_pair(self.user)
+        rotated = rotate_refresh_token(pair['refresh'])
+
+        self.assertNotEqual(rotated['refresh'], pair['refresh'])
+        old = RefreshToken.objects.get(token_hash=RefreshToken.hash(pair['refresh']))
+        new = RefreshToken.objects.get(token_hash=RefreshToken.hash(rotated['refresh']))
+        self.assertIsNotNone(old.revoked_at)
+        self.assertEqual(old.replaced_by, new)
+        self.assertEqual(old.family, new.family)
+        self.assertEqual(self.bearer_client(rotated['access']).get('/api/auth/user/').status_code, 200)
+
+    def test_reuse_revokes_family_and_access_tokens(self):
+        pair = issue_token_pair(self.user)
+        other = issue_token_pair(self.user)
+        rotated = rotate_refresh_token(pair['refresh'])
+
+        with self.assertRaises(ValueError):
+            rotate_refresh_token(pair['refresh'])
+        with self.assertRaises(ValueError):
+            rotate_refresh_token(rotated['refresh'])
+        self.assertEqual(self.bearer_client(rotated['access']).get('/api/auth/user/').status_code, 403)
+        # Other sessions keep their refresh token
+        self.assertIn('access', rotate_refresh_token(other['refresh']))
+
+    def test_expired_token_is_refused(self):
+        pair = issue_token_pair(self.user)
+        RefreshToken.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        with self.assertRaises(ValueError):
+            rotate_refresh_token(pair['refresh'])
+
+    def test_refresh_endpoint(self):
+        pair = issue_token_pair(self.user)
+        response = APIClient().post('/api/auth/token/refresh/', {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, 200)
+        response = APIClient().post('/api/auth/token/refresh/', {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, 401)
+
+
+class AccessTokenTests(AuthTestCase):
+    def test_user_detail_needs_no_query(self):
+        client = self.bearer_client(issue_access_token(self.user))
+        with self.assertNumQueries(0):
+            response = client.get('/api/auth/user/')
+        self.assertEqual(response.json()['email'], 'alice@example.com')
+
+    def test_permission_change_revokes_access_tokens(self):
+        client = self.bearer_client(issue_access_token(self.user))
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(client.get('/api/auth/user/').status_code, 403)
+
+    def test_password_change_revokes_access_and_refresh_tokens(self):
+        pair = issue_token_pair(self.user)
+        self.user.set_password('changed')
+        self.user.save()
+        self.assertEqual(self.bearer_client(pair['access']).get('/api/auth/user/').status_code, 403)
+        with self.assertRaises(ValueError):
+            rotate_refresh_token(pair['refresh'])
+
+    def test_deactivation_revokes_access_and_refresh_tokens(self):
+        pair = issue_token_pair(self.user)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.bearer_client(pair['access']).get('/api/auth/user/').status_code, 403)
+        with self.assertRaises(ValueError):
+            rotate_refresh_token(pair['refresh'])
+
+    def test_unrelated_save_keeps_tokens(self):
+        client = self.bearer_client(issue_access_token(self.user))
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(client.get('/api/auth/user/').status_code, 200)
+
+    def test_logout_revokes_tokens(self):
+        pair = issue_token_pair(self.user)
+        response = self.bearer_client(pair['access']).post('/api/auth/logout/', {'refresh': pair['refresh']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.bearer_client(pair['access']).get('/api/auth/user/').status_code, 403)
+        with self.assertRaises(ValueError):
+            rotate_refresh_token(pair['refresh'])
+
+    def test_pair_is_not_issued_without_shared_cache(self):
+        response = APIClient().post('/api/auth/token/pair/', {'username': 'alice', 'password': 'secret'})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache',
+    }})
+    @mock.patch('authentication.tokens.ISSUE_SIGNED_TOKENS', True)
+    def test_database_cache_is_rejected(self):
+        self.assertFalse(cache_is_shared())
+        self.assertEqual([error.id for error in signed_tokens_need_shared_cache(None)], ['authentication.E001'])
+
+    @mock.patch('authentication.views.signed_tokens_enabled', return_value=True)
+    def test_bearer_token_cannot_mint_refresh_tokens(self, enabled):
+        response = self.bearer_client(issue_access_token(self.user)).post('/api/auth/token/pair/')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(RefreshToken.objects.exists())
+
+
+class CachedTokenTests(AuthTestCase):
+    def setUp(self):
+        super().setUp()
+        self.key = Token.objects.create(user=self.user).key
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.key}")
+
+    def test_cache_hit_needs_no_query_and_holds_no_secrets(self):
+        self.client.get('/api/auth/user/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/user/')
+        self.assertEqual(response.json()['username'], 'alice')
+        entry = token_cache.get(self.key)
+        self.assertNotIn(self.user.password, entry)
+        self.assertNotIn(self.key, entry)
+
+    def test_logout_invalidates_cached_token(self):
+        self.client.get('/api/auth/user/')
+        self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 403)
+
+    def test_deactivation_invalidates_cached_token(self):
+        self.client.get('/api/auth/user/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 403)
+
+
+class SharedTokenCacheTests(AuthTestCase):
+    """Two caches over the same backend stand in for two worker processes"""
+
+    def setUp(self):
+        super().setUp()
+        self.worker, self.other = TokenCache(shared=True), TokenCache(shared=True)
+        self.worker.set('key', ['alice'], self.worker.generation('key'))
+
+    def test_entry_is_shared_between_processes(self):
+        self.assertEqual(self.other.get('key'), ['alice'])
+        self.assertEqual(self.other.stats['shared_hits'], 1)
+
+    def test_invalidation_reaches_other_processes_immediately(self):
+        self.assertEqual(self.other.get('key'), ['alice'])
+        self.worker._forget('key')
+        self.assertIsNone(self.other.get('key'))
+
+    def test_lookup_racing_an_invalidation_is_not_cached(self):
+        generation = self.other.generation('key')
+        self.worker._forget('key')
+        self.other.set('key', ['stale'], generation)
+        self.assertIsNone(self.worker.get('key'))
+        self.assertIsNone(self.other.get('key'))
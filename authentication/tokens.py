@@ -0,0 +1,147 @@
+import secrets
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from saveMore.caches import cache_is_shared
+
+from .models import RefreshToken
+from .users import user_from_snapshot, user_snapshot
+
+# Seconds an access token is accepted for
+ACCESS_TOKEN_TTL = getattr(settings, 'ACCESS_TOKEN_TTL', 5 * 60)
+# Seconds a refresh token can be exchanged for a new pair
+REFRESH_TOKEN_TTL = getattr(settings, 'REFRESH_TOKEN_TTL', 30 * 24 * 60 * 60)
+# Whether login and signup hand out a token pair next to the legacy token;
+# needs a shared cache (see signed_tokens_enabled)
+ISSUE_SIGNED_TOKENS = getattr(settings, 'AUTH_ISSUE_SIGNED_TOKENS', False)
+ACCESS_SALT = 'auth.access'
+
+
+def signed_tokens_enabled():
+    """AUTH_ISSUE_SIGNED_TOKENS is on and revocations can reach every process.
+
+    With a per-process cache a logout or deactivation would only revoke
+    access tokens in the worker handling it, and with a database cache
+    every access token check would be a query, so pairs are not issued
+    then (the authentication.E001 check reports it).
+    """
+    return ISSUE_SIGNED_TOKENS and cache_is_shared()
+
+
+def _revoked_key(user_id):
+    return f"auth:revoked:{user_id}"
+
+
+def issue_access_token(user):
+    """Short-lived HMAC-signed (SECRET_KEY) token describing the user.
+
+    Carries the fields of authentication.users.USER_FIELDS, so views reading
+    request.user need no query; saving a change to any of them revokes the
+    user's access tokens (see authentication.signals).
+    """
+    claims = {'uid': user.pk, 'u': user_snapshot(user), 'iat': time.time_ns()}
+    return signing.dumps(claims, salt=ACCESS_SALT, compress=True)
+
+
+def read_access_token(token):
+    """Claims of a valid access token.
+
+    Raises signing.BadSignature (or SignatureExpired) for a forged or old
+    token and ValueError when it was revoked. Needs no database query, only
+    a read of the revocation marker from the shared Redis/Memcached cache.
+    """
+    claims = signing.loads(token, salt=ACCESS_SALT, max_age=ACCESS_TOKEN_TTL)
+    if not isinstance(claims, dict) or 'uid' not in claims or 'u' not in claims:
+        raise ValueError("Malformed access token")
+    revoked_at = cache.get(_revoked_key(claims['uid']))
+    if revoked_at is not None and claims['iat'] <= revoked_at:
+        raise ValueError("Access token was revoked")
+    return claims
+
+
+def user_from_claims(claims):
+    """User built from token claims; other fields are fetched only if read"""
+    return user_from_snapshot(claims['u'])
+
+
+def revoke_access_tokens(user_id):
+    """Reject the user's access tokens issued until now.
+
+    The marker lives in the shared cache for as long as those tokens could
+    still be valid.
+    """
+    cache.set(_revoked_key(user_id), time.time_ns(), ACCESS_TOKEN_TTL)
+
+
+def _create_refresh_token(user, family=None):
+    raw = secrets.token_urlsafe(32)
+    record = RefreshToken.objects.create(
+        user=user, token_hash=RefreshToken.hash(raw), family=family or uuid.uuid4(),
+        expires_at=timezone.now() + timedelta(seconds=REFRESH_TOKEN_TTL),
+    )
+    return raw, record
+
+
+def _pair(user, refresh):
+    return {
+        'access': issue_access_token(user),
+        'refresh': refresh,
+        'token_type': 'Bearer',
+        'access_expires_in': ACCESS_TOKEN_TTL,
+    }
+
+
+def issue_token_pair(user):
+    """Access token plus a refresh token starting a new family"""
+    raw, _ = _create_refresh_token(user)
+    return _pair(user, raw)
+
+
+def rotate_refresh_token(raw):
+    """Exchange a refresh token for a new pair, revoking the old token.
+
+    A token presented after it was already rotated means it leaked or was
+    replayed: its whole family is revoked. Raises ValueError when the token
+    can't be used.
+    """
+    now = timezone.now()
+    reused = False
+    with transaction.atomic():
+        record = (
+            RefreshToken.objects.select_for_update().select_related('user')
+            .filter(token_hash=RefreshToken.hash(raw or '')).first()
+        )
+        if record is None:
+            raise ValueError("Invalid refresh token")
+        if record.revoked_at is not None:
+            RefreshToken.objects.filter(family=record.family, revoked_at__isnull=True).update(revoked_at=now)
+            reused = True
+        elif record.expires_at <= now or not record.user.is_active:
+            raise ValueError("Refresh token expired, please log in again")
+        else:
+            new_raw, new_record = _create_refresh_token(record.user, record.family)
+            record.revoked_at = now
+            record.replaced_by = new_record
+            record.save(update_fields=['revoked_at', 'replaced_by'])
+    # Raised outside the block so the family revocation is committed
+    if reused:
+        # Whoever replayed it may hold access tokens minted from the family
+        revoke_access_tokens(record.user_id)
+        raise ValueError("Refresh token was already used, please log in again")
+    return _pair(record.user, new_raw)
+
+
+def revoke_refresh_tokens(user, raw=None):
+    """Revoke the family of `raw`, or every refresh token of the user"""
+    tokens = RefreshToken.objects.filter(user=user, revoked_at__isnull=True)
+    if raw:
+        family = RefreshToken.objects.filter(user=user, token_hash=RefreshToken.hash(raw)).values('family')
+        tokens = tokens.filter(family__in=family)
+    return tokens.update(revoked_at=timezone.now())
@@ -8,4 +8,7 @@ urlpatterns = [
     path('logout/', LogoutView.as_view(), name='logout'),
     path('user/', user_detail, name='user-detail'),  # renamed view function to user_detail
     path('token/', obtain_auth_token, name='token'),
+    path('token/pair/', views.token_pair, name='token-pair'),
+    path('token/refresh/', views.token_refresh, name='token-refresh'),
+    path('token-cache/stats/', views.token_cache_stats, name='token-cache-stats'),
 ]
\ No newline at end of file
@@ -0,0 +1,19 @@
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+
+# User fields carried by cached and signed credentials, in model field order
+# (what from_db expects). The password hash is deliberately left out.
+USER_FIELDS = [
+    field.attname for field in User._meta.concrete_fields
+    if field.attname in {'id', 'username', 'first_name', 'last_name', 'email', 'is_active', 'is_staff', 'is_superuser'}
+]
+
+
+def user_snapshot(user):
+    """Plain values of USER_FIELDS, safe to put in a cache or a token"""
+    return [getattr(user, name) for name in USER_FIELDS]
+
+
+def user_from_snapshot(values):
+    """User rebuilt from user_snapshot(); other fields are fetched only if read"""
+    return User.from_db(DEFAULT_DB_ALIAS, USER_FIELDS, list(values))
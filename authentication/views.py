@@ -6,7 +6,11 @@ from rest_framework.authtoken.models import Token
 from .serializers import SignupSerializer, LoginSerializer, LogoutSerializer,UserDetailSerializer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import permission_classes,api_view
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+from .authentication import token_cache
+from .tokens import (
+    issue_token_pair, revoke_access_tokens, revoke_refresh_tokens, rotate_refresh_token, signed_tokens_enabled,
+)
 
 
 @api_view(['POST'])
@@ -16,10 +20,13 @@ def SignupView(request):
     if serializer.is_valid():
         user = serializer.save()
         token, created = Token.objects.get_or_create(user=user)
-        return Response({
+        data = {
             'message': 'User created successfully',
             'token': token.key
-        }, status=status.HTTP_201_CREATED)
+        }
+        if signed_tokens_enabled():
+            data.update(issue_token_pair(user))
+        return Response(data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class LoginView(APIView):
@@ -31,17 +38,23 @@ class LoginView(APIView):
             user = serializer.validated_data['user']
             login(request, user)
             token, created = Token.objects.get_or_create(user=user)
-            return Response({
+            data = {
                 'message': 'Login successful',
                 'token': token.key
-            }, status=status.HTTP_200_OK)
+            }
+            if signed_tokens_enabled():
+                data.update(issue_token_pair(user))
+            return Response(data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class LogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        request.user.auth_token.delete()  # Delete token to logout
+        # Delete token to logout; signed-token clients may not have one
+        Token.objects.filter(user=request.user).delete()
+        revoke_refresh_tokens(request.user, request.data.get('refresh'))
+        revoke_access_tokens(request.user.pk)
         logout(request)
         return Response({'message': 'Logged out successfully'}, status=status.HTTP_200_OK)
     
@@ -54,4 +67,43 @@ def user_detail(request):
         'email': user.email,
         'first_name': user.first_name,
         'last_name': user.last_name,
-    })
\ No newline at end of file
+    })
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def token_pair(request):
+    """Signed access token plus refresh token.
+
+    Existing clients can trade their legacy token (or session) for a pair
+    without asking for the password again; others post username/password.
+    """
+    if not signed_tokens_enabled():
+        return Response({'error': 'Signed tokens are not enabled'}, status=status.HTTP_404_NOT_FOUND)
+    # request.auth is the claims dict for bearer tokens, which must not
+    # mint long-lived refresh tokens
+    if request.user and request.user.is_authenticated and not isinstance(request.auth, dict):
+        user = request.user
+    else:
+        serializer = LoginSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        user = serializer.validated_data['user']
+    return Response(issue_token_pair(user), status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def token_refresh(request):
+    """Rotate a refresh token into a new access/refresh pair"""
+    try:
+        pair = rotate_refresh_token(request.data.get('refresh'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+    return Response(pair, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def token_cache_stats(request):
+    """Token cache hit/miss counters of the process serving the request"""
+    return Response(token_cache.snapshot())
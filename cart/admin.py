@@ -1,6 +1,25 @@
 from django.contrib import admin
+from saveMore.paginators import EstimatedCountPaginator
 from  .models import Cart,CartItem
-admin.site.register(CartItem)
-admin.site.register(Cart)
 
-# Register your models here.
+
+@admin.register(Cart)
+class CartAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'session_key', 'updated_at')
+    list_select_related = ('user',)
+    search_fields = ('=user__username', '=session_key')
+    raw_id_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(CartItem)
+class CartItemAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'cart', 'quantity', 'updated_at')
+    # CartItem.__str__ reads the variant and its product
+    list_select_related = ('cart__user', 'variant__product')
+    search_fields = ('=variant__sku',)
+    raw_id_fields = ('cart', 'variant')
+    ordering = ('-id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,35 @@
+from saveMore.exports import CHUNK_SIZE, day_bounds
+
+from .models import CartItem
+
+CART_EXPORT_HEADER = [
+    'cart_id', 'user', 'session_key', 'cart_updated_at', 'sku', 'product', 'quantity', 'added_at',
+]
+# status filter -> CartItem lookup
+CART_STATUSES = {
+    'user': {'cart__user__isnull': False},
+    'anonymous': {'cart__user__isnull': True},
+}
+
+
+def cart_export(start=None, end=None, status=None, chunk_size=CHUNK_SIZE):
+    """(header, rows) with one row per cart line, least recently used first.
+
+    The date range applies to Cart.updated_at (indexed); status is user or
+    anonymous. Raises ValueError for a bad date or status.
+    """
+    if status and status not in CART_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(CART_STATUSES)}")
+    since, until = day_bounds(start, end)
+    items = CartItem.objects.all()
+    if since:
+        items = items.filter(cart__updated_at__gte=since)
+    if until:
+        items = items.filter(cart__updated_at__lt=until)
+    if status:
+        items = items.filter(**CART_STATUSES[status])
+    rows = items.order_by('cart__updated_at', 'cart_id', 'id').values_list(
+        'cart_id', 'cart__user__username', 'cart__session_key', 'cart__updated_at',
+        'variant__sku', 'variant__product__name', 'quantity', 'added_at',
+    ).iterator(chunk_size=chunk_size)
+    return CART_EXPORT_HEADER, rows
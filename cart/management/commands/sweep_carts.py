@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from cart.tasks import sweep_stale_carts
+
+
+class Command(BaseCommand):
+    help = "Delete stale anonymous carts and expired sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30,
+                            help="Delete anonymous carts not updated for this many days")
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help="Number of carts deleted per statement")
+        parser.add_argument('--keep-sessions', action='store_true',
+                            help="Do not clear expired sessions")
+
+    def handle(self, *args, **options):
+        result = sweep_stale_carts(
+            older_than_days=options['days'],
+            chunk_size=options['chunk_size'],
+            clear_sessions=not options['keep_sessions'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {result['carts_deleted']} carts and {result['items_deleted']} items "
+            f"in {result['seconds']:.2f}s ({result['rows_per_second']:.0f} rows/s)"
+        ))
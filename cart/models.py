@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
+from django.db import transaction
+from django.utils import timezone
 from decimal import Decimal
+import hashlib
 import uuid
 from inventory.models import ProductVariant  # Import from your inventory app
 
@@ -21,6 +24,16 @@ class Cart(models.Model):
     
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Lets the stale cart sweeper find old anonymous carts cheaply
+            models.Index(
+                fields=['updated_at'],
+                condition=models.Q(user__isnull=True),
+                name='cart_anon_updated_idx',
+            ),
+            # Admin change list ordering
+            models.Index(fields=['updated_at'], name='cart_updated_idx'),
+        ]
     
     def __str__(self):
         if self.user:
@@ -37,9 +50,24 @@ class Cart(models.Model):
         """Calculate total cart value"""
         return sum(item.get_total_price() for item in self.items.all())
     
+    @property
+    def version(self):
+        """Fingerprint of the cart contents, changes whenever items change"""
+        return self.items_version(self.items.all())
+    
+    @staticmethod
+    def items_version(items):
+        """Fingerprint of the given cart items (see version)"""
+        digest = hashlib.sha1()
+        for variant_id, quantity in sorted((item.variant_id, item.quantity) for item in items):
+            digest.update(f"{variant_id}:{quantity};".encode())
+        return digest.hexdigest()[:16]
+    
     @property
     def is_empty(self):
-        """Check if cart is empty"""
+        """Check if cart is empty, using the prefetched items when loaded"""
+        if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+            return not self.items.all()
         return not self.items.exists()
     
     def clear(self):
@@ -47,27 +75,44 @@ class Cart(models.Model):
         self.items.all().delete()
     
     def merge_with_user_cart(self, user):
-        """Merge anonymous cart with user's existing cart when they login"""
-        try:
-            user_cart = Cart.objects.get(user=user)
-            # Merge items from this cart to user's cart
-            for item in self.items.all():
-                existing_item = user_cart.items.filter(variant=item.variant).first()
-                if existing_item:
-                    existing_item.quantity += item.quantity
-                    existing_item.save()
-                else:
-                    item.cart = user_cart
-                    item.save()
-            # Delete this anonymous cart
+        """Merge anonymous cart with user's existing cart when they login
+
+        Runs as one transaction in a fixed number of queries: quantities are
+        summed per variant, clamped to available stock and upserted on
+        (cart, variant), then this anonymous cart is deleted.
+        """
+        with transaction.atomic():
+            user_cart = Cart.objects.select_for_update().filter(user=user).first()
+            if user_cart is None:
+                # No existing user cart, just assign this cart to user
+                self.user = user
+                self.session_key = None
+                self.save()
+                return self
+
+            existing = dict(user_cart.items.values_list('variant_id', 'quantity'))
+            merged = []
+            for variant_id, quantity, stock in self.items.values_list(
+                'variant_id', 'quantity', 'variant__inventory__quantity'
+            ):
+                new_quantity = existing.get(variant_id, 0) + quantity
+                if stock is not None:
+                    new_quantity = min(new_quantity, stock)
+                if new_quantity < 1:
+                    continue
+                merged.append(CartItem(cart=user_cart, variant_id=variant_id, quantity=new_quantity))
+
+            if merged:
+                CartItem.objects.bulk_create(
+                    merged,
+                    update_conflicts=True,
+                    unique_fields=['cart', 'variant'],
+                    update_fields=['quantity', 'updated_at'],
+                )
+            # Delete this anonymous cart (its items cascade)
             self.delete()
+            Cart.objects.filter(pk=user_cart.pk).update(updated_at=timezone.now())
             return user_cart
-        except Cart.DoesNotExist:
-            # No existing user cart, just assign this cart to user
-            self.user = user
-            self.session_key = None
-            self.save()
-            return self
 
 class CartItem(models.Model):
     """Individual items in a shopping cart"""
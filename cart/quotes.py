@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core import signing
+
+QUOTE_SALT = 'cart.quote'
+# Seconds a quote stays valid for checkout
+QUOTE_MAX_AGE = getattr(settings, 'CART_QUOTE_MAX_AGE', 15 * 60)
+
+
+def issue_quote(cart, pincode, shipping_cost):
+    """Sign the priced cart lines so checkout can skip re-pricing them"""
+    lines = [
+        [
+            item.variant_id,
+            item.quantity,
+            str(item.get_unit_price()),
+            f"{item.variant.product.name} {item.variant.sku}",
+        ]
+        for item in cart.items.all()
+    ]
+    payload = {
+        'cart': str(cart.pk),
+        'version': cart.version,
+        'pincode': pincode,
+        'fee': str(shipping_cost),
+        'lines': lines,
+    }
+    return signing.dumps(payload, salt=QUOTE_SALT, compress=True)
+
+
+def read_quote(token, cart, pincode):
+    """Return the quote payload if it is still valid for this cart, else None"""
+    if not token:
+        return None
+    try:
+        data = signing.loads(token, salt=QUOTE_SALT, max_age=QUOTE_MAX_AGE)
+    except signing.BadSignature:
+        # Also covers signing.SignatureExpired
+        return None
+    if data.get('cart') != str(cart.pk) or data.get('pincode') != pincode:
+        return None
+    if data.get('version') != cart.version:
+        return None
+    return data
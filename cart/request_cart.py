@@ -0,0 +1,93 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import Http404
+
+from .models import Cart, CartItem
+
+
+def cart_items_prefetch():
+    """Prefetch for cart items with everything pricing and stock checks touch"""
+    return Prefetch(
+        'items',
+        queryset=CartItem.objects.select_related(
+            'variant__product', 'variant__inventory', 'variant__deals'
+        ),
+    )
+
+
+def _cart_lookup(request):
+    """Filter kwargs identifying the current user's cart, or None"""
+    if request.user.is_authenticated:
+        return {'user': request.user}
+    session_key = request.session.session_key
+    if not session_key:
+        return None
+    return {'session_key': session_key, 'user': None}
+
+
+def load_cart(request):
+    """Fetch the current cart with its items prefetched.
+
+    Returns an unsaved Cart when none exists yet, so read-only requests
+    never insert a row.
+    """
+    lookup = _cart_lookup(request)
+    cart = None
+    if lookup is not None:
+        cart = Cart.objects.prefetch_related(cart_items_prefetch()).filter(**lookup).first()
+    if cart is None:
+        if request.user.is_authenticated:
+            cart = Cart(user=request.user)
+        else:
+            cart = Cart(session_key=request.session.session_key)
+        cart._prefetched_objects_cache = {'items': CartItem.objects.none()}
+    return cart
+
+
+def _http_request(request):
+    """Underlying HttpRequest, so DRF and Django views share one cache"""
+    return getattr(request, '_request', request)
+
+
+def get_request_cart(request):
+    """Cart for this request, resolved once and reused by later callers"""
+    http_request = _http_request(request)
+    if not hasattr(http_request, '_cached_cart'):
+        http_request._cached_cart = load_cart(request)
+    return http_request._cached_cart
+
+
+def save_request_cart(request):
+    """Persist the request cart on first write and return it"""
+    cart = get_request_cart(request)
+    if not cart._state.adding:
+        return cart
+
+    if not request.user.is_authenticated:
+        if not request.session.session_key:
+            request.session.create()
+        cart.session_key = request.session.session_key
+    try:
+        with transaction.atomic():
+            cart.save(force_insert=True)
+    except IntegrityError:
+        # Created concurrently by another request for the same user
+        cart = load_cart(request)
+        _http_request(request)._cached_cart = cart
+    return cart
+
+
+def refresh_cart_items(cart):
+    """Reload the prefetched items after the cart was modified"""
+    cart._prefetched_objects_cache.pop('items', None)
+    prefetch_related_objects([cart], cart_items_prefetch())
+    return cart
+
+
+def get_cart_item(cart, item_id):
+    """Find an item among the prefetched cart items or raise Http404"""
+    for item in cart.items.all():
+        if item.id == item_id:
+            return item
+    raise Http404("No CartItem matches the given query.")
+
@@ -2,8 +2,9 @@ from rest_framework import serializers
 from .models import Cart, CartItem
 from inventory.models import ProductVariant, Product,Best_deals
 from inventory.models import InventoryItem
+from inventory.serializers import SparseFieldsMixin
 from decimal import Decimal
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Basic product serializer for cart items"""
     class Meta:
         model = Product
@@ -14,7 +15,7 @@ class InventorySerializer(serializers.ModelSerializer):
         model=InventoryItem
         fields=['varient','quantity']
 
-class ProductVariantSerializer(serializers.ModelSerializer):
+class ProductVariantSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Product variant serializer for cart items"""
     product = ProductSerializer(read_only=True)
     inventory_quantity = serializers.SerializerMethodField()
@@ -40,7 +41,7 @@ class ProductVariantSerializer(serializers.ModelSerializer):
             return 0
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Cart item serializer with product and pricing details"""
     variant = ProductVariantSerializer(read_only=True)
     unit_price = serializers.SerializerMethodField()
@@ -72,7 +73,7 @@ class CartItemSerializer(serializers.ModelSerializer):
         return obj.is_available()
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Cart serializer with all items and totals"""
     items = CartItemSerializer(many=True, read_only=True)
     total_items = serializers.ReadOnlyField()
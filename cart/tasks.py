@@ -0,0 +1,55 @@
+import time
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Cart, CartItem
+
+
+def sweep_stale_carts(older_than_days=30, chunk_size=1000, clear_sessions=True):
+    """Delete anonymous carts untouched for `older_than_days`.
+
+    Carts are removed in chunks ordered by primary key so each DELETE stays
+    short and never holds locks on a large range. Meant to be run
+    periodically (cron, a scheduler or the `sweep_carts` command).
+    Returns a dict with counts and the rows removed per second.
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    stale = (
+        Cart.objects.filter(user__isnull=True, updated_at__lt=cutoff)
+        # Adding items does not touch the cart row, so check them too
+        .exclude(items__updated_at__gte=cutoff)
+        .order_by('pk')
+    )
+
+    started = time.monotonic()
+    carts_deleted = 0
+    items_deleted = 0
+    last_pk = None
+    while True:
+        chunk = stale if last_pk is None else stale.filter(pk__gt=last_pk)
+        ids = list(chunk.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            break
+        last_pk = ids[-1]
+        # Re-checked in the DELETEs: a cart touched since it was listed is kept
+        carts = Cart.objects.filter(pk__in=ids, user__isnull=True, updated_at__lt=cutoff)
+        items_deleted += CartItem.objects.filter(cart__in=carts).exclude(
+            cart__items__updated_at__gte=cutoff
+        ).delete()[0]
+        carts_deleted += carts.exclude(items__updated_at__gte=cutoff).delete()[0]
+
+    if clear_sessions:
+        engine = import_module(settings.SESSION_ENGINE)
+        engine.SessionStore.clear_expired()
+
+    elapsed = time.monotonic() - started
+    rows = carts_deleted + items_deleted
+    return {
+        'carts_deleted': carts_deleted,
+        'items_deleted': items_deleted,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed > 0 else float(rows),
+    }
@@ -1,3 +1,126 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from inventory.factories import make_variants
+from .exports import cart_export
+from .models import Cart, CartItem
+from .tasks import sweep_stale_carts
+
+
+class CartMergeTests(TestCase):
+    def setUp(self):
+        self.variants = make_variants(3, stock=5)
+        self.user = User.objects.create_user('carol', password='secret')
+        self.anonymous = Cart.objects.create(session_key='anon-session')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}")
+
+    def quantities(self, cart):
+        return dict(cart.items.values_list('variant_id', 'quantity'))
+
+    def test_merge_sums_quantities_clamped_to_stock(self):
+        user_cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=user_cart, variant=self.variants[0], quantity=2)
+        CartItem.objects.create(cart=user_cart, variant=self.variants[1], quantity=4)
+        CartItem.objects.create(cart=self.anonymous, variant=self.variants[0], quantity=1)
+        CartItem.objects.create(cart=self.anonymous, variant=self.variants[1], quantity=3)
+        CartItem.objects.create(cart=self.anonymous, variant=self.variants[2], quantity=1)
+
+        response = self.client.post('/api/cart/merge/', {'session_key': 'anon-session'}, format='json')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.quantities(user_cart), {
+            self.variants[0].id: 3, self.variants[1].id: 5, self.variants[2].id: 1,
+        })
+        self.assertFalse(Cart.objects.filter(pk=self.anonymous.pk).exists())
+
+    def test_anonymous_cart_becomes_the_user_cart(self):
+        CartItem.objects.create(cart=self.anonymous, variant=self.variants[0], quantity=2)
+
+        self.client.post('/api/cart/merge/', {'session_key': 'anon-session'}, format='json')
+
+        cart = Cart.objects.get(user=self.user)
+        self.assertEqual(cart.pk, self.anonymous.pk)
+        self.assertIsNone(cart.session_key)
+        self.assertEqual(self.quantities(cart), {self.variants[0].id: 2})
+
+    def test_missing_anonymous_cart(self):
+        response = self.client.post('/api/cart/merge/', {'session_key': 'unknown'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Cart.objects.filter(user=self.user).exists())
+
+
+class CartApiTests(TestCase):
+    def setUp(self):
+        self.variants = make_variants(2, stock=5)
+        self.client = APIClient()
+        user = User.objects.create_user('erin', password='secret')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+
+    def test_reading_an_empty_cart_creates_nothing(self):
+        response = self.client.get('/api/cart/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Cart.objects.exists())
+
+    def test_adding_twice_increases_quantity(self):
+        for _ in range(2):
+            self.client.post('/api/cart/add/', {'variant_id': self.variants[0].id, 'quantity': 2}, format='json')
+        self.assertEqual(Cart.objects.count(), 1)
+        self.assertEqual(CartItem.objects.get().quantity, 4)
+
+    def test_cannot_add_more_than_stock(self):
+        response = self.client.post('/api/cart/add/', {'variant_id': self.variants[0].id, 'quantity': 6}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_is_empty_uses_prefetched_items(self):
+        user = User.objects.get(username='erin')
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, variant=self.variants[0], quantity=1)
+        cart = Cart.objects.prefetch_related('items').get(pk=cart.pk)
+        with self.assertNumQueries(0):
+            self.assertFalse(cart.is_empty)
+
+
+class SweepTests(TestCase):
+    def setUp(self):
+        self.variant = make_variants(1)[0]
+        self.old = timezone.now() - timedelta(days=40)
+
+    def make_cart(self, session_key, item_updated_at):
+        cart = Cart.objects.create(session_key=session_key)
+        CartItem.objects.create(cart=cart, variant=self.variant, quantity=1)
+        Cart.objects.filter(pk=cart.pk).update(updated_at=self.old)
+        CartItem.objects.filter(cart=cart).update(updated_at=item_updated_at)
+        return cart
+
+    def test_only_untouched_anonymous_carts_are_deleted(self):
+        stale = self.make_cart('stale', self.old)
+        active = self.make_cart('active', timezone.now())
+        user_cart = Cart.objects.create(user=User.objects.create_user('dave'))
+        Cart.objects.filter(pk=user_cart.pk).update(updated_at=self.old)
+
+        result = sweep_stale_carts(older_than_days=30, chunk_size=1, clear_sessions=False)
+
+        self.assertEqual(result['carts_deleted'], 1)
+        self.assertEqual(result['items_deleted'], 1)
+        self.assertEqual(set(Cart.objects.values_list('pk', flat=True)), {active.pk, user_cart.pk})
+        self.assertFalse(CartItem.objects.filter(cart_id=stale.pk).exists())
+
+
+class CartExportTests(TestCase):
+    def test_status_splits_user_and_anonymous_carts(self):
+        variant = make_variants(1)[0]
+        for cart in [Cart.objects.create(session_key='anon'), Cart.objects.create(user=User.objects.create_user('fay'))]:
+            CartItem.objects.create(cart=cart, variant=variant, quantity=1)
 
-# Create your tests here.
+        header, rows = cart_export(status='anonymous')
+        rows = [dict(zip(header, row)) for row in rows]
+        self.assertEqual([(row['session_key'], row['user'], row['sku']) for row in rows], [('anon', None, 'sku-0')])
+        with self.assertRaises(ValueError):
+            cart_export(status='abandoned')
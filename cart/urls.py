@@ -19,5 +19,8 @@ urlpatterns = [
     
     # User authentication related
     path('merge/', views.merge_cart, name='merge_cart'),
+    
+    # Staff exports
+    path('exports/carts/', views.export_carts, name='export_carts'),
 ]
 
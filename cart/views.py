@@ -1,5 +1,5 @@
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
@@ -11,7 +11,13 @@ import json
 from .models import Cart, CartItem
 from inventory.models import ProductVariant
 from .serializers import CartSerializer, CartItemSerializer
+from inventory.serializers import sparse_context, wants_compact, compact_rows
 from delivery.models import DeliveryLocation
+from delivery.eta import delivery_eta
+from .request_cart import get_request_cart, save_request_cart, refresh_cart_items, get_cart_item
+from .quotes import issue_quote, QUOTE_MAX_AGE
+from .exports import cart_export
+from saveMore.exports import export_download
 
 
 @api_view(['GET'])
@@ -19,8 +25,8 @@ from delivery.models import DeliveryLocation
 def get_cart(request):
     """Get current user's cart with all items"""
     try:
-        cart = get_or_create_cart(request)
-        serializer = CartSerializer(cart)
+        cart = get_request_cart(request)
+        serializer = CartSerializer(cart, context=sparse_context(request))
         return Response({
             'success': True,
             'cart': serializer.data,
@@ -40,16 +46,15 @@ def get_cart(request):
 def cart_items(request):
     """Get all items in the current user's cart"""
     try:
-        cart = get_or_create_cart(request)
-        items = CartItem.objects.filter(cart=cart).select_related(
-            'variant__product', 'variant__inventory'
-        )
-        serializer = CartItemSerializer(items, many=True)
+        cart = get_request_cart(request)
+        items = cart.items.all()
+        serializer = CartItemSerializer(items, many=True, context=sparse_context(request))
+        data = serializer.data
         
         return Response({
             'success': True,
-            'items': serializer.data,
-            'count': len(serializer.data)
+            'items': compact_rows(data) if wants_compact(request) else data,
+            'count': len(data)
         }, status=status.HTTP_200_OK)
     except Exception as e:
         return Response({
@@ -79,7 +84,9 @@ def add_to_cart(request):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Get variant and check if it exists
-        variant = get_object_or_404(ProductVariant, id=variant_id)
+        variant = get_object_or_404(
+            ProductVariant.objects.select_related('product', 'inventory'), id=variant_id
+        )
         
         # Check inventory availability
         try:
@@ -115,6 +122,7 @@ def add_to_cart(request):
             cart_item.quantity = new_quantity
             cart_item.save()
         
+        refresh_cart_items(cart)
         serializer = CartItemSerializer(cart_item)
         
         return Response({
@@ -145,8 +153,8 @@ def update_cart_item(request, item_id):
                 'error': 'Quantity must be at least 1'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        cart = get_or_create_cart(request)
-        cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
+        cart = get_request_cart(request)
+        cart_item = get_cart_item(cart, item_id)
         
     
         # Check inventory availability
@@ -158,6 +166,7 @@ def update_cart_item(request, item_id):
         
         cart_item.quantity = quantity
         cart_item.save()
+        refresh_cart_items(cart)
         
         serializer = CartItemSerializer(cart_item)
         
@@ -181,11 +190,12 @@ def update_cart_item(request, item_id):
 def remove_from_cart(request, item_id):
     """Remove a specific item from cart"""
     try:
-        cart = get_or_create_cart(request)
-        cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
+        cart = get_request_cart(request)
+        cart_item = get_cart_item(cart, item_id)
         
         product_name = cart_item.variant.product.name
         cart_item.delete()
+        refresh_cart_items(cart)
         
         return Response({
             'success': True,
@@ -208,8 +218,8 @@ def increase_quantity(request, item_id):
     try:
         amount = int(request.data.get('amount', 1))
         
-        cart = get_or_create_cart(request)
-        cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
+        cart = get_request_cart(request)
+        cart_item = get_cart_item(cart, item_id)
         
         new_quantity = cart_item.quantity + amount
         
@@ -221,6 +231,7 @@ def increase_quantity(request, item_id):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         cart_item.increase_quantity(amount)
+        refresh_cart_items(cart)
         serializer = CartItemSerializer(cart_item)
         
         return Response({
@@ -245,13 +256,14 @@ def decrease_quantity(request, item_id):
     try:
         amount = int(request.data.get('amount', 1))
         
-        cart = get_or_create_cart(request)
-        cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
+        cart = get_request_cart(request)
+        cart_item = get_cart_item(cart, item_id)
         
         if cart_item.quantity <= amount:
             # If quantity becomes 0 or less, remove item
             product_name = cart_item.variant.product.name
             cart_item.delete()
+            refresh_cart_items(cart)
             
             return Response({
                 'success': True,
@@ -262,6 +274,7 @@ def decrease_quantity(request, item_id):
             }, status=status.HTTP_200_OK)
         
         cart_item.decrease_quantity(amount)
+        refresh_cart_items(cart)
         serializer = CartItemSerializer(cart_item)
         
         return Response({
@@ -284,9 +297,10 @@ def decrease_quantity(request, item_id):
 def clear_cart(request):
     """Remove all items from cart"""
     try:
-        cart = get_or_create_cart(request)
+        cart = get_request_cart(request)
         items_count = cart.total_items
         cart.clear()
+        refresh_cart_items(cart)
         
         return Response({
             'success': True,
@@ -325,7 +339,7 @@ def cart_summary(request):
     available, location = DeliveryLocation.check_delivery_available(pincode)
         
     try:
-        cart = get_or_create_cart(request)
+        cart = get_request_cart(request)
         
         # Calculate additional costs (you can customize these)
         subtotal = cart.total_amount
@@ -346,8 +360,12 @@ def cart_summary(request):
                 'shipping_cost': float(shipping_cost),
                 'total_amount': float(total_amount),
                 'free_shipping_threshold': location.minimum_order,
-                'is_free_shipping': shipping_cost == 0
-            }
+                'is_free_shipping': shipping_cost == 0,
+                'eta': delivery_eta(location)
+            },
+            # Signed snapshot of these prices, accepted by checkout
+            'quote': issue_quote(cart, pincode, shipping_cost),
+            'quote_expires_in': QUOTE_MAX_AGE
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -399,15 +417,15 @@ def merge_cart(request):
 
 
 def get_or_create_cart(request):
-    """Helper function to get or create cart for authenticated or anonymous users"""
-    if request.user.is_authenticated:
-        cart, created = Cart.objects.get_or_create(user=request.user)
-    else:
-        session_key = request.session.session_key
-        if not session_key:
-            request.session.create()
-            session_key = request.session.session_key
-        
-        cart, created = Cart.objects.get_or_create(session_key=session_key, user=None)
-    
-    return cart
\ No newline at end of file
+    """Helper function to get or create cart for authenticated or anonymous users
+
+    Reuses the request-scoped cart and only inserts a row on the first write.
+    """
+    return save_request_cart(request)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_carts(request):
+    """Stream cart lines as CSV or JSON Lines (staff only)"""
+    return export_download(request, 'carts', cart_export)
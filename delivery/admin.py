@@ -1,11 +1,75 @@
 from django.contrib import admin
+from saveMore.paginators import EstimatedCountPaginator
 from .models import DeliveryLocation,CustomerAddress,Payment,Order,OrderItem,DeliveryTracking
 # Register your models here.
-admin.site.register(DeliveryLocation)
-admin.site.register(CustomerAddress)
-admin.site.register(Payment)
-admin.site.register(Order)
-admin.site.register(DeliveryTracking)
-admin.site.register(OrderItem)
 
 
+@admin.register(DeliveryLocation)
+class DeliveryLocationAdmin(admin.ModelAdmin):
+    list_display = ('pincode', 'area_name', 'city', 'is_available', 'delivery_fee', 'estimated_delivery_hours')
+    list_filter = ('is_available',)
+    search_fields = ('=pincode', 'area_name', 'city')
+
+
+@admin.register(CustomerAddress)
+class CustomerAddressAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'title', 'is_default', 'created_at')
+    list_select_related = ('user',)
+    search_fields = ('=user__username', '=pincode', '=phone')
+    raw_id_fields = ('user',)
+    ordering = ('-id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    raw_id_fields = ('variant',)
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ('order_number', 'customer', 'status', 'payment_status', 'total_amount', 'created_at')
+    # Order.__str__ reads the customer
+    list_select_related = ('customer',)
+    # Served by orders_status_created_idx
+    list_filter = ('status',)
+    search_fields = ('=order_number', '=customer__username')
+    raw_id_fields = ('customer', 'delivery_address')
+    inlines = [OrderItemInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ('payment_id', 'order', 'amount', 'payment_method', 'status', 'initiated_at')
+    list_select_related = ('order__customer',)
+    search_fields = ('=payment_id', '=gateway_transaction_id')
+    raw_id_fields = ('order',)
+    ordering = ('-id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(DeliveryTracking)
+class DeliveryTrackingAdmin(admin.ModelAdmin):
+    list_display = ('order', 'current_status', 'delivery_person_name', 'last_updated')
+    list_select_related = ('order__customer',)
+    search_fields = ('=order__order_number',)
+    raw_id_fields = ('order',)
+    ordering = ('-id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(OrderItem)
+class OrderItemAdmin(admin.ModelAdmin):
+    list_display = ('product_name', 'order', 'quantity', 'price_per_item', 'total_price')
+    list_select_related = ('order__customer',)
+    search_fields = ('=order__order_number', '=product_id')
+    raw_id_fields = ('order', 'variant')
+    ordering = ('-id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,33 @@
+from collections import namedtuple
+
+from django.db.models import CharField, IntegerField, Max, Min
+from django.db.models.functions import Cast
+
+from inventory.models import ProductVariant
+from .models import OrderItem
+
+BackfillProgress = namedtuple('BackfillProgress', ['last_pk', 'max_pk', 'updated'])
+
+
+def backfill_order_item_variants(chunk_size=5000, start_pk=None):
+    """Fill OrderItem.variant from the product_id text of older lines.
+
+    Walks the primary key range in fixed-size windows, each a single
+    autocommitted UPDATE so locks are held only briefly, and yields a
+    BackfillProgress after every window. Lines already linked are skipped,
+    so an interrupted run can simply be started again (or resumed from the
+    last reported pk with `start_pk`).
+    """
+    pending = OrderItem.objects.filter(variant__isnull=True)
+    bounds = pending.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return
+    low = max(bounds['low'], start_pk or 0)
+    known_ids = ProductVariant.objects.annotate(key=Cast('id', CharField())).values('key')
+    while low <= bounds['high']:
+        high = low + chunk_size
+        updated = pending.filter(pk__gte=low, pk__lt=high, product_id__in=known_ids).update(
+            variant_id=Cast('product_id', IntegerField())
+        )
+        yield BackfillProgress(min(high - 1, bounds['high']), bounds['high'], updated)
+        low = high
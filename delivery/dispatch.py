@@ -0,0 +1,179 @@
+import math
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import DeliveryLocation, Order, OrderStatus
+
+DispatchOrder = namedtuple('DispatchOrder', ['order_id', 'pincode', 'due_at'])
+RouteStop = namedtuple('RouteStop', ['pincode', 'order_ids', 'eta'])
+Route = namedtuple('Route', ['stops', 'distance_km', 'late_orders'])
+
+# Planning defaults, overridable in settings
+RIDER_CAPACITY = getattr(settings, 'DISPATCH_RIDER_CAPACITY', 10)
+RIDER_SPEED_KMPH = getattr(settings, 'DISPATCH_RIDER_SPEED_KMPH', 20)
+STOP_MINUTES = getattr(settings, 'DISPATCH_STOP_MINUTES', 5)
+
+_matrix_cache = {}
+
+
+def haversine_km(a, b):
+    lat1, lon1 = map(math.radians, a)
+    lat2, lon2 = map(math.radians, b)
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 12742 * math.asin(math.sqrt(h))
+
+
+def distance_matrix(points):
+    """Pairwise km distances for a tuple of (lat, lon), cached per point set"""
+    matrix = _matrix_cache.get(points)
+    if matrix is None:
+        matrix = [[haversine_km(a, b) for b in points] for a in points]
+        if len(_matrix_cache) > 32:
+            _matrix_cache.clear()
+        _matrix_cache[points] = matrix
+    return matrix
+
+
+def _route_schedule(path, matrix, deadlines, speed, stop_minutes):
+    """Arrival minutes at each node of `path` (starting at the depot, node 0)
+    and how many minutes late the worst stop is"""
+    arrivals = []
+    clock = 0.0
+    position = 0
+    worst = 0.0
+    for node in path:
+        clock += matrix[position][node] / speed * 60
+        arrivals.append(clock)
+        worst = max(worst, clock - deadlines[node])
+        clock += stop_minutes
+        position = node
+    return arrivals, worst
+
+
+def _path_length(path, matrix):
+    length = matrix[0][path[0]] if path else 0.0
+    for a, b in zip(path, path[1:]):
+        length += matrix[a][b]
+    return length
+
+
+def two_opt(path, matrix, deadlines, speed, stop_minutes):
+    """Shorten a route by reversing segments, never making it later"""
+    _, lateness = _route_schedule(path, matrix, deadlines, speed, stop_minutes)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(path) - 1):
+            before = path[i - 1] if i else 0
+            for j in range(i + 1, len(path)):
+                after = path[j + 1] if j + 1 < len(path) else None
+                # Open route: no return leg to the depot
+                old = matrix[before][path[i]] + (matrix[path[j]][after] if after is not None else 0)
+                new = matrix[before][path[j]] + (matrix[path[i]][after] if after is not None else 0)
+                if new < old - 1e-9:
+                    candidate = path[:i] + path[i:j + 1][::-1] + path[j + 1:]
+                    _, candidate_lateness = _route_schedule(candidate, matrix, deadlines, speed, stop_minutes)
+                    if candidate_lateness <= max(lateness, 0):
+                        path, lateness = candidate, candidate_lateness
+                        improved = True
+    return path
+
+
+def plan_routes(orders, coordinates, depot=None, capacity=RIDER_CAPACITY,
+                speed_kmph=RIDER_SPEED_KMPH, stop_minutes=STOP_MINUTES, start_at=None):
+    """Group orders into rider routes.
+
+    `orders` are DispatchOrders, `coordinates` maps pincode -> (lat, lon).
+    Routes are grown nearest-neighbour from the depot, taking the earliest
+    due orders of each stop, until the rider is full or no remaining stop
+    can be reached before its promised time; each route is then improved
+    with 2-opt. Orders without coordinates are returned as unrouted.
+    Returns (routes, unrouted_order_ids).
+    """
+    start_at = start_at or timezone.now()
+    by_pincode = {}
+    unrouted = []
+    for order in orders:
+        if order.pincode in coordinates:
+            by_pincode.setdefault(order.pincode, []).append(order)
+        else:
+            unrouted.append(order.order_id)
+    if not by_pincode:
+        return [], unrouted
+
+    pincodes = sorted(by_pincode)
+    points = [coordinates[pincode] for pincode in pincodes]
+    if depot is None:
+        depot = getattr(settings, 'DISPATCH_DEPOT', None) or (
+            sum(p[0] for p in points) / len(points),
+            sum(p[1] for p in points) / len(points),
+        )
+    matrix = distance_matrix(tuple([tuple(depot)] + points))
+
+    # Node i + 1 is pincodes[i]; orders per node, most urgent last for pop()
+    pending = {}
+    for index, pincode in enumerate(pincodes, start=1):
+        pending[index] = sorted(by_pincode[pincode], key=lambda o: o.due_at, reverse=True)
+
+    def minutes_until(moment):
+        return (moment - start_at).total_seconds() / 60
+
+    routes = []
+    while pending:
+        path, taken = [], {}
+        load, clock, position = 0, 0.0, 0
+        deadlines = {}
+        while load < capacity and pending:
+            best, best_distance = None, None
+            for node, waiting in pending.items():
+                distance = matrix[position][node]
+                arrival = clock + distance / speed_kmph * 60
+                if path and arrival > minutes_until(waiting[-1].due_at):
+                    continue
+                if best is None or distance < best_distance:
+                    best, best_distance = node, distance
+            if best is None:
+                break
+            waiting = pending[best]
+            batch = [waiting.pop() for _ in range(min(capacity - load, len(waiting)))]
+            if not waiting:
+                del pending[best]
+            deadlines[best] = minutes_until(batch[0].due_at)
+            clock += best_distance / speed_kmph * 60 + stop_minutes
+            position = best
+            path.append(best)
+            taken[best] = batch
+            load += len(batch)
+
+        path = two_opt(path, matrix, deadlines, speed_kmph, stop_minutes)
+        arrivals, _ = _route_schedule(path, matrix, deadlines, speed_kmph, stop_minutes)
+        stops = []
+        late = []
+        for node, arrival in zip(path, arrivals):
+            eta = start_at + timedelta(minutes=arrival)
+            stops.append(RouteStop(pincodes[node - 1], [o.order_id for o in taken[node]], eta))
+            late.extend(o.order_id for o in taken[node] if o.due_at < eta)
+        routes.append(Route(stops, _path_length(path, matrix), late))
+    return routes, unrouted
+
+
+def pending_dispatch_orders():
+    """Confirmed and preparing orders with their promised delivery time"""
+    rows = list(Order.objects.filter(
+        status__in=[OrderStatus.CONFIRMED, OrderStatus.PREPARING]
+    ).values_list('id', 'delivery_address__pincode', 'placed_at', 'created_at'))
+    locations = DeliveryLocation.check_delivery_available_many({row[1] for row in rows})
+    orders = []
+    for order_id, pincode, placed_at, created_at in rows:
+        location = locations.get(pincode)
+        hours = location.estimated_delivery_hours if location else 0
+        orders.append(DispatchOrder(order_id, pincode, (placed_at or created_at) + timedelta(hours=hours)))
+    coordinates = {
+        pincode: (location.latitude, location.longitude)
+        for pincode, location in locations.items()
+        if location.latitude is not None and location.longitude is not None
+    }
+    return orders, coordinates
@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .indexes import VersionedIndex
+from .models import DeliveryEta, JobWatermark, Order, OrderStatus
+from .utils import chunks
+
+# Histogram layout: BIN_MINUTES wide bins, the last one also holds anything slower
+BIN_MINUTES = 5
+BINS = 96
+# Below this many samples an hour of week falls back to the pincode-wide figures
+MIN_SAMPLES = getattr(settings, 'DELIVERY_ETA_MIN_SAMPLES', 20)
+WATERMARK = 'delivery_eta'
+HOURS = DeliveryEta.ALL_HOURS + 1
+
+
+class EtaIndex(VersionedIndex):
+    """(pincode, hour of week) -> (p50, p90, samples) from the DeliveryEta table"""
+
+    version_key = 'delivery:eta_index:version'
+
+    def load(self):
+        return {
+            (pincode, hour): (p50, p90, samples)
+            for pincode, hour, p50, p90, samples in DeliveryEta.objects.values_list(
+                'pincode', 'hour_of_week', 'p50_minutes', 'p90_minutes', 'sample_count'
+            )
+        }
+
+    def estimate(self, pincode, when=None):
+        """(p50, p90) delivery minutes for an order placed at `when`, or None"""
+        when = timezone.localtime(when)
+        table = self._current()
+        hourly = table.get((str(pincode), when.weekday() * 24 + when.hour))
+        if hourly and hourly[2] >= MIN_SAMPLES:
+            return hourly[0], hourly[1]
+        overall = table.get((str(pincode), DeliveryEta.ALL_HOURS))
+        if overall:
+            return overall[0], overall[1]
+        return None
+
+
+eta_index = EtaIndex()
+
+
+def delivery_eta(location, when=None):
+    """ETA for a DeliveryLocation, from history when available else its static hours"""
+    estimate = eta_index.estimate(location.pincode, when)
+    if estimate:
+        return {'p50_minutes': estimate[0], 'p90_minutes': estimate[1], 'source': 'history'}
+    minutes = location.estimated_delivery_hours * 60
+    return {'p50_minutes': minutes, 'p90_minutes': minutes, 'source': 'static'}
+
+
+def _quantiles(histograms, np, *qs):
+    """Upper bin edge, in minutes, reaching each quantile for every histogram row"""
+    cdf = np.cumsum(histograms, axis=1) / np.maximum(histograms.sum(axis=1, keepdims=True), 1)
+    return [(np.argmax(cdf >= q, axis=1) + 1) * BIN_MINUTES for q in qs]
+
+
+def refresh_eta(full=False, chunk_size=5000):
+    """Fold delivered orders into the per-pincode, per-hour-of-week histograms.
+
+    Incremental by default: only orders delivered after the stored watermark
+    are read, streamed in chunks, and their counts are added to the existing
+    histograms. `full` rebuilds from all history. Returns the number of
+    orders processed.
+    """
+    import numpy as np
+
+    since = None if full else JobWatermark.get(WATERMARK)
+    orders = Order.objects.filter(
+        status=OrderStatus.DELIVERED, placed_at__isnull=False, delivered_at__isnull=False
+    )
+    if since is not None:
+        orders = orders.filter(delivered_at__gt=since)
+    rows = orders.values_list('delivery_address__pincode', 'placed_at', 'delivered_at').iterator(chunk_size=chunk_size)
+
+    offset = timezone.localtime().utcoffset().total_seconds()
+    pincodes = {}
+    partial_keys, partial_counts = [], []
+    processed = 0
+    watermark = since
+    for chunk in chunks(rows, chunk_size):
+        pins = np.fromiter((pincodes.setdefault(row[0], len(pincodes)) for row in chunk), np.int64, len(chunk))
+        placed = np.fromiter((row[1].timestamp() for row in chunk), np.float64, len(chunk))
+        delivered = np.fromiter((row[2].timestamp() for row in chunk), np.float64, len(chunk))
+        latest = max(row[2] for row in chunk)
+        watermark = latest if watermark is None else max(watermark, latest)
+        processed += len(chunk)
+
+        bins = np.clip((delivered - placed) // (BIN_MINUTES * 60), 0, BINS - 1).astype(np.int64)
+        # The Unix epoch was a Thursday, 72 hours into the week
+        hours = ((placed + offset) // 3600 + 72).astype(np.int64) % 168
+        keys = np.concatenate([
+            (pins * HOURS + hours) * BINS + bins,
+            (pins * HOURS + DeliveryEta.ALL_HOURS) * BINS + bins,
+        ])
+        unique, counts = np.unique(keys, return_counts=True)
+        partial_keys.append(unique)
+        partial_counts.append(counts)
+
+    if not processed:
+        return 0
+
+    keys = np.concatenate(partial_keys)
+    counts = np.concatenate(partial_counts)
+    order = np.argsort(keys, kind='stable')
+    keys, counts = keys[order], counts[order]
+    unique, starts = np.unique(keys, return_index=True)
+    counts = np.add.reduceat(counts, starts)
+
+    groups, positions = np.unique(unique // BINS, return_inverse=True)
+    histograms = np.zeros((len(groups), BINS), dtype=np.uint32)
+    histograms[positions, unique % BINS] = counts
+    names = {index: pincode for pincode, index in pincodes.items()}
+    cells = [(names[int(group // HOURS)], int(group % HOURS)) for group in groups]
+
+    with transaction.atomic():
+        if full:
+            DeliveryEta.objects.all().delete()
+        else:
+            existing = DeliveryEta.objects.filter(pincode__in=set(pincodes)).values_list(
+                'pincode', 'hour_of_week', 'histogram'
+            )
+            row_of = {cell: i for i, cell in enumerate(cells)}
+            for pincode, hour, histogram in existing:
+                i = row_of.get((pincode, hour))
+                if i is not None:
+                    histograms[i] += np.frombuffer(bytes(histogram), dtype=np.uint32)
+
+        p50, p90 = _quantiles(histograms, np, 0.5, 0.9)
+        samples = histograms.sum(axis=1)
+        DeliveryEta.objects.bulk_create(
+            [
+                DeliveryEta(
+                    pincode=pincode, hour_of_week=hour, histogram=histograms[i].tobytes(),
+                    sample_count=int(samples[i]), p50_minutes=int(p50[i]), p90_minutes=int(p90[i]),
+                )
+                for i, (pincode, hour) in enumerate(cells)
+            ],
+            update_conflicts=True,
+            unique_fields=['pincode', 'hour_of_week'],
+            update_fields=['histogram', 'sample_count', 'p50_minutes', 'p90_minutes', 'updated_at'],
+            batch_size=1000,
+        )
+        JobWatermark.advance(WATERMARK, watermark)
+        eta_index.invalidate()
+    return processed
@@ -0,0 +1,35 @@
+from saveMore.exports import CHUNK_SIZE, day_bounds
+
+from .models import OrderItem, OrderStatus
+
+ORDER_EXPORT_HEADER = [
+    'order_number', 'created_at', 'status', 'payment_status', 'customer', 'pincode',
+    'items_total', 'delivery_fee', 'total_amount',
+    'variant_id', 'product_id', 'product_name', 'quantity', 'price_per_item', 'line_total',
+]
+
+
+def order_export(start=None, end=None, status=None, chunk_size=CHUNK_SIZE):
+    """(header, rows) with one row per order line, oldest order first.
+
+    Filters on Order.created_at and Order.status, served by the orders
+    (status, created_at) and (created_at) indexes. Raises ValueError for a
+    bad date or status.
+    """
+    if status and status not in OrderStatus.values:
+        raise ValueError(f"status must be one of {', '.join(OrderStatus.values)}")
+    since, until = day_bounds(start, end)
+    lines = OrderItem.objects.all()
+    if since:
+        lines = lines.filter(order__created_at__gte=since)
+    if until:
+        lines = lines.filter(order__created_at__lt=until)
+    if status:
+        lines = lines.filter(order__status=status)
+    rows = lines.order_by('order__created_at', 'order_id', 'id').values_list(
+        'order__order_number', 'order__created_at', 'order__status', 'order__payment_status',
+        'order__customer__username', 'order__delivery_address__pincode',
+        'order__items_total', 'order__delivery_fee', 'order__total_amount',
+        'variant_id', 'product_id', 'product_name', 'quantity', 'price_per_item', 'total_price',
+    ).iterator(chunk_size=chunk_size)
+    return ORDER_EXPORT_HEADER, rows
@@ -0,0 +1,132 @@
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+# Seconds a stored response is replayed for
+IDEMPOTENCY_KEY_TTL = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+# Seconds a claim is held for the running request; past that, a retry may
+# take it over. Keep it above the worker timeout.
+IDEMPOTENCY_LEASE = getattr(settings, 'IDEMPOTENCY_LEASE', 60)
+CLAIM_ATTEMPTS = 3
+
+
+def _cache_key(user_id, key):
+    return f"idempotency:{user_id}:{key}"
+
+
+def _replay(status_code, body):
+    response = Response(body, status=status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _claim(user, key, endpoint):
+    """Insert the key row, or take over an expired key or an abandoned claim.
+
+    Returns (record, created). A claim whose lease ran out belongs to a
+    request whose worker died (a gunicorn timeout, say) before storing or
+    deleting it, so the retry runs the view instead of waiting for the key
+    to expire.
+    """
+    for _ in range(CLAIM_ATTEMPTS):
+        now = timezone.now()
+        lease = now + timedelta(seconds=IDEMPOTENCY_LEASE)
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user, key=key, endpoint=endpoint, locked_until=lease,
+                    expires_at=now + timedelta(seconds=IDEMPOTENCY_KEY_TTL),
+                )
+            return record, True
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if record is None:
+            # The winner gave its claim up (error or rollback): claim again
+            continue
+        if record.expires_at <= now:
+            # Expired key reused: forget the old response and claim it again
+            IdempotencyKey.objects.filter(pk=record.pk, expires_at=record.expires_at).delete()
+            continue
+        if not record.is_complete and record.locked_until is not None and record.locked_until <= now:
+            # Only one retry can move the lease it read
+            taken = IdempotencyKey.objects.filter(
+                pk=record.pk, response_status__isnull=True, locked_until=record.locked_until,
+            ).update(locked_until=lease, endpoint=endpoint)
+            if taken:
+                record.locked_until, record.endpoint = lease, endpoint
+                return record, True
+            continue
+        return record, False
+    return None, False
+
+
+def _release(record):
+    """Drop our claim unless another request has taken it over since"""
+    IdempotencyKey.objects.filter(pk=record.pk, locked_until=record.locked_until).delete()
+
+
+def idempotent(view):
+    """Run a POST view at most once per (user, Idempotency-Key).
+
+    The first response is stored (cache plus the idempotency_keys table) and
+    replayed for retries. A duplicate arriving while the first request is
+    still running gets 409; once its IDEMPOTENCY_LEASE runs out the claim
+    is considered abandoned and a retry runs the view. Server errors are
+    not stored so they can be retried. Place directly above the view function, below @api_view.
+    """
+    endpoint = view.__name__
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        if len(key) > 100:
+            return Response({'success': False, 'error': f'{HEADER} is too long'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        cache_key = _cache_key(request.user.pk, key)
+        cached = cache.get(cache_key)
+        if cached is not None and cached[0] == endpoint:
+            return _replay(cached[1], cached[2])
+
+        record, created = _claim(request.user, key, endpoint)
+        if not created:
+            if record is None or not record.is_complete:
+                return Response({'success': False, 'error': 'A request with this key is still in progress'},
+                                status=status.HTTP_409_CONFLICT)
+            if record.endpoint != endpoint:
+                return Response({'success': False, 'error': f'{HEADER} was already used for another request'},
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            cache.set(cache_key, (endpoint, record.response_status, record.response_body), IDEMPOTENCY_KEY_TTL)
+            return _replay(record.response_status, record.response_body)
+
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            _release(record)
+            raise
+        if response.status_code >= 500:
+            _release(record)
+            return response
+
+        # Store what the client saw, so cache and table replay identically
+        body = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+        IdempotencyKey.objects.filter(pk=record.pk, locked_until=record.locked_until).update(
+            response_status=response.status_code, response_body=body, locked_until=None,
+        )
+        cache.set(cache_key, (endpoint, response.status_code, body), IDEMPOTENCY_KEY_TTL)
+        return response
+
+    return wrapper
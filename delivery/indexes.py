@@ -0,0 +1,108 @@
+import abc
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from saveMore.caches import cache_is_shared
+
+# How often (seconds) a process checks whether another process changed the data
+VERSION_CHECK_INTERVAL = 5
+# Seconds a version stays in the shared cache before it is re-read from the
+# database; bounds how long a lost cache update can hide a change
+VERSION_CACHE_TTL = 60
+
+
+class VersionedIndex(abc.ABC):
+    """Process-wide in-memory copy of a small table.
+
+    Loaded lazily on first use and reloaded when the data version (the
+    IndexVersion row named `version_key`) changes. The version is checked
+    at most every VERSION_CHECK_INTERVAL seconds, from the shared cache
+    when there is one (Redis or Memcached), so lookups never touch the
+    database; the table is read only on a cache miss, or on every check
+    when the cache is per-process. Subclasses implement load().
+
+    The version is only ever written after a commit, so whatever a check
+    reads, inside a transaction or not, is a committed version and safe to
+    put in the shared cache.
+    """
+
+    version_key = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+        self._version = None
+        self._checked_at = 0.0
+
+    @abc.abstractmethod
+    def load(self):
+        """Read the table; returns the object lookups are served from"""
+
+    def _current(self):
+        # clear() may reset _data from another thread, so read it once
+        data = self._data
+        now = time.monotonic()
+        if data is not None and now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return data
+        version = self._read_version()
+        if data is not None and version == self._version:
+            self._checked_at = now
+            return data
+        with self._lock:
+            if self._data is None or version != self._version:
+                self._data = self.load()
+                self._version = version
+            self._checked_at = now
+            return self._data
+
+    def _read_version(self):
+        shared = cache_is_shared()
+        if shared:
+            version = cache.get(self.version_key)
+            if version is not None:
+                return version
+        from .models import IndexVersion
+        version = IndexVersion.objects.filter(name=self.version_key).values_list('version', flat=True).first() or 0
+        if shared:
+            cache.add(self.version_key, version, VERSION_CACHE_TTL)
+        return version
+
+    def clear(self):
+        """Drop this process's copy; the next lookup reloads it"""
+        with self._lock:
+            self._data = None
+
+    def invalidate(self):
+        """Make every process reload the index once the change is committed.
+
+        Nothing happens until the caller's transaction commits, and nothing
+        at all when it rolls back: the version is bumped, this process's
+        copy dropped and the new version published to the shared cache
+        from an on_commit callback. Lookups made inside the transaction
+        keep using the copy this process already had.
+        """
+        transaction.on_commit(self._publish)
+
+    def _publish(self):
+        version = self._bump_version()
+        self.clear()
+        if cache_is_shared():
+            cache.set(self.version_key, version, VERSION_CACHE_TTL)
+
+    def _bump_version(self):
+        """Increment the stored version and return it"""
+        from .models import IndexVersion
+        counter = IndexVersion.objects.filter(name=self.version_key)
+        with transaction.atomic():
+            if not counter.update(version=F('version') + 1):
+                try:
+                    with transaction.atomic():
+                        IndexVersion.objects.create(name=self.version_key, version=1)
+                except IntegrityError:
+                    # Created concurrently by another process
+                    counter.update(version=F('version') + 1)
+            return counter.values_list('version', flat=True).get()
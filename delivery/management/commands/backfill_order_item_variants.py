@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from delivery.backfills import backfill_order_item_variants
+
+
+class Command(BaseCommand):
+    help = "Link older order items to their ProductVariant in primary key chunks (safe to re-run)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--start-pk', type=int, help="Resume from this order item id")
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help="Seconds to sleep between chunks to go easy on the database")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = 0
+        for progress in backfill_order_item_variants(options['chunk_size'], options['start_pk']):
+            total += progress.updated
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"pk {progress.last_pk}/{progress.max_pk}: {total} rows linked, "
+                f"{total / elapsed if elapsed else 0:.0f} rows/s"
+            )
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Linked {total} order items in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,137 @@
+import random
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from cart.models import Cart, CartItem
+from delivery.models import CustomerAddress, DeliveryLocation, Order
+from delivery.orders import checkout_cart
+from inventory.models import Brand, Category, InventoryItem, Product, ProductVariant
+
+
+class Command(BaseCommand):
+    help = ("Benchmark concurrent cart checkouts competing for overlapping SKUs. "
+            "Creates its own throwaway catalog, users and orders and removes them "
+            "afterwards; run against a development or staging database. Refuses to "
+            "run unless DEBUG is on or --yes is given. SQLite serializes writers, so "
+            "expect 'database is locked' errors there.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Concurrent checkout workers")
+        parser.add_argument('--checkouts', type=int, default=50, help="Checkouts per worker")
+        parser.add_argument('--skus', type=int, default=10, help="Size of the shared SKU pool")
+        parser.add_argument('--lines', type=int, default=3, help="Cart lines per checkout")
+        parser.add_argument('--stock', type=int, default=200, help="Starting stock per SKU")
+        parser.add_argument('--yes', action='store_true',
+                            help="Run although DEBUG is off; the benchmark writes to this database")
+
+    def handle(self, *args, **options):
+        if not (settings.DEBUG or options['yes']):
+            raise CommandError("DEBUG is off, this may be a production database; pass --yes to run anyway")
+        tag = f"bench-{uuid.uuid4().hex[:8]}"
+        try:
+            self._run(tag, options)
+        finally:
+            # Everything created is found by its tag, so a failed setup is
+            # cleaned up as well
+            self._teardown(tag)
+
+    def _run(self, tag, options):
+        variants, addresses = self._setup(tag, options)
+        results = {'ok': 0, 'out_of_stock': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def worker(address):
+            cart, _ = Cart.objects.get_or_create(user=address.user)
+            rng = random.Random(address.id)
+            counts = {'ok': 0, 'out_of_stock': 0, 'errors': 0}
+            try:
+                for _ in range(options['checkouts']):
+                    picked = rng.sample(variants, min(options['lines'], len(variants)))
+                    CartItem.objects.bulk_create([
+                        CartItem(cart=cart, variant=variant, quantity=rng.randint(1, 3))
+                        for variant in picked
+                    ])
+                    try:
+                        checkout_cart(cart, address)
+                        counts['ok'] += 1
+                    except ValueError:
+                        cart.items.all().delete()
+                        counts['out_of_stock'] += 1
+                    except Exception as e:
+                        cart.items.all().delete()
+                        counts['errors'] += 1
+                        self.stderr.write(f"checkout failed: {e}")
+            finally:
+                connection.close()
+            with lock:
+                for key, value in counts.items():
+                    results[key] += value
+
+        threads = [threading.Thread(target=worker, args=(address,)) for address in addresses]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        self._report(results, elapsed, variants, options)
+
+    def _setup(self, tag, options):
+        category = Category.objects.create(name=tag, code=tag[:20])
+        brand = Brand.objects.create(name=tag)
+        variants = []
+        for i in range(options['skus']):
+            product = Product.objects.create(
+                name=f"{tag} product {i}", code=f"{tag}-{i}", category=category,
+                brand=brand, base_price=Decimal('10.00'),
+            )
+            variant = ProductVariant.objects.create(product=product, variant_name='default', sku=f"{tag}-{i}")
+            InventoryItem.objects.create(variant=variant, quantity=options['stock'])
+            variants.append(variant)
+
+        # Ten digits, longer than any real pincode, and checked to be unused
+        pincode = str(random.randint(10 ** 9, 10 ** 10 - 1))
+        while DeliveryLocation.objects.filter(pincode=pincode).exists():
+            pincode = str(random.randint(10 ** 9, 10 ** 10 - 1))
+        location = DeliveryLocation.objects.create(
+            pincode=pincode, area_name=tag,
+            city='Bench', state='Bench', minimum_order=Decimal('0.00'),
+        )
+        addresses = []
+        for i in range(options['threads']):
+            user = User.objects.create(username=f"{tag}-{i}")
+            addresses.append(CustomerAddress.objects.create(
+                user=user, full_address=tag, pincode=location.pincode, phone='9999999999',
+            ))
+        return variants, addresses
+
+    def _report(self, results, elapsed, variants, options):
+        stock = InventoryItem.objects.filter(variant__in=variants).values_list('quantity', flat=True)
+        units_left = sum(stock)
+        units_sold = options['stock'] * len(variants) - units_left
+        attempted = sum(results.values())
+        self.stdout.write(
+            f"{attempted} checkouts in {elapsed:.2f}s "
+            f"({attempted / elapsed:.1f}/s, {results['ok'] / elapsed:.1f} successful/s)"
+        )
+        self.stdout.write(
+            f"ok={results['ok']} out_of_stock={results['out_of_stock']} errors={results['errors']} "
+            f"units_sold={units_sold} units_left={units_left}"
+        )
+        if min(stock, default=0) < 0:
+            self.stderr.write(self.style.ERROR("Stock went negative"))
+
+    def _teardown(self, tag):
+        Order.objects.filter(customer__username__startswith=tag).delete()
+        User.objects.filter(username__startswith=tag).delete()
+        Product.objects.filter(code__startswith=tag).delete()
+        Category.objects.filter(name=tag).delete()
+        Brand.objects.filter(name=tag).delete()
+        DeliveryLocation.objects.filter(area_name=tag).delete()
@@ -0,0 +1,49 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from delivery.dispatch import DispatchOrder, _matrix_cache, plan_routes
+
+
+class Command(BaseCommand):
+    help = "Time the dispatch planner on synthetic orders (no database access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=3000)
+        parser.add_argument('--pincodes', type=int, default=150)
+        parser.add_argument('--capacity', type=int, default=12)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+        # Pincodes scattered over a ~30 km wide city
+        coordinates = {
+            str(400000 + i): (19.0 + rng.uniform(-0.15, 0.15), 72.85 + rng.uniform(-0.15, 0.15))
+            for i in range(options['pincodes'])
+        }
+        pincodes = list(coordinates)
+        orders = [
+            DispatchOrder(i, rng.choice(pincodes), now + timedelta(minutes=rng.randint(30, 240)))
+            for i in range(options['orders'])
+        ]
+
+        _matrix_cache.clear()
+        started = time.perf_counter()
+        routes, _ = plan_routes(orders, coordinates, capacity=options['capacity'], start_at=now)
+        cold = time.perf_counter() - started
+
+        started = time.perf_counter()
+        plan_routes(orders, coordinates, capacity=options['capacity'], start_at=now)
+        warm = time.perf_counter() - started
+
+        late = sum(len(route.late_orders) for route in routes)
+        distance = sum(route.distance_km for route in routes)
+        self.stdout.write(
+            f"{len(orders)} orders over {len(pincodes)} pincodes -> {len(routes)} routes, "
+            f"{distance:.0f} km, {late} late"
+        )
+        self.stdout.write(f"planning: {cold * 1000:.0f} ms (matrix cached: {warm * 1000:.0f} ms)")
@@ -0,0 +1,61 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from delivery.sequences import BlockAllocator
+
+
+def _allocate(name, count, block_size, queue):
+    allocator = BlockAllocator(block_size=block_size)
+    started = time.monotonic()
+    ids = [allocator.next_id(name) for _ in range(count)]
+    queue.put((ids, time.monotonic() - started))
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ("Allocate ids from several processes at once and check that no id "
+            "is handed out twice. Uses a throwaway sequence name.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--count', type=int, default=10000, help="Ids allocated per process")
+        parser.add_argument('--block-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        from delivery.models import IdSequence
+
+        name = f"bench-{int(time.time() * 1000)}"
+        # Children must not inherit the parent's open connection
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        workers = [
+            context.Process(target=_allocate, args=(name, options['count'], options['block_size'], queue))
+            for _ in range(options['processes'])
+        ]
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+        results = [queue.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        elapsed = time.monotonic() - started
+
+        ids = [value for worker_ids, _ in results for value in worker_ids]
+        duplicates = len(ids) - len(set(ids))
+        monotonic = all(worker_ids == sorted(worker_ids) for worker_ids, _ in results)
+        IdSequence.objects.filter(name=name).delete()
+
+        self.stdout.write(
+            f"{len(ids)} ids from {len(workers)} processes in {elapsed:.2f}s "
+            f"({len(ids) / elapsed:.0f} ids/s, block size {options['block_size']})"
+        )
+        if duplicates or not monotonic:
+            self.stderr.write(self.style.ERROR(
+                f"{duplicates} duplicate ids, per-process monotonic: {monotonic}"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("No duplicate ids; every process saw increasing ids"))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from delivery.outbox import dispatch_batch, purge_dispatched
+
+
+class Command(BaseCommand):
+    help = "Deliver pending order events from the outbox to the configured handlers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds to sleep when the outbox is empty")
+        parser.add_argument('--keep-days', type=int, default=7,
+                            help="Delete delivered events older than this")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the outbox once and exit")
+
+    def handle(self, *args, **options):
+        while True:
+            dispatched, failed = dispatch_batch(options['batch_size'])
+            if dispatched or failed:
+                self.stdout.write(f"dispatched={dispatched} failed={failed}")
+            if dispatched == options['batch_size']:
+                # Probably more waiting, go again without sleeping
+                continue
+            if options['once']:
+                break
+            purge_dispatched(options['keep_days'])
+            time.sleep(options['interval'])
@@ -0,0 +1,54 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cart.exports import cart_export
+from delivery.exports import order_export
+from inventory.exports import inventory_export
+from saveMore.exports import CHUNK_SIZE, FORMATS, stream_rows
+
+EXPORTS = {
+    'orders': order_export,
+    'inventory': inventory_export,
+    'carts': cart_export,
+}
+
+
+class Command(BaseCommand):
+    help = "Stream orders (with lines), inventory or carts to a CSV or JSON Lines file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(EXPORTS))
+        parser.add_argument('--output', '-o', help="File to write, default stdout")
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--start', help="First day, YYYY-MM-DD")
+        parser.add_argument('--end', help="Last day (inclusive), YYYY-MM-DD")
+        parser.add_argument('--status', help="orders: order status, inventory: in_stock/out_of_stock, carts: user/anonymous")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            header, rows = EXPORTS[options['dataset']](
+                start=options['start'], end=options['end'], status=options['status'],
+                chunk_size=options['chunk_size'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        started = time.monotonic()
+        target = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        lines = 0
+        try:
+            for line in stream_rows(header, rows, options['format']):
+                target.write(line)
+                lines += 1
+        finally:
+            if options['output']:
+                target.close()
+        if options['output']:
+            rows_written = lines - 1 if options['format'] == 'csv' else lines
+            self.stderr.write(self.style.SUCCESS(
+                f"Wrote {rows_written} {options['dataset']} rows to {options['output']} "
+                f"in {time.monotonic() - started:.2f}s"
+            ))
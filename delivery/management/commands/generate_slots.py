@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from delivery.slots import SLOT_BOOKING_DAYS, SLOT_CAPACITY, SLOT_SHARDS, generate_slots
+
+
+class Command(BaseCommand):
+    help = "Create delivery slots for every serviceable location for the coming days"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=SLOT_BOOKING_DAYS)
+        parser.add_argument('--capacity', type=int, default=SLOT_CAPACITY, help="Orders per slot")
+        parser.add_argument('--shards', type=int, default=SLOT_SHARDS,
+                            help="Counter rows the capacity of each slot is split over")
+
+    def handle(self, *args, **options):
+        try:
+            created = generate_slots(options['days'], options['capacity'], options['shards'])
+        except ValueError as e:
+            raise CommandError(e)
+        self.stdout.write(self.style.SUCCESS(f"Created {created} slots"))
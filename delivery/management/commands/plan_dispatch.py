@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from delivery.dispatch import (
+    RIDER_CAPACITY, RIDER_SPEED_KMPH, STOP_MINUTES, pending_dispatch_orders, plan_routes,
+)
+
+
+class Command(BaseCommand):
+    help = "Batch confirmed/preparing orders into rider routes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--capacity', type=int, default=RIDER_CAPACITY, help="Orders per rider")
+        parser.add_argument('--speed', type=float, default=RIDER_SPEED_KMPH, help="Rider speed in km/h")
+        parser.add_argument('--stop-minutes', type=float, default=STOP_MINUTES,
+                            help="Minutes spent at each stop")
+        parser.add_argument('--json', action='store_true', help="Print the plan as JSON")
+
+    def handle(self, *args, **options):
+        orders, coordinates = pending_dispatch_orders()
+        routes, unrouted = plan_routes(
+            orders, coordinates, capacity=options['capacity'],
+            speed_kmph=options['speed'], stop_minutes=options['stop_minutes'],
+        )
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'routes': [
+                    {
+                        'distance_km': round(route.distance_km, 2),
+                        'late_orders': [str(order_id) for order_id in route.late_orders],
+                        'stops': [
+                            {
+                                'pincode': stop.pincode,
+                                'eta': stop.eta.isoformat(),
+                                'orders': [str(order_id) for order_id in stop.order_ids],
+                            }
+                            for stop in route.stops
+                        ],
+                    }
+                    for route in routes
+                ],
+                'unrouted': [str(order_id) for order_id in unrouted],
+            }, indent=2))
+            return
+
+        for number, route in enumerate(routes, start=1):
+            orders_count = sum(len(stop.order_ids) for stop in route.stops)
+            path = ' -> '.join(stop.pincode for stop in route.stops)
+            self.stdout.write(
+                f"Rider {number}: {orders_count} orders, {route.distance_km:.1f} km, "
+                f"{len(route.late_orders)} late: {path}"
+            )
+        if unrouted:
+            self.stdout.write(self.style.WARNING(
+                f"{len(unrouted)} orders have no coordinates for their pincode and were not routed"
+            ))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from delivery.webhooks import process_batch
+
+
+class Command(BaseCommand):
+    help = "Apply stored payment gateway webhooks to payments and orders in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds to sleep when no events are waiting")
+        parser.add_argument('--once', action='store_true',
+                            help="Apply the waiting events once and exit")
+
+    def handle(self, *args, **options):
+        while True:
+            outcomes = process_batch(options['batch_size'])
+            processed = sum(outcomes.values())
+            if processed:
+                self.stdout.write(" ".join(f"{outcome}={count}" for outcome, count in sorted(outcomes.items())))
+            if processed == options['batch_size']:
+                # Probably more waiting, go again without sleeping
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
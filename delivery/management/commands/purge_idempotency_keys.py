@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from delivery.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete stored idempotent responses past their TTL; run hourly or daily"
+
+    def handle(self, *args, **options):
+        deleted = IdempotencyKey.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys"))
@@ -0,0 +1,44 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from delivery.reconciliation import REPORT_FIELDS, read_settlement, reconcile_payments
+
+
+class Command(BaseCommand):
+    help = "Reconcile payments against a gateway settlement CSV (payment_id, transaction_id, status, amount)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('settlement', help="Path of the settlement CSV")
+        parser.add_argument('--report', default='reconciliation_mismatches.csv',
+                            help="Where to write lines that could not be applied")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help="Match and report without updating anything")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            settlement = open(options['settlement'], newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(f"Cannot read settlement file: {e}")
+
+        with settlement, open(options['report'], 'w', newline='') as report_file:
+            report = csv.writer(report_file)
+            report.writerow(REPORT_FIELDS)
+            totals = reconcile_payments(
+                read_settlement(settlement), chunk_size=options['chunk_size'],
+                report=report, dry_run=options['dry_run'],
+            )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['lines']} lines in {elapsed:.2f}s: {totals['applied']} applied, "
+            f"{totals['unchanged']} already up to date, {totals['mismatched']} mismatched"
+        ))
+        reasons = {reason: count for reason, count in totals.items()
+                   if reason not in ('lines', 'applied', 'unchanged', 'mismatched')}
+        if reasons:
+            self.stdout.write(f"Mismatches ({options['report']}): " + ", ".join(
+                f"{reason}={count}" for reason, count in sorted(reasons.items())
+            ))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from delivery.eta import refresh_eta
+
+
+class Command(BaseCommand):
+    help = "Update per-pincode delivery time quantiles from delivered orders (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help="Rebuild from all history instead of orders since the last run")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        processed = refresh_eta(full=options['full'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {processed} delivered orders in {time.monotonic() - started:.2f}s"
+        ))
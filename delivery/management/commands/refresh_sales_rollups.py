@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from delivery.rollups import refresh_sales_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild daily sales rollups for days with orders changed since the last run"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help="Rebuild every day instead of the days with changed orders")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        days = refresh_sales_rollups(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {days} days of sales rollups in {time.monotonic() - started:.2f}s"
+        ))
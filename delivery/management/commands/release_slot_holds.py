@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from delivery.slots import release_stale_reservations
+
+
+class Command(BaseCommand):
+    help = "Return capacity of expired slot holds and of cancelled orders; run every few minutes"
+
+    def handle(self, *args, **options):
+        released = release_stale_reservations()
+        self.stdout.write(self.style.SUCCESS(f"Released {released} slot reservations"))
@@ -0,0 +1,61 @@
+import re
+from datetime import datetime, timezone
+
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 500
+# Lines were written as "YYYY-MM-DD HH:MM - note", newest first
+NOTE_LINE = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}) - (.*)$')
+
+
+def parse_notes(text):
+    """Split a tracking_notes blob into (timestamp, note) pairs, oldest first"""
+    entries = []
+    for line in text.splitlines():
+        match = NOTE_LINE.match(line)
+        if match:
+            timestamp = datetime.strptime(match.group(1), '%Y-%m-%d %H:%M').replace(tzinfo=timezone.utc)
+            entries.append([timestamp, match.group(2)])
+        elif entries and line.strip():
+            # Continuation of a multi-line note
+            entries[-1][1] += '\n' + line
+    entries.reverse()
+    return entries
+
+
+def backfill(apps, schema_editor):
+    DeliveryTracking = apps.get_model('delivery', 'DeliveryTracking')
+    TrackingEvent = apps.get_model('delivery', 'TrackingEvent')
+    trackings = (
+        DeliveryTracking.objects.exclude(tracking_notes='')
+        # Already backfilled by an earlier, interrupted run
+        .exclude(order__tracking_events__status='')
+        .order_by('pk')
+    )
+    last_pk = 0
+    while True:
+        chunk = list(trackings.filter(pk__gt=last_pk).values_list('pk', 'order_id', 'tracking_notes')[:CHUNK_SIZE])
+        if not chunk:
+            break
+        last_pk = chunk[-1][0]
+        events = [
+            TrackingEvent(order_id=order_id, timestamp=timestamp, note=note)
+            for _, order_id, notes in chunk
+            for timestamp, note in parse_notes(notes)
+        ]
+        # One short transaction per chunk instead of one for the whole table
+        with transaction.atomic():
+            TrackingEvent.objects.bulk_create(events)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('delivery', '0007_trackingevent'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
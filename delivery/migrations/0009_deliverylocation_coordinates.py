@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0008_backfill_tracking_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliverylocation',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deliverylocation',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
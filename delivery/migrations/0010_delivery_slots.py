@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0009_deliverylocation_coordinates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliverySlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('capacity', models.PositiveIntegerField(help_text='Orders that can be delivered in this window')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='delivery.deliverylocation')),
+            ],
+            options={
+                'verbose_name': 'Delivery Slot',
+                'verbose_name_plural': 'Delivery Slots',
+                'db_table': 'delivery_slots',
+                'ordering': ['date', 'start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DeliverySlotShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('capacity', models.PositiveIntegerField()),
+                ('reserved', models.PositiveIntegerField(default=0)),
+                ('slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='delivery.deliveryslot')),
+            ],
+            options={
+                'verbose_name': 'Delivery Slot Shard',
+                'verbose_name_plural': 'Delivery Slot Shards',
+                'db_table': 'delivery_slot_shards',
+            },
+        ),
+        migrations.CreateModel(
+            name='SlotReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('held', 'Held'), ('confirmed', 'Confirmed'), ('released', 'Released')], default='held', max_length=20)),
+                ('expires_at', models.DateTimeField(help_text='Held capacity is released after this time')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='slot_reservation', to='delivery.order')),
+                ('shard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='delivery.deliveryslotshard')),
+                ('slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='delivery.deliveryslot')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_reservations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Slot Reservation',
+                'verbose_name_plural': 'Slot Reservations',
+                'db_table': 'slot_reservations',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='deliveryslot',
+            constraint=models.UniqueConstraint(fields=('location', 'date', 'start_time'), name='unique_slot_per_location'),
+        ),
+        migrations.AddIndex(
+            model_name='slotreservation',
+            index=models.Index(fields=['status', 'expires_at'], name='slot_reservation_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0010_delivery_slots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Job Watermark',
+                'verbose_name_plural': 'Job Watermarks',
+                'db_table': 'job_watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='DeliveryEta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pincode', models.CharField(max_length=10)),
+                ('hour_of_week', models.PositiveSmallIntegerField()),
+                ('histogram', models.BinaryField()),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('p50_minutes', models.PositiveIntegerField()),
+                ('p90_minutes', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Delivery ETA',
+                'verbose_name_plural': 'Delivery ETAs',
+                'db_table': 'delivery_eta',
+                'constraints': [models.UniqueConstraint(fields=('pincode', 'hour_of_week'), name='unique_eta_per_pincode_hour')],
+            },
+        ),
+    ]
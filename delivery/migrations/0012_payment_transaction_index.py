@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0011_delivery_eta'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='gateway_transaction_id',
+            field=models.CharField(blank=True, db_index=True, max_length=200),
+        ),
+    ]
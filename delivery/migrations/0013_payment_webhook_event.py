@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0012_payment_transaction_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gateway_event_id', models.CharField(max_length=200, unique=True)),
+                ('event_type', models.CharField(blank=True, max_length=100)),
+                ('payload', models.JSONField(default=dict)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('outcome', models.CharField(blank=True, max_length=50)),
+                ('detail', models.CharField(blank=True, max_length=200)),
+            ],
+            options={
+                'verbose_name': 'Payment Webhook Event',
+                'verbose_name_plural': 'Payment Webhook Events',
+                'db_table': 'payment_webhook_events',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['id'], name='webhook_pending_idx')],
+            },
+        ),
+    ]
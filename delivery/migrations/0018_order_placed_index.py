@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0017_outbox_failed_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['placed_at'], name='orders_placed_idx'),
+        ),
+    ]
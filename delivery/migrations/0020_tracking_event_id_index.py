@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0019_idempotency_key_lease'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='trackingevent',
+            name='tracking_order_time_idx',
+        ),
+        migrations.AddIndex(
+            model_name='trackingevent',
+            index=models.Index(fields=['order', 'id'], name='tracking_order_id_idx'),
+        ),
+    ]
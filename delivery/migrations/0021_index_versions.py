@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0020_tracking_event_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexVersion',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=1)),
+            ],
+            options={
+                'verbose_name': 'Index Version',
+                'verbose_name_plural': 'Index Versions',
+                'db_table': 'index_versions',
+            },
+        ),
+    ]
@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.core.serializers.json import DjangoJSONEncoder
 from decimal import Decimal
 import re
 import uuid
+from .pincodes import pincode_index
+from .sequences import next_id
 
 # Simple delivery location model
 class DeliveryLocation(models.Model):
@@ -16,6 +19,9 @@ class DeliveryLocation(models.Model):
     delivery_fee = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal('0.00'))
     minimum_order = models.DecimalField(max_digits=10, decimal_places=2, default=200.00)
     estimated_delivery_hours = models.IntegerField(default=2, help_text="Delivery time in hours")
+    # Area centre, used for rider route planning
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
@@ -23,12 +29,14 @@ class DeliveryLocation(models.Model):
     
     @classmethod
     def check_delivery_available(cls, pincode):
-        """Check if delivery is available for a pincode"""
-        try:
-            location = cls.objects.get(pincode=pincode, is_available=True)
-            return True, location
-        except cls.DoesNotExist:
-            return False, None
+        """Check if delivery is available for a pincode (served from memory)"""
+        location = pincode_index.get(pincode)
+        return location is not None, location
+    
+    @classmethod
+    def check_delivery_available_many(cls, pincodes):
+        """Resolve many pincodes at once, returns {pincode: location} for serviceable ones"""
+        return pincode_index.get_many(pincodes)
     
     class Meta:
         db_table = 'delivery_locations'
@@ -106,6 +114,8 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     placed_at = models.DateTimeField(null=True, blank=True)
     delivered_at = models.DateTimeField(null=True, blank=True)
+    # Lets incremental jobs find changed orders (see delivery.rollups)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     def __str__(self):
         return f"Order {self.order_number} - {self.customer.username}"
@@ -113,7 +123,7 @@ class Order(models.Model):
     def save(self, *args, **kwargs):
         # Generate order number if not exists
         if not self.order_number:
-            self.order_number = f"ORD{timezone.now().strftime('%Y%m%d%H%M%S')}{str(self.id)[:8]}"
+            self.order_number = f"ORD{timezone.now().strftime('%Y%m%d')}{next_id('order'):08d}"
         
         # Set placed_at timestamp when order is placed
         if self.status == OrderStatus.PLACED and not self.placed_at:
@@ -174,6 +184,14 @@ class Order(models.Model):
         verbose_name = 'Order'
         verbose_name_plural = 'Orders'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['customer', 'status', 'created_at'], name='orders_customer_status_idx'),
+            # Recent orders, optionally by status, for the admin and ops lists
+            models.Index(fields=['status', 'created_at'], name='orders_status_created_idx'),
+            models.Index(fields=['created_at'], name='orders_created_idx'),
+            # Sales day ranges (see delivery.rollups)
+            models.Index(fields=['placed_at'], name='orders_placed_idx'),
+        ]
 
 # Order items model (simple product reference)
 class OrderItem(models.Model):
@@ -181,6 +199,10 @@ class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     product_name = models.CharField(max_length=200)
     product_id = models.CharField(max_length=50, help_text="Product SKU or ID")
+    # Typed reference for joins; older rows are filled by backfill_order_item_variants
+    variant = models.ForeignKey(
+        'inventory.ProductVariant', on_delete=models.SET_NULL, null=True, blank=True, related_name='order_items'
+    )
     quantity = models.PositiveIntegerField(default=1)
     price_per_item = models.DecimalField(max_digits=10, decimal_places=2)
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -201,7 +223,7 @@ class OrderItem(models.Model):
         order = self.order
         order.items_total = sum(item.total_price for item in order.items.all())
         order.total_amount = order.items_total + order.delivery_fee
-        order.save(update_fields=['items_total', 'total_amount'])
+        order.save(update_fields=['items_total', 'total_amount', 'updated_at'])
     
     class Meta:
         db_table = 'order_items'
@@ -224,7 +246,7 @@ class Payment(models.Model):
     status = models.CharField(max_length=20, choices=PaymentStatus.choices, default=PaymentStatus.PENDING)
     
     # Payment gateway details
-    gateway_transaction_id = models.CharField(max_length=200, blank=True)
+    gateway_transaction_id = models.CharField(max_length=200, blank=True, db_index=True)
     gateway_response = models.TextField(blank=True, help_text="Payment gateway response")
     
     # Timestamps
@@ -237,14 +259,14 @@ class Payment(models.Model):
     def save(self, *args, **kwargs):
         # Generate payment ID if not exists
         if not self.payment_id:
-            self.payment_id = f"PAY{timezone.now().strftime('%Y%m%d%H%M%S')}{str(uuid.uuid4())[:6]}"
+            self.payment_id = f"PAY{timezone.now().strftime('%Y%m%d')}{next_id('payment'):08d}"
         
         # Set completed timestamp
         if self.status == PaymentStatus.PAID and not self.completed_at:
             self.completed_at = timezone.now()
             # Update order payment status
             self.order.payment_status = PaymentStatus.PAID
-            self.order.save(update_fields=['payment_status'])
+            self.order.save(update_fields=['payment_status', 'updated_at'])
         
         super().save(*args, **kwargs)
     
@@ -256,16 +278,23 @@ class Payment(models.Model):
             self.gateway_transaction_id = transaction_id
         if gateway_response:
             self.gateway_response = gateway_response
-        self.save()
+        with transaction.atomic():
+            # Payment.save doesn't touch the order once completed_at is set
+            self.order.payment_status = PaymentStatus.PAID
+            self.order.save(update_fields=['payment_status', 'updated_at'])
+            self.save()
+            OutboxEvent.record(self.order, 'payment.paid', payment_id=self.payment_id, amount=self.amount)
     
     def mark_failed(self, reason=""):
         """Mark payment as failed"""
         self.status = PaymentStatus.FAILED
         self.gateway_response = reason
-        # Update order payment status
-        self.order.payment_status = PaymentStatus.FAILED
-        self.order.save(update_fields=['payment_status'])
-        self.save()
+        with transaction.atomic():
+            # Update order payment status
+            self.order.payment_status = PaymentStatus.FAILED
+            self.order.save(update_fields=['payment_status', 'updated_at'])
+            self.save()
+            OutboxEvent.record(self.order, 'payment.failed', payment_id=self.payment_id, reason=reason)
     
     class Meta:
         db_table = 'payments'
@@ -287,22 +316,339 @@ class DeliveryTracking(models.Model):
     def __str__(self):
         return f"Delivery tracking for {self.order.order_number}"
     
-    def update_status(self, new_status, notes=""):
-        """Update delivery status"""
+    def update_status(self, new_status, notes="", actor=None):
+        """Update delivery status and append it to the tracking timeline"""
         self.current_status = new_status
-        if notes:
-            self.tracking_notes = f"{timezone.now().strftime('%Y-%m-%d %H:%M')} - {notes}\n{self.tracking_notes}"
         
         # Update order status as well
         self.order.status = new_status
-        self.order.save(update_fields=['status'])
-        self.save()
+        with transaction.atomic():
+            # Order.save stamps placed_at/delivered_at for these statuses
+            self.order.save(update_fields=['status', 'placed_at', 'delivered_at', 'updated_at'])
+            self.save(update_fields=['current_status', 'last_updated'])
+            TrackingEvent.objects.create(order=self.order, status=new_status, note=notes, actor=actor)
+            OutboxEvent.record(self.order, 'order.status_changed', status=new_status, notes=notes)
     
     class Meta:
         db_table = 'delivery_tracking'
         verbose_name = 'Delivery Tracking'
         verbose_name_plural = 'Delivery Tracking'
 
+# Delivery slots
+class DeliverySlot(models.Model):
+    """Delivery window for a location on a given day"""
+    location = models.ForeignKey(DeliveryLocation, on_delete=models.CASCADE, related_name='slots')
+    date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    capacity = models.PositiveIntegerField(help_text="Orders that can be delivered in this window")
+    
+    def __str__(self):
+        return f"{self.location.pincode} {self.date} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+    
+    class Meta:
+        db_table = 'delivery_slots'
+        verbose_name = 'Delivery Slot'
+        verbose_name_plural = 'Delivery Slots'
+        ordering = ['date', 'start_time']
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'date', 'start_time'], name='unique_slot_per_location'),
+        ]
+
+class DeliverySlotShard(models.Model):
+    """Part of a slot's capacity.
+
+    Splitting the counter over a few rows lets concurrent checkouts for the
+    same popular slot update different rows instead of queueing on one.
+    """
+    slot = models.ForeignKey(DeliverySlot, on_delete=models.CASCADE, related_name='shards')
+    capacity = models.PositiveIntegerField()
+    reserved = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.slot} shard {self.pk} ({self.reserved}/{self.capacity})"
+    
+    class Meta:
+        db_table = 'delivery_slot_shards'
+        verbose_name = 'Delivery Slot Shard'
+        verbose_name_plural = 'Delivery Slot Shards'
+
+class SlotReservationStatus(models.TextChoices):
+    HELD = 'held', 'Held'
+    CONFIRMED = 'confirmed', 'Confirmed'
+    RELEASED = 'released', 'Released'
+
+class SlotReservation(models.Model):
+    """One unit of slot capacity held for a customer or taken by an order"""
+    slot = models.ForeignKey(DeliverySlot, on_delete=models.CASCADE, related_name='reservations')
+    shard = models.ForeignKey(DeliverySlotShard, on_delete=models.CASCADE, related_name='+')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='slot_reservations')
+    order = models.OneToOneField(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='slot_reservation')
+    status = models.CharField(max_length=20, choices=SlotReservationStatus.choices, default=SlotReservationStatus.HELD)
+    expires_at = models.DateTimeField(help_text="Held capacity is released after this time")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.slot} - {self.get_status_display()}"
+    
+    class Meta:
+        db_table = 'slot_reservations'
+        verbose_name = 'Slot Reservation'
+        verbose_name_plural = 'Slot Reservations'
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='slot_reservation_expiry_idx'),
+        ]
+
+# Delivery timeline, one row per status update
+class TrackingEvent(models.Model):
+    """Append-only delivery tracking entry (replaces DeliveryTracking.tracking_notes)"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='tracking_events')
+    timestamp = models.DateTimeField(default=timezone.now)
+    # Blank for entries backfilled from the old free-text notes
+    status = models.CharField(max_length=20, choices=OrderStatus.choices, blank=True)
+    note = models.TextField(blank=True)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    
+    def __str__(self):
+        return f"{self.order_id} {self.status} at {self.timestamp:%Y-%m-%d %H:%M}"
+    
+    @classmethod
+    def after(cls, order, event_id=None):
+        """Events of an order after the event `event_id` (all when None), oldest first.
+
+        Pollers page by id rather than timestamp: timestamps are taken
+        before commit, so an event can commit after a later-stamped one,
+        and equal timestamps would be skipped. update_status updates the
+        order row before inserting the event, in one transaction. On
+        PostgreSQL and MySQL that UPDATE holds the row's lock until commit,
+        and SQLite has a single writer at a time, so either way two events
+        of one order can't be inserted concurrently and per order ids
+        follow commit order.
+        """
+        events = cls.objects.filter(order=order)
+        if event_id is not None:
+            events = events.filter(id__gt=event_id)
+        return events.order_by('id')
+    
+    class Meta:
+        db_table = 'tracking_events'
+        verbose_name = 'Tracking Event'
+        verbose_name_plural = 'Tracking Events'
+        indexes = [
+            models.Index(fields=['order', 'id'], name='tracking_order_id_idx'),
+        ]
+
+# Order events waiting to be delivered to downstream consumers
+class OutboxEvent(models.Model):
+    """Event written in the same transaction as the change it describes.
+
+    The dispatch_outbox command delivers pending events in batches
+    (see delivery.outbox).
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='outbox_events')
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Failed deliveries are retried after this time
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    # Set when delivery was given up after too many failed attempts
+    failed_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.event_type} for order {self.order_id}"
+    
+    @classmethod
+    def record(cls, order, event_type, **payload):
+        """Queue an event; call inside the transaction making the change"""
+        return cls.objects.create(order=order, event_type=event_type, payload=payload)
+    
+    class Meta:
+        db_table = 'outbox_events'
+        verbose_name = 'Outbox Event'
+        verbose_name_plural = 'Outbox Events'
+        ordering = ['id']
+        indexes = [
+            # Pending events only, so the index stays small as history grows
+            models.Index(
+                fields=['id'], condition=models.Q(dispatched_at__isnull=True, failed_at__isnull=True),
+                name='outbox_pending_idx',
+            ),
+        ]
+
+# Raw payment gateway webhooks, applied later by a worker
+class PaymentWebhookEvent(models.Model):
+    """Gateway notification stored as received, once per gateway event id.
+
+    The process_payment_webhooks command applies pending events in batches
+    (see delivery.webhooks).
+    """
+    gateway_event_id = models.CharField(max_length=200, unique=True)
+    event_type = models.CharField(max_length=100, blank=True)
+    payload = models.JSONField(default=dict)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    # 'applied', 'unchanged' or why the event could not be applied
+    outcome = models.CharField(max_length=50, blank=True)
+    detail = models.CharField(max_length=200, blank=True)
+    
+    def __str__(self):
+        return f"{self.event_type or 'webhook'} {self.gateway_event_id}"
+    
+    class Meta:
+        db_table = 'payment_webhook_events'
+        verbose_name = 'Payment Webhook Event'
+        verbose_name_plural = 'Payment Webhook Events'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(processed_at__isnull=True), name='webhook_pending_idx'),
+        ]
+
+# Progress markers for incremental background jobs
+class JobWatermark(models.Model):
+    """Point up to which a background job has processed its input"""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.value}"
+    
+    @classmethod
+    def get(cls, name):
+        return cls.objects.filter(name=name).values_list('value', flat=True).first()
+    
+    @classmethod
+    def advance(cls, name, value):
+        cls.objects.update_or_create(name=name, defaults={'value': value})
+    
+    class Meta:
+        db_table = 'job_watermarks'
+        verbose_name = 'Job Watermark'
+        verbose_name_plural = 'Job Watermarks'
+
+# Observed delivery times, see delivery.eta
+class DeliveryEta(models.Model):
+    """Delivery-time histogram and quantiles for a pincode and hour of week.
+
+    hour_of_week is 0 (Monday 00:00) to 167; ALL_HOURS holds the pincode-wide
+    figures used when an hour has too few samples.
+    """
+    ALL_HOURS = 168
+    
+    pincode = models.CharField(max_length=10)
+    hour_of_week = models.PositiveSmallIntegerField()
+    # uint32 counts per fixed-width minute bin
+    histogram = models.BinaryField()
+    sample_count = models.PositiveIntegerField(default=0)
+    p50_minutes = models.PositiveIntegerField()
+    p90_minutes = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.pincode} h{self.hour_of_week}: p50 {self.p50_minutes}m / p90 {self.p90_minutes}m"
+    
+    class Meta:
+        db_table = 'delivery_eta'
+        verbose_name = 'Delivery ETA'
+        verbose_name_plural = 'Delivery ETAs'
+        constraints = [
+            models.UniqueConstraint(fields=['pincode', 'hour_of_week'], name='unique_eta_per_pincode_hour'),
+        ]
+
+# Materialized sales figures, see delivery.rollups
+class DailySalesRollup(models.Model):
+    """Revenue, units and orders for a day, pincode, category and variant.
+
+    Rebuilt a whole day at a time by the refresh_sales_rollups command;
+    category and variant are empty for lines whose product no longer exists.
+    """
+    date = models.DateField()
+    pincode = models.CharField(max_length=10)
+    category = models.ForeignKey('inventory.Category', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    variant = models.ForeignKey('inventory.ProductVariant', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    units = models.PositiveIntegerField(default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.date} {self.pincode} variant {self.variant_id}: ₹{self.revenue}"
+    
+    class Meta:
+        db_table = 'daily_sales_rollups'
+        verbose_name = 'Daily Sales Rollup'
+        verbose_name_plural = 'Daily Sales Rollups'
+        indexes = [
+            models.Index(fields=['date', 'pincode'], name='sales_date_pincode_idx'),
+            models.Index(fields=['category', 'date'], name='sales_category_date_idx'),
+            models.Index(fields=['variant', 'date'], name='sales_variant_date_idx'),
+        ]
+
+# Counters behind order and payment numbers
+class IdSequence(models.Model):
+    """Named counter; processes reserve blocks of ids from it (see delivery.sequences)"""
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField(default=1)
+    
+    def __str__(self):
+        return f"{self.name} ({self.next_value})"
+    
+    class Meta:
+        db_table = 'id_sequences'
+        verbose_name = 'ID Sequence'
+        verbose_name_plural = 'ID Sequences'
+
+# Data versions of the in-memory indexes
+class IndexVersion(models.Model):
+    """Version of the data behind a process-wide index (see delivery.indexes)"""
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=1)
+    
+    def __str__(self):
+        return f"{self.name} (v{self.version})"
+    
+    class Meta:
+        db_table = 'index_versions'
+        verbose_name = 'Index Version'
+        verbose_name_plural = 'Index Versions'
+
+# Stored responses for retried POSTs
+class IdempotencyKey(models.Model):
+    """First response to a request sent with an Idempotency-Key header"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=100)
+    endpoint = models.CharField(max_length=100)
+    # Null while the first request is still running
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    # Lease of the running request; a retry may take over an incomplete
+    # claim once it has passed
+    locked_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"{self.key} ({self.endpoint})"
+    
+    @property
+    def is_complete(self):
+        return self.response_status is not None
+    
+    @classmethod
+    def purge_expired(cls):
+        """Delete keys past their TTL"""
+        return cls.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+    
+    class Meta:
+        db_table = 'idempotency_keys'
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+
 # Helper functions for common operations
 class DeliveryHelper:
     """Helper functions for delivery operations"""
@@ -0,0 +1,190 @@
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from inventory.models import InventoryItem, ProductVariant
+from .models import DeliveryLocation, Order, OrderItem, OrderStatus
+from .slots import confirm_hold
+
+OrderLine = namedtuple('OrderLine', ['variant_id', 'product_name', 'price', 'quantity'])
+
+
+def line_quantity(item):
+    """Quantity of a posted line; raises ValueError unless it is a whole number of at least 1"""
+    try:
+        quantity = int(item.get('quantity', 1))
+    except (TypeError, ValueError):
+        quantity = 0
+    if quantity < 1:
+        raise ValueError(f"Invalid quantity for variant {item.get('variant_id')}")
+    return quantity
+
+
+def validate_order_items(items):
+    """Check the posted items before anything is written; raises ValueError"""
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValueError("items must be a list of {variant_id, quantity} objects")
+    for item in items:
+        line_quantity(item)
+
+
+def price_order_lines(items):
+    """Load every requested variant in one query and price the lines.
+
+    `items` is the posted list of {'variant_id', 'quantity'} dicts, checked
+    with validate_order_items(). Raises ValueError for an unknown variant.
+    """
+    ids = {str(item.get('variant_id')) for item in items}
+    variants = {
+        str(variant.id): variant
+        for variant in ProductVariant.objects.select_related('product', 'deals').filter(id__in=ids)
+    }
+    lines = []
+    for item in items:
+        variant = variants.get(str(item.get('variant_id')))
+        if variant is None:
+            raise ValueError(f"Variant {item.get('variant_id')} is not available")
+        lines.append(OrderLine(
+            variant.id,
+            f"{variant.product.name} {variant.sku}",
+            variant.get_final_price(),
+            line_quantity(item),
+        ))
+    return lines
+
+
+def quote_order_lines(quote):
+    """Lines already priced by a cart quote (see cart.quotes)"""
+    return [
+        OrderLine(variant_id, name, Decimal(price), quantity)
+        for variant_id, quantity, price, name in quote['lines']
+    ]
+
+
+def check_variants_exist(lines):
+    """Raise ValueError when a line's variant was deleted, e.g. since it was quoted"""
+    ids = {line.variant_id for line in lines}
+    missing = ids - set(ProductVariant.objects.filter(id__in=ids).values_list('id', flat=True))
+    if missing:
+        raise ValueError(f"Variant {min(missing)} is not available")
+
+
+def assemble_order(order, lines, location, delivery_fee=None):
+    """Bulk insert the order items and write the order totals once.
+
+    Bypasses OrderItem.save (and its per-item total recomputation); when
+    `delivery_fee` is None the location's fee applies below its minimum order.
+    """
+    order_items = [
+        OrderItem(
+            order=order,
+            product_name=line.product_name,
+            product_id=line.variant_id,
+            variant_id=line.variant_id,
+            quantity=line.quantity,
+            price_per_item=line.price,
+            total_price=line.price * line.quantity,
+        )
+        for line in lines
+    ]
+    OrderItem.objects.bulk_create(order_items)
+
+    order.items_total = sum((item.total_price for item in order_items), Decimal('0.00'))
+    if delivery_fee is not None:
+        order.delivery_fee = delivery_fee
+    elif location and order.items_total < location.minimum_order:
+        order.delivery_fee = location.delivery_fee
+    order.total_amount = order.items_total + order.delivery_fee
+    order.save(update_fields=['items_total', 'delivery_fee', 'total_amount', 'updated_at'])
+    return order_items
+
+
+def cart_order_lines(cart_items):
+    """Price cart items that have their variant, product and deal loaded"""
+    return [
+        OrderLine(
+            item.variant_id,
+            f"{item.variant.product.name} {item.variant.sku}",
+            item.variant.get_final_price(),
+            item.quantity,
+        )
+        for item in cart_items
+    ]
+
+
+def reserve_stock(quantities):
+    """Decrement stock for {variant_id: quantity}, raising ValueError if short.
+
+    Rows are locked in variant id order so concurrent checkouts touching the
+    same SKUs always queue in the same order instead of deadlocking. Must run
+    inside a transaction.
+    """
+    variant_ids = sorted(quantities)
+    locked = set(
+        InventoryItem.objects.select_for_update()
+        .filter(variant_id__in=variant_ids)
+        .order_by('variant_id')
+        .values_list('variant_id', flat=True)
+    )
+    now = timezone.now()
+    for variant_id in variant_ids:
+        quantity = quantities[variant_id]
+        updated = 0
+        if variant_id in locked:
+            updated = InventoryItem.objects.filter(
+                variant_id=variant_id, quantity__gte=quantity
+            ).update(quantity=F('quantity') - quantity, last_updated=now)
+        if not updated:
+            raise ValueError(f"Not enough stock for variant {variant_id}")
+
+
+def checkout_cart(cart, address, quote=None, slot_hold_id=None):
+    """Turn a cart into a placed order in one transaction.
+
+    Reserves stock, creates the order and its items in bulk and empties the
+    cart. A valid cart quote (see cart.quotes) supplies prices and fee;
+    otherwise the cart is priced from the current catalog. A delivery slot
+    hold (see delivery.slots) is confirmed for the new order.
+    Raises ValueError when the cart is empty, changed since it was quoted,
+    the address is not serviceable or stock ran out.
+    """
+    available, location = DeliveryLocation.check_delivery_available(address.pincode)
+    if not available:
+        raise ValueError("Delivery not available to this location")
+
+    with transaction.atomic():
+        # Locked so the lines can't change between the quote check and the delete
+        cart_items = list(
+            cart.items.select_related('variant__product', 'variant__deals')
+            .select_for_update(of=('self',)).order_by('variant_id')
+        )
+        if not cart_items:
+            raise ValueError("Cart is empty")
+        if quote and quote['version'] != cart.items_version(cart_items):
+            # Edited by another request after the quote was read
+            raise ValueError("Cart changed since it was priced, please review it again")
+
+        quantities = {}
+        for item in cart_items:
+            quantities[item.variant_id] = quantities.get(item.variant_id, 0) + item.quantity
+        reserve_stock(quantities)
+
+        order = Order.objects.create(
+            customer=address.user,
+            delivery_address=address,
+            status=OrderStatus.PLACED,
+        )
+        if quote:
+            assemble_order(order, quote_order_lines(quote), location, delivery_fee=Decimal(quote['fee']))
+        else:
+            assemble_order(order, cart_order_lines(cart_items), location)
+
+        if slot_hold_id:
+            confirm_hold(slot_hold_id, order)
+
+        # Only the ordered lines; an item added meanwhile stays in the cart
+        cart.items.filter(id__in=[item.id for item in cart_items]).delete()
+    return order
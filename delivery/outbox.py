@@ -0,0 +1,87 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# Dotted paths of callables taking an OutboxEvent (SMS, push, analytics, ...)
+DEFAULT_HANDLERS = ['delivery.outbox.log_event']
+# Longest wait between retries of a failing event, in seconds
+MAX_RETRY_DELAY = 15 * 60
+# Failed deliveries after which an event is given up
+MAX_ATTEMPTS = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 10)
+
+
+def log_event(event):
+    """Default handler: write the event to the log"""
+    logger.info("outbox %s order=%s payload=%s", event.event_type, event.order_id, event.payload)
+
+
+def get_handlers():
+    return [import_string(path) for path in getattr(settings, 'OUTBOX_HANDLERS', DEFAULT_HANDLERS)]
+
+
+def pending_events():
+    """Events still to be delivered"""
+    return OutboxEvent.objects.filter(dispatched_at__isnull=True, failed_at__isnull=True)
+
+
+def dispatch_batch(batch_size=100, handlers=None):
+    """Deliver up to `batch_size` pending events, oldest first.
+
+    Delivery is at-least-once: an event is marked dispatched only after
+    every handler succeeded, so handlers must tolerate repeats. Events of
+    one order are delivered in order; once an event fails, later events of
+    that order wait until it goes through. An event failing MAX_ATTEMPTS
+    times is marked failed and no longer holds its order back. Run a single
+    dispatcher so this ordering holds. Returns (dispatched, failed).
+    """
+    handlers = get_handlers() if handlers is None else handlers
+    now = timezone.now()
+    # Orders with an earlier event still waiting for its retry are skipped
+    waiting = pending_events().filter(order_id=OuterRef('order_id'), id__lt=OuterRef('id'), available_at__gt=now)
+    events = list(
+        pending_events().filter(available_at__lte=now)
+        .exclude(Exists(waiting)).order_by('id')[:batch_size]
+    )
+
+    blocked_orders = set()
+    delivered = []
+    failed = 0
+    for event in events:
+        if event.order_id in blocked_orders:
+            continue
+        try:
+            for handler in handlers:
+                handler(event)
+        except Exception as e:
+            logger.exception("outbox event %s failed", event.pk)
+            event.attempts += 1
+            fields = {'attempts': event.attempts, 'last_error': str(e)}
+            if event.attempts >= MAX_ATTEMPTS:
+                logger.error("outbox event %s given up after %s attempts", event.pk, event.attempts)
+                fields['failed_at'] = now
+            else:
+                blocked_orders.add(event.order_id)
+                delay = min(2 ** event.attempts, MAX_RETRY_DELAY)
+                fields['available_at'] = now + timedelta(seconds=delay)
+            OutboxEvent.objects.filter(pk=event.pk).update(**fields)
+            failed += 1
+            continue
+        delivered.append(event.pk)
+
+    if delivered:
+        OutboxEvent.objects.filter(pk__in=delivered).update(dispatched_at=timezone.now())
+    return len(delivered), failed
+
+
+def purge_dispatched(older_than_days=7):
+    """Delete delivered events older than `older_than_days`"""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return OutboxEvent.objects.filter(dispatched_at__lt=cutoff).delete()[0]
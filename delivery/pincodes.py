@@ -0,0 +1,35 @@
+from .indexes import VersionedIndex
+
+
+class PincodeIndex(VersionedIndex):
+    """Process-wide pincode -> serviceable DeliveryLocation map.
+
+    Saving or deleting a DeliveryLocation bumps the version (see
+    delivery.signals).
+    """
+
+    version_key = 'delivery:pincode_index:version'
+
+    def load(self):
+        from .models import DeliveryLocation
+        return {
+            location.pincode: location
+            for location in DeliveryLocation.objects.filter(is_available=True)
+        }
+
+    def get(self, pincode):
+        """Serviceable location for a pincode, or None"""
+        return self._current().get(str(pincode))
+
+    def get_many(self, pincodes):
+        """Map each serviceable pincode in `pincodes` to its location"""
+        locations = self._current()
+        found = {}
+        for pincode in pincodes:
+            location = locations.get(str(pincode))
+            if location is not None:
+                found[str(pincode)] = location
+        return found
+
+
+pincode_index = PincodeIndex()
@@ -0,0 +1,227 @@
+import csv
+from collections import Counter, namedtuple
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Order, OutboxEvent, Payment, PaymentStatus
+from .utils import chunks
+
+SettlementLine = namedtuple('SettlementLine', ['line', 'payment_id', 'transaction_id', 'status', 'amount'])
+
+# Gateway settlement status -> PaymentStatus, overridable in settings
+STATUS_MAP = getattr(settings, 'SETTLEMENT_STATUS_MAP', {
+    'success': PaymentStatus.PAID,
+    'captured': PaymentStatus.PAID,
+    'settled': PaymentStatus.PAID,
+    'paid': PaymentStatus.PAID,
+    'failed': PaymentStatus.FAILED,
+    'declined': PaymentStatus.FAILED,
+    'refunded': PaymentStatus.REFUNDED,
+    'refund': PaymentStatus.REFUNDED,
+})
+
+# Transitions a settlement may apply; anything else is reported
+ALLOWED_TRANSITIONS = {
+    PaymentStatus.PENDING: {PaymentStatus.PAID, PaymentStatus.FAILED},
+    PaymentStatus.FAILED: {PaymentStatus.PAID},
+    PaymentStatus.PAID: {PaymentStatus.REFUNDED},
+}
+
+REPORT_FIELDS = ['line', 'payment_id', 'transaction_id', 'status', 'amount', 'reason', 'detail']
+
+
+def read_settlement(fileobj):
+    """Yield SettlementLines from a settlement CSV without loading it.
+
+    Expects a header with payment_id, transaction_id, status and amount;
+    either id column may be empty.
+    """
+    reader = csv.DictReader(fileobj)
+    for number, row in enumerate(reader, start=2):
+        yield SettlementLine(
+            number,
+            (row.get('payment_id') or '').strip(),
+            (row.get('transaction_id') or '').strip(),
+            (row.get('status') or '').strip().lower(),
+            (row.get('amount') or '').strip(),
+        )
+
+
+def match_payments(chunk):
+    """Payments for a chunk of lines, keyed both ways, in a single query"""
+    payment_ids = {line.payment_id for line in chunk if line.payment_id}
+    transaction_ids = {line.transaction_id for line in chunk if line.transaction_id and not line.payment_id}
+    payments = Payment.objects.filter(
+        Q(payment_id__in=payment_ids) | Q(gateway_transaction_id__in=transaction_ids)
+    ).values_list('id', 'payment_id', 'gateway_transaction_id', 'status', 'amount', 'order_id')
+    by_payment_id, by_transaction_id = {}, {}
+    for row in payments:
+        payment = {
+            'id': row[0], 'payment_id': row[1], 'transaction_id': row[2],
+            'status': row[3], 'amount': row[4], 'order_id': row[5], 'matched_status': row[3],
+        }
+        by_payment_id[row[1]] = payment
+        if row[2]:
+            by_transaction_id[row[2]] = payment
+    return by_payment_id, by_transaction_id
+
+
+def check_line(line, payment):
+    """(target status, None) for an applicable line, else (None, (reason, detail))"""
+    if payment is None:
+        return None, ('not_found', '')
+    target = STATUS_MAP.get(line.status)
+    if target is None:
+        return None, ('unknown_status', line.status)
+    if line.amount:
+        try:
+            amount = abs(Decimal(line.amount))
+        except InvalidOperation:
+            return None, ('bad_amount', line.amount)
+        if amount != payment['amount']:
+            return None, ('amount_mismatch', f"expected {payment['amount']}")
+    if line.transaction_id and payment['transaction_id'] and line.transaction_id != payment['transaction_id']:
+        return None, ('transaction_mismatch', f"expected {payment['transaction_id']}")
+    if target == payment['status']:
+        return None, None
+    if target not in ALLOWED_TRANSITIONS.get(payment['status'], ()):
+        return None, ('invalid_transition', f"{payment['status']} -> {target}")
+    return target, None
+
+
+def apply_changes(changes, now, source):
+    """Write the transitions of one chunk: a few UPDATEs per target status.
+
+    Call inside a transaction. A payment moved by another path since it was
+    matched is left alone, and so are its order and events. Returns the ids
+    of the payments transitioned.
+    """
+    by_matched = {}
+    for payment in changes.values():
+        by_matched.setdefault(payment['matched_status'], []).append(payment['id'])
+    unchanged = set()
+    for matched, ids in by_matched.items():
+        unchanged.update(
+            Payment.objects.select_for_update().filter(id__in=ids, status=matched)
+            .order_by('id').values_list('id', flat=True)
+        )
+    changes = {payment_id: payment for payment_id, payment in changes.items() if payment_id in unchanged}
+
+    by_status = {}
+    for payment in changes.values():
+        by_status.setdefault(payment['status'], []).append(payment)
+
+    for status, payments in by_status.items():
+        ids = [payment['id'] for payment in payments]
+        fields = {'status': status}
+        if status == PaymentStatus.PAID:
+            fields['completed_at'] = Coalesce(F('completed_at'), Value(now))
+        new_transaction_ids = [
+            When(id=payment['id'], then=Value(payment['transaction_id']))
+            for payment in payments if payment.get('set_transaction_id')
+        ]
+        if new_transaction_ids:
+            fields['gateway_transaction_id'] = Case(*new_transaction_ids, default=F('gateway_transaction_id'))
+        Payment.objects.filter(id__in=ids).update(**fields)
+
+        orders = Order.objects.filter(id__in={payment['order_id'] for payment in payments})
+        if status == PaymentStatus.FAILED:
+            # A failed attempt must not undo another payment of the same order
+            orders = orders.exclude(payment_status=PaymentStatus.PAID)
+        orders.update(payment_status=status, updated_at=now)
+
+    OutboxEvent.objects.bulk_create([
+        OutboxEvent(
+            order_id=payment['order_id'], event_type=f"payment.{payment['status']}",
+            payload={'payment_id': payment['payment_id'], 'amount': str(payment['amount']), 'source': source},
+        )
+        for payment in changes.values()
+    ])
+    return set(changes)
+
+
+def plan_changes(chunk):
+    """Check a chunk of lines against their payments.
+
+    Returns (changes, outcomes): the payments to update, keyed by id with
+    their new status, and (line, outcome, detail) for every line where
+    outcome is 'applied', 'unchanged' or the mismatch reason.
+    """
+    by_payment_id, by_transaction_id = match_payments(chunk)
+    changes = {}
+    outcomes = []
+    for line in chunk:
+        if line.payment_id:
+            payment = by_payment_id.get(line.payment_id)
+        else:
+            payment = by_transaction_id.get(line.transaction_id)
+        # Later lines for the same payment see the earlier transitions
+        target, mismatch = check_line(line, payment)
+        if mismatch:
+            outcomes.append((line, *mismatch))
+            continue
+        if target is None:
+            outcomes.append((line, 'unchanged', ''))
+            continue
+        payment['status'] = target
+        if line.transaction_id and not payment['transaction_id']:
+            payment['transaction_id'] = line.transaction_id
+            payment['set_transaction_id'] = True
+            by_transaction_id[line.transaction_id] = payment
+        payment.setdefault('lines', []).append(line.line)
+        changes[payment['id']] = payment
+        outcomes.append((line, 'applied', ''))
+    return changes, outcomes
+
+
+def apply_planned(changes, outcomes, now, source):
+    """apply_changes(), then turn the lines of payments it skipped into conflicts"""
+    applied = apply_changes(changes, now, source)
+    conflicts = {
+        number
+        for payment_id, payment in changes.items() if payment_id not in applied
+        for number in payment['lines']
+    }
+    if not conflicts:
+        return outcomes
+    return [
+        (line, 'conflict', 'payment changed while reconciling') if line.line in conflicts
+        else (line, outcome, detail)
+        for line, outcome, detail in outcomes
+    ]
+
+
+def reconcile_payments(lines, chunk_size=5000, report=None, dry_run=False):
+    """Match settlement lines to payments and apply their status transitions.
+
+    Lines are processed `chunk_size` at a time: one query matches the chunk
+    by payment_id, or by gateway transaction id when the line has none, and
+    each chunk's transitions are written in its own transaction with batched
+    UPDATEs of Payment and Order.payment_status plus one outbox event per
+    payment. Lines that can't be applied, including 'conflict' for payments
+    moved meanwhile by another path, are written to `report`, a csv.writer,
+    when given. Returns a Counter of outcomes.
+    """
+    totals = Counter()
+    for chunk in chunks(lines, chunk_size):
+        changes, outcomes = plan_changes(chunk)
+        if changes and not dry_run:
+            with transaction.atomic():
+                outcomes = apply_planned(changes, outcomes, timezone.now(), 'settlement')
+        for line, outcome, detail in outcomes:
+            if outcome in ('applied', 'unchanged'):
+                totals[outcome] += 1
+                continue
+            totals['mismatched'] += 1
+            totals[outcome] += 1
+            if report is not None:
+                report.writerow([
+                    line.line, line.payment_id, line.transaction_id, line.status, line.amount, outcome, detail
+                ])
+        totals['lines'] += len(chunk)
+    return totals
@@ -0,0 +1,141 @@
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from inventory.models import ProductVariant
+from saveMore.exports import day_bounds
+from .models import DailySalesRollup, JobWatermark, Order, OrderItem, OrderStatus
+
+WATERMARK = 'sales_rollup'
+# Orders committed slightly out of updated_at order are picked up by
+# re-reading this far behind the watermark; rebuilding a day is idempotent
+OVERLAP = timedelta(seconds=getattr(settings, 'SALES_ROLLUP_OVERLAP_SECONDS', 300))
+# Orders that never became sales
+EXCLUDED_STATUSES = [OrderStatus.CART, OrderStatus.CANCELLED]
+
+SalesCell = namedtuple('SalesCell', ['date', 'pincode', 'category_id', 'variant_id'])
+
+
+def _sales_day(prefix=''):
+    """An order counts on the local day it was placed"""
+    return TruncDate(
+        Coalesce(f'{prefix}placed_at', f'{prefix}created_at'), tzinfo=timezone.get_current_timezone()
+    )
+
+
+def _variant_categories(product_ids):
+    """product_id strings -> (variant id, category id) for the ones that exist"""
+    ids = {int(value) for value in product_ids if value.isdigit()}
+    rows = ProductVariant.objects.filter(id__in=ids).values_list('id', 'product__category_id')
+    known = {variant_id: category_id for variant_id, category_id in rows}
+    return {
+        value: (int(value), known[int(value)])
+        for value in product_ids if value.isdigit() and int(value) in known
+    }
+
+
+def _sales_range(start, end, prefix=''):
+    """Orders whose sales day is between two dates, as index-friendly ranges"""
+    lower, upper = day_bounds(start, end)
+    return (
+        Q(**{f'{prefix}placed_at__gte': lower, f'{prefix}placed_at__lt': upper})
+        | Q(**{f'{prefix}placed_at__isnull': True, f'{prefix}created_at__gte': lower, f'{prefix}created_at__lt': upper})
+    )
+
+
+def build_day_rows(days):
+    """DailySalesRollup rows for the given dates, aggregated from order lines"""
+    lines = (
+        OrderItem.objects.exclude(order__status__in=EXCLUDED_STATUSES)
+        # The range narrows the scan, day__in drops the days in between
+        .filter(_sales_range(min(days), max(days), 'order__'))
+        .annotate(day=_sales_day('order__'))
+        .filter(day__in=days)
+        .values(
+            'day', 'variant_id',
+            pincode=F('order__delivery_address__pincode'),
+            category_id=F('variant__product__category_id'),
+            # Lines not linked to a variant yet are grouped by their text id
+            legacy_id=Case(When(variant__isnull=True, then=F('product_id')), default=Value('')),
+        )
+        .annotate(revenue=Sum('total_price'), units=Sum('quantity'), orders=Count('order', distinct=True))
+        .order_by()
+    )
+    lines = list(lines)
+    legacy = _variant_categories({line['legacy_id'] for line in lines if line['legacy_id']})
+
+    cells = {}
+    for line in lines:
+        if line['variant_id'] is not None:
+            variant_id, category_id = line['variant_id'], line['category_id']
+        else:
+            variant_id, category_id = legacy.get(line['legacy_id'], (None, None))
+        cell = SalesCell(line['day'], line['pincode'], category_id, variant_id)
+        totals = cells.setdefault(cell, [Decimal('0.00'), 0, 0])
+        totals[0] += line['revenue'] or 0
+        totals[1] += line['units'] or 0
+        # Distinct per group; an order only repeats a cell when it has both
+        # linked and not yet linked lines of the same variant
+        totals[2] += line['orders']
+    return [
+        DailySalesRollup(
+            date=cell.date, pincode=cell.pincode, category_id=cell.category_id, variant_id=cell.variant_id,
+            revenue=revenue, units=units, order_count=orders,
+        )
+        for cell, (revenue, units, orders) in cells.items()
+    ]
+
+
+def refresh_sales_rollups(full=False):
+    """Bring the daily rollups up to date; returns the number of days rebuilt.
+
+    Only orders updated since the last run (less OVERLAP) are read to find
+    the days they fall on, and just those days are rebuilt from their order
+    lines, so cancellations and late edits are reflected. `full` rebuilds
+    every day that has orders.
+    """
+    started = timezone.now()
+    since = None if full else JobWatermark.get(WATERMARK)
+    orders = Order.objects.all()
+    if since is not None:
+        orders = orders.filter(updated_at__gt=since - OVERLAP)
+    days = set(orders.annotate(day=_sales_day()).values_list('day', flat=True).distinct().order_by())
+
+    days = sorted(day for day in days if day is not None)
+    # A day at a time keeps each transaction short
+    for day in days:
+        rows = build_day_rows([day])
+        with transaction.atomic():
+            DailySalesRollup.objects.filter(date=day).delete()
+            DailySalesRollup.objects.bulk_create(rows, batch_size=1000)
+    if full:
+        DailySalesRollup.objects.exclude(date__in=days).delete()
+    JobWatermark.advance(WATERMARK, started)
+    return len(days)
+
+
+def sales_series(start, end, interval='day', group_by=(), **filters):
+    """Summed rollups between two dates, bucketed by `interval`.
+
+    `group_by` may hold 'pincode', 'category' and 'variant'; `filters` are
+    pincode, category_id and variant_id. Returns a list of dicts ordered by
+    period. `orders` counts an order once per variant it contains, so it is
+    exact per variant but over-counts when summed across variants.
+    """
+    buckets = {'day': F('date'), 'week': TruncWeek('date'), 'month': TruncMonth('date')}
+    groups = [{'category': 'category_id', 'variant': 'variant_id'}.get(field, field) for field in group_by]
+    rows = (
+        DailySalesRollup.objects.filter(date__gte=start, date__lte=end)
+        .filter(**{field: value for field, value in filters.items() if value not in (None, '')})
+        .annotate(period=buckets[interval])
+        .values('period', *groups)
+        .annotate(revenue=Sum('revenue'), units=Sum('units'), orders=Sum('order_count'))
+        .order_by('period', *groups)
+    )
+    return list(rows)
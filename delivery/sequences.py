@@ -0,0 +1,125 @@
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+# Ids handed to a process per database round trip
+SEQUENCE_BLOCK_SIZE = getattr(settings, 'SEQUENCE_BLOCK_SIZE', 100)
+
+
+class BlockAllocator:
+    """Hands out monotonically increasing ids for named sequences.
+
+    Each process reserves a block of ids with a single UPDATE on the
+    IdSequence row and serves further ids from memory, so most allocations
+    need no database round trip. Blocks are never shared: a forked worker
+    discards any block inherited from its parent. Unused ids of a block are
+    lost when the process exits, so sequences can have gaps. On SQLite, a
+    block needed inside a transaction is reserved in it and only kept for
+    later transactions once it commits.
+    """
+
+    def __init__(self, block_size=SEQUENCE_BLOCK_SIZE):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._blocks = {}
+        # name -> [next, end, commit callback] of blocks reserved inside a
+        # still open SQLite transaction
+        self._pending = {}
+        self._pid = os.getpid()
+
+    def _reserve(self, name):
+        if connection.in_atomic_block:
+            # A rollback of the caller's transaction must not undo the
+            # reservation (the block would be handed out again), so reserve
+            # on a separate connection.
+            result = []
+            errors = []
+
+            def reserve():
+                try:
+                    result.append(self._reserve_block(name, self.block_size))
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    connection.close()
+
+            thread = threading.Thread(target=reserve)
+            thread.start()
+            thread.join()
+            if errors:
+                raise errors[0]
+            return result[0]
+        return self._reserve_block(name, self.block_size)
+
+    def _reserve_block(self, name, size):
+        from .models import IdSequence
+        with transaction.atomic():
+            updated = IdSequence.objects.filter(name=name).update(
+                next_value=F('next_value') + size
+            )
+            if not updated:
+                try:
+                    with transaction.atomic():
+                        IdSequence.objects.create(name=name, next_value=1 + size)
+                except IntegrityError:
+                    # Created concurrently by another process
+                    IdSequence.objects.filter(name=name).update(
+                        next_value=F('next_value') + size
+                    )
+            end = IdSequence.objects.filter(name=name).values_list('next_value', flat=True).get()
+        return [end - size, end]
+
+    def _next_in_transaction(self, name):
+        """Next id from a block reserved in the caller's SQLite transaction.
+
+        SQLite allows a single writer, so a separate connection would wait on
+        the caller's lock. The block is reserved inline instead; a rollback
+        undoes the reservation, so it is only valid while its on_commit
+        callback is still queued (rolling back the transaction or the
+        savepoint it was taken in drops the callback), and it is handed to
+        later transactions once that callback runs.
+        """
+        pending = self._pending.get(name)
+        if (pending is None or pending[0] >= pending[1]
+                or not any(func is pending[2] for _, func, _ in connection.run_on_commit)):
+            def keep():
+                with self._lock:
+                    if self._pending.get(name) is pending:
+                        del self._pending[name]
+                        block = self._blocks.get(name)
+                        if block is None or block[0] >= block[1]:
+                            self._blocks[name] = pending[:2]
+
+            pending = [*self._reserve_block(name, self.block_size), keep]
+            self._pending[name] = pending
+            transaction.on_commit(keep)
+        value = pending[0]
+        pending[0] += 1
+        return value
+
+    def next_id(self, name):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._blocks = {}
+                self._pending = {}
+                self._pid = os.getpid()
+            block = self._blocks.get(name)
+            if block is None or block[0] >= block[1]:
+                if connection.in_atomic_block and connection.vendor == 'sqlite':
+                    return self._next_in_transaction(name)
+                block = self._reserve(name)
+                self._blocks[name] = block
+            value = block[0]
+            block[0] += 1
+            return value
+
+
+allocator = BlockAllocator()
+
+
+def next_id(name):
+    """Next id of the named sequence"""
+    return allocator.next_id(name)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import CustomerAddress,DeliveryLocation
+from .models import CustomerAddress,DeliveryLocation,Order,OrderItem,Payment,TrackingEvent
 import re
 class CustomerAddressSerializer(serializers.ModelSerializer):
     """Serializer for CustomerAddress model with validation and delivery check"""
@@ -29,18 +29,31 @@ class CustomerAddressSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at']
     
+    @staticmethod
+    def delivery_context(addresses):
+        """Resolve delivery locations for a whole address list in one go"""
+        return {
+            'delivery_locations': DeliveryLocation.check_delivery_available_many(
+                {address.pincode for address in addresses}
+            )
+        }
+    
+    def _get_location(self, obj):
+        """Serviceable location for the address, from context when bulk-resolved"""
+        locations = self.context.get('delivery_locations')
+        if locations is not None:
+            return locations.get(obj.pincode)
+        _, location = DeliveryLocation.check_delivery_available(obj.pincode)
+        return location
+    
     def get_delivery_available(self, obj):
         """Check if delivery is available for this address"""
-        try:
-            location = DeliveryLocation.objects.get(pincode=obj.pincode, is_available=True)
-            return True
-        except DeliveryLocation.DoesNotExist:
-            return False
+        return self._get_location(obj) is not None
     
     def get_delivery_info(self, obj):
         """Get delivery information for this address"""
-        try:
-            location = DeliveryLocation.objects.get(pincode=obj.pincode, is_available=True)
+        location = self._get_location(obj)
+        if location is not None:
             return {
                 'area_name': location.area_name,
                 'city': location.city,
@@ -48,15 +61,14 @@ class CustomerAddressSerializer(serializers.ModelSerializer):
                 'minimum_order': float(location.minimum_order),
                 'estimated_hours': location.estimated_delivery_hours
             }
-        except DeliveryLocation.DoesNotExist:
-            return {
-                'area_name': 'Unknown',
-                'city': 'Unknown',
-                'delivery_fee': 0,
-                'minimum_order': 0,
-                'estimated_hours': 0,
-                'message': 'Delivery not available to this location'
-            }
+        return {
+            'area_name': 'Unknown',
+            'city': 'Unknown',
+            'delivery_fee': 0,
+            'minimum_order': 0,
+            'estimated_hours': 0,
+            'message': 'Delivery not available to this location'
+        }
     
     def get_formatted_address(self, obj):
         """Return formatted address string"""
@@ -172,3 +184,47 @@ class CustomerAddressSerializer(serializers.ModelSerializer):
             pass
         
         return super().update(instance, validated_data)
+
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'product_name', 'product_id', 'quantity', 'price_per_item', 'total_price']
+
+
+class PaymentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Payment
+        fields = ['payment_id', 'amount', 'payment_method', 'status', 'initiated_at', 'completed_at']
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    """Order with its items and payments; expects them prefetched"""
+    items = OrderItemSerializer(many=True, read_only=True)
+    payments = PaymentSerializer(many=True, read_only=True)
+    delivery_address = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'order_number', 'status', 'payment_status',
+            'items_total', 'delivery_fee', 'total_amount', 'delivery_notes',
+            'created_at', 'placed_at', 'delivered_at',
+            'delivery_address', 'items', 'payments'
+        ]
+    
+    def get_delivery_address(self, obj):
+        address = obj.delivery_address
+        return {
+            'id': address.id,
+            'title': address.title,
+            'full_address': address.full_address,
+            'pincode': address.pincode,
+        }
+
+
+class TrackingEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TrackingEvent
+        fields = ['id', 'timestamp', 'status', 'note']
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import DeliveryLocation
+from .pincodes import pincode_index
+
+
+@receiver(post_save, sender=DeliveryLocation)
+@receiver(post_delete, sender=DeliveryLocation)
+def invalidate_pincode_index(sender, **kwargs):
+    """Reload serviceable pincodes after any location change"""
+    pincode_index.invalidate()
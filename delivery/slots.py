@@ -0,0 +1,192 @@
+import random
+from datetime import datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import (
+    DeliveryLocation, DeliverySlot, DeliverySlotShard, OrderStatus,
+    SlotReservation, SlotReservationStatus,
+)
+
+# (start hour, end hour) windows created for every serviceable location
+SLOT_WINDOWS = getattr(settings, 'DELIVERY_SLOT_WINDOWS', [(9, 12), (12, 15), (15, 18), (18, 21)])
+SLOT_CAPACITY = getattr(settings, 'DELIVERY_SLOT_CAPACITY', 20)
+SLOT_SHARDS = getattr(settings, 'DELIVERY_SLOT_SHARDS', 4)
+# Days ahead, today included, slots are generated and can be booked for
+SLOT_BOOKING_DAYS = getattr(settings, 'DELIVERY_SLOT_BOOKING_DAYS', 7)
+# Minutes a slot stays held between choosing it and checking out
+SLOT_HOLD_MINUTES = getattr(settings, 'DELIVERY_SLOT_HOLD_MINUTES', 10)
+# Live holds one customer may have at a time
+SLOT_MAX_HOLDS = getattr(settings, 'DELIVERY_SLOT_MAX_HOLDS', 3)
+
+
+def available_slots(location, date):
+    """Slots of a location on a day with their remaining capacity.
+
+    Reads the per-shard counters only; orders are never counted here.
+    """
+    rows = (
+        DeliverySlotShard.objects.filter(slot__location=location, slot__date=date)
+        .values('slot_id', 'slot__start_time', 'slot__end_time')
+        .annotate(capacity=Sum('capacity'), reserved=Sum('reserved'))
+        .order_by('slot__start_time')
+    )
+    return [
+        {
+            'id': row['slot_id'],
+            'date': date,
+            'start_time': row['slot__start_time'],
+            'end_time': row['slot__end_time'],
+            'available': max(row['capacity'] - row['reserved'], 0),
+        }
+        for row in rows
+    ]
+
+
+def _take_capacity(slot_id):
+    """Increment one shard with room left; returns its id or None when full"""
+    shard_ids = list(DeliverySlotShard.objects.filter(slot_id=slot_id).values_list('id', flat=True))
+    # Random order spreads concurrent reservations over the shards
+    random.shuffle(shard_ids)
+    for shard_id in shard_ids:
+        taken = DeliverySlotShard.objects.filter(id=shard_id, reserved__lt=F('capacity')).update(
+            reserved=F('reserved') + 1
+        )
+        if taken:
+            return shard_id
+    return None
+
+
+def _give_back(shard_id):
+    DeliverySlotShard.objects.filter(id=shard_id, reserved__gt=0).update(reserved=F('reserved') - 1)
+
+
+def _slot_end(slot):
+    """Aware datetime the slot ends at; a window ending at 24:00 ends the next day"""
+    end = datetime.combine(slot.date, slot.end_time)
+    if slot.end_time <= slot.start_time:
+        end += timedelta(days=1)
+    return timezone.make_aware(end)
+
+
+def hold_slot(user, slot):
+    """Hold one unit of a slot's capacity for SLOT_HOLD_MINUTES.
+
+    Raises ValueError when the slot is over, not yet open for booking, at a
+    location no longer served or full, or when the user already has
+    SLOT_MAX_HOLDS live holds.
+    """
+    today = timezone.localdate()
+    if slot.date < today or _slot_end(slot) <= timezone.now():
+        raise ValueError("This delivery slot is over")
+    if slot.date >= today + timedelta(days=SLOT_BOOKING_DAYS):
+        raise ValueError("This delivery slot is not open for booking yet")
+    if not slot.location.is_available:
+        raise ValueError("Delivery is no longer available for this slot's location")
+    with transaction.atomic():
+        # Serializes the holds of one user so the cap can't be raced past
+        list(User.objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+        held = SlotReservation.objects.filter(
+            user=user, status=SlotReservationStatus.HELD, expires_at__gt=timezone.now()
+        ).count()
+        if held >= SLOT_MAX_HOLDS:
+            raise ValueError(f"You already hold {held} delivery slots, check out or wait for them to expire")
+        shard_id = _take_capacity(slot.id)
+        if shard_id is None:
+            raise ValueError("This delivery slot is full")
+        return SlotReservation.objects.create(
+            slot=slot, shard_id=shard_id, user=user,
+            expires_at=timezone.now() + timedelta(minutes=SLOT_HOLD_MINUTES),
+        )
+
+
+def confirm_hold(hold_id, order):
+    """Attach a live hold to an order; call inside the checkout transaction.
+
+    Raises ValueError when the hold expired, does not belong to the customer
+    or is for a slot of another location than the delivery address.
+    """
+    live = SlotReservation.objects.filter(
+        id=hold_id, user=order.customer, status=SlotReservationStatus.HELD,
+        expires_at__gt=timezone.now(),
+    )
+    confirmed = live.filter(slot__location__pincode=order.delivery_address.pincode).update(
+        status=SlotReservationStatus.CONFIRMED, order=order
+    )
+    if not confirmed:
+        if live.exists():
+            raise ValueError("Delivery slot is not for this delivery address, please choose a slot again")
+        raise ValueError("Delivery slot hold expired, please choose a slot again")
+
+
+def release_reservations(reservations):
+    """Release the given reservations and return their capacity; returns the count"""
+    released = 0
+    for reservation_id, shard_id in reservations.values_list('id', 'shard_id'):
+        # Conditional so a hold confirmed meanwhile is left alone
+        with transaction.atomic():
+            updated = SlotReservation.objects.filter(
+                id=reservation_id,
+                status__in=[SlotReservationStatus.HELD, SlotReservationStatus.CONFIRMED],
+            ).exclude(
+                status=SlotReservationStatus.HELD, expires_at__gt=timezone.now()
+            ).update(status=SlotReservationStatus.RELEASED)
+            if updated:
+                _give_back(shard_id)
+                released += 1
+    return released
+
+
+def release_stale_reservations():
+    """Free expired holds and slots of cancelled orders"""
+    expired = SlotReservation.objects.filter(
+        status=SlotReservationStatus.HELD, expires_at__lte=timezone.now()
+    )
+    cancelled = SlotReservation.objects.filter(
+        status=SlotReservationStatus.CONFIRMED, order__status=OrderStatus.CANCELLED
+    )
+    return release_reservations(expired) + release_reservations(cancelled)
+
+
+def generate_slots(days=SLOT_BOOKING_DAYS, capacity=SLOT_CAPACITY, shards=SLOT_SHARDS):
+    """Create missing slots for every serviceable location for the next `days` days.
+
+    Raises ValueError unless 1 <= shards <= capacity.
+    """
+    if not 1 <= shards <= capacity:
+        raise ValueError(f"shards must be between 1 and the capacity ({capacity}), got {shards}")
+    today = timezone.localdate()
+    locations = DeliveryLocation.objects.filter(is_available=True)
+    existing = set(
+        DeliverySlot.objects.filter(date__gte=today, date__lt=today + timedelta(days=days))
+        .values_list('location_id', 'date', 'start_time')
+    )
+    new_slots = []
+    for location in locations:
+        for offset in range(days):
+            date = today + timedelta(days=offset)
+            for start_hour, end_hour in SLOT_WINDOWS:
+                start_time = dt_time(start_hour)
+                if (location.id, date, start_time) in existing:
+                    continue
+                new_slots.append(DeliverySlot(
+                    location=location, date=date, start_time=start_time,
+                    end_time=dt_time(end_hour % 24), capacity=capacity,
+                ))
+
+    with transaction.atomic():
+        try:
+            created = DeliverySlot.objects.bulk_create(new_slots)
+        except IntegrityError:
+            raise ValueError("Slots were generated concurrently, run again")
+        # Spread the capacity over the shards, remainder to the first ones
+        DeliverySlotShard.objects.bulk_create([
+            DeliverySlotShard(slot=slot, capacity=capacity // shards + (1 if i < capacity % shards else 0))
+            for slot in created
+            for i in range(shards)
+        ])
+    return len(created)
@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from ..models import CustomerAddress, DeliveryLocation, Order
+from ..pincodes import pincode_index
+
+
+class DeliveryTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        pincode_index.clear()
+        self.location = DeliveryLocation.objects.create(
+            pincode='123456', area_name='Central', city='Pune', state='MH',
+            delivery_fee=Decimal('30.00'), minimum_order=Decimal('50.00'),
+        )
+        self.user = User.objects.create_user('bob', password='secret')
+        self.address = CustomerAddress.objects.create(
+            user=self.user, full_address='1 Main St', pincode='123456', phone='9999999999'
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}")
+
+    def add_to_cart(self, variant, quantity):
+        response = self.client.post('/api/cart/add/', {'variant_id': variant.id, 'quantity': quantity}, format='json')
+        self.assertLess(response.status_code, 300, response.content)
+
+    def make_order(self):
+        return Order.objects.create(customer=self.user, delivery_address=self.address, status='placed')
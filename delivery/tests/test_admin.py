@@ -0,0 +1,56 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from cart.models import Cart, CartItem
+from inventory.factories import make_variants
+from saveMore.paginators import EstimatedCountPaginator
+from ..models import Order, OrderItem, Payment
+from .base import DeliveryTestCase
+
+
+class AdminChangeListTests(DeliveryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser('root', password='secret'))
+        self.variant = make_variants(1)[0]
+
+    def add_rows(self, count):
+        """An order with a line and payment, and an anonymous cart with an item, `count` times"""
+        for i in range(count):
+            order = self.make_order()
+            OrderItem.objects.create(
+                order=order, product_name=self.variant.sku, product_id=self.variant.id, variant=self.variant,
+                quantity=1, price_per_item=Decimal('10.00'), total_price=Decimal('10.00'),
+            )
+            Payment.objects.create(order=order, amount=Decimal('10.00'), payment_method='upi')
+            cart = Cart.objects.create(session_key=f'{order.id.hex}')
+            CartItem.objects.create(cart=cart, variant=self.variant, quantity=1)
+
+    def change_list_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        urls = ['/admin/delivery/order/', '/admin/delivery/orderitem/', '/admin/delivery/payment/',
+                '/admin/cart/cart/', '/admin/cart/cartitem/']
+        self.add_rows(1)
+        few = [self.change_list_queries(url) for url in urls]
+        self.add_rows(5)
+        self.assertEqual([self.change_list_queries(url) for url in urls], few)
+
+    def test_paginator_estimates_only_unfiltered_lists(self):
+        for _ in range(3):
+            self.make_order()
+        with mock.patch.object(EstimatedCountPaginator, '_estimate', return_value=500000):
+            self.assertEqual(EstimatedCountPaginator(Order.objects.order_by('id'), 10).count, 500000)
+            self.assertEqual(EstimatedCountPaginator(Order.objects.filter(status='placed'), 10).count, 3)
+        # Exact below the limit, and on databases without statistics
+        with mock.patch.object(EstimatedCountPaginator, '_estimate', return_value=50):
+            self.assertEqual(EstimatedCountPaginator(Order.objects.order_by('id'), 10).count, 3)
+        self.assertEqual(EstimatedCountPaginator(Order.objects.order_by('id'), 10).count, 3)
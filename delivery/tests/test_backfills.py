@@ -0,0 +1,46 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+
+from inventory.factories import make_variants
+from ..backfills import backfill_order_item_variants
+from ..models import OrderItem
+from .base import DeliveryTestCase
+
+
+class VariantBackfillTests(DeliveryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.variants = make_variants(3)
+        order = self.make_order()
+        product_ids = [str(variant.id) for variant in self.variants] + ['SKU-OLD', '999999', str(self.variants[0].id)]
+        self.items = OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_name='Old line', product_id=product_id, quantity=1,
+                      price_per_item=Decimal('10.00'), total_price=Decimal('10.00'))
+            for product_id in product_ids
+        ])
+
+    def linked(self):
+        return list(OrderItem.objects.order_by('pk').values_list('variant_id', flat=True))
+
+    def test_links_lines_whose_product_id_is_a_variant(self):
+        progress = list(backfill_order_item_variants(chunk_size=2))
+
+        ids = [variant.id for variant in self.variants]
+        self.assertEqual(self.linked(), ids + [None, None, ids[0]])
+        self.assertEqual(len(progress), 3)
+        self.assertEqual(sum(step.updated for step in progress), 4)
+        self.assertEqual(progress[-1].last_pk, self.items[-1].pk)
+
+    def test_rerun_and_resume_skip_linked_lines(self):
+        list(backfill_order_item_variants(chunk_size=2, start_pk=self.items[3].pk))
+        self.assertEqual(self.linked()[:3], [None, None, None])
+
+        self.assertEqual(sum(step.updated for step in backfill_order_item_variants()), 3)
+        self.assertEqual(sum(step.updated for step in backfill_order_item_variants()), 0)
+
+    def test_command_reports_progress(self):
+        out = StringIO()
+        call_command('backfill_order_item_variants', chunk_size=10, stdout=out)
+        self.assertIn('Linked 4 order items', out.getvalue())
@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from ..dispatch import DispatchOrder, pending_dispatch_orders, plan_routes, two_opt
+from ..models import DeliveryLocation, Order
+from ..pincodes import pincode_index
+from .base import DeliveryTestCase
+
+
+class RoutePlanningTests(SimpleTestCase):
+    start = timezone.now()
+    # Pincodes roughly 1 km apart going north
+    coordinates = {str(100000 + i): (18.5 + i * 0.009, 73.85) for i in range(4)}
+
+    def orders(self, count, hours=2):
+        pincodes = sorted(self.coordinates)
+        return [
+            DispatchOrder(f'order-{i}', pincodes[i % len(pincodes)], self.start + timedelta(hours=hours))
+            for i in range(count)
+        ]
+
+    def test_every_order_is_routed_once_within_capacity(self):
+        routes, unrouted = plan_routes(
+            self.orders(12) + [DispatchOrder('far', '999999', self.start)], self.coordinates,
+            depot=(18.5, 73.85), capacity=5, start_at=self.start,
+        )
+        routed = [order_id for route in routes for stop in route.stops for order_id in stop.order_ids]
+        self.assertEqual(sorted(routed), sorted(f'order-{i}' for i in range(12)))
+        self.assertTrue(all(sum(len(stop.order_ids) for stop in route.stops) <= 5 for route in routes))
+        self.assertEqual(unrouted, ['far'])
+
+    def test_stops_are_visited_outward_from_the_depot(self):
+        routes, _ = plan_routes(self.orders(4), self.coordinates, depot=(18.5, 73.85), start_at=self.start)
+        self.assertEqual(len(routes), 1)
+        self.assertEqual([stop.pincode for stop in routes[0].stops], sorted(self.coordinates))
+        etas = [stop.eta for stop in routes[0].stops]
+        self.assertEqual(etas, sorted(etas))
+        self.assertEqual(routes[0].late_orders, [])
+
+    def test_unreachable_promises_are_reported_late(self):
+        # About 11 km from the depot, so a promise due now can't be kept
+        routes, _ = plan_routes(self.orders(1, hours=0), self.coordinates, depot=(18.6, 73.85), start_at=self.start)
+        self.assertEqual(routes[0].late_orders, ['order-0'])
+
+    def test_two_opt_uncrosses_a_route(self):
+        # Depot and three stops on a line, 1 km apart
+        matrix = [[abs(a - b) for b in range(4)] for a in range(4)]
+        deadlines = {node: 1e9 for node in range(1, 4)}
+        self.assertEqual(two_opt([3, 1, 2], matrix, deadlines, 20, 5), [1, 2, 3])
+
+
+class PendingDispatchTests(DeliveryTestCase):
+    def test_confirmed_orders_carry_their_promised_time(self):
+        DeliveryLocation.objects.filter(pk=self.location.pk).update(
+            latitude=18.5, longitude=73.85, estimated_delivery_hours=3,
+        )
+        pincode_index.clear()
+        order = Order.objects.create(customer=self.user, delivery_address=self.address, status='confirmed')
+        self.make_order()
+
+        orders, coordinates = pending_dispatch_orders()
+
+        self.assertEqual([dispatch.order_id for dispatch in orders], [order.id])
+        self.assertEqual(orders[0].due_at, order.created_at + timedelta(hours=3))
+        self.assertEqual(coordinates, {'123456': (18.5, 73.85)})
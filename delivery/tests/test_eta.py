@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from ..eta import delivery_eta, eta_index, refresh_eta
+from ..models import Order
+from .base import DeliveryTestCase
+
+
+class EtaTests(DeliveryTestCase):
+    # A Monday morning, well in the past
+    monday = timezone.make_aware(datetime(2026, 1, 5, 10, 0))
+
+    def setUp(self):
+        super().setUp()
+        eta_index.clear()
+
+    def deliver(self, count, minutes, placed_at):
+        ids = [
+            Order.objects.create(customer=self.user, delivery_address=self.address, status='delivered').id
+            for _ in range(count)
+        ]
+        Order.objects.filter(id__in=ids).update(placed_at=placed_at, delivered_at=placed_at + timedelta(minutes=minutes))
+
+    def test_estimates_come_from_delivered_orders(self):
+        self.deliver(20, 12, self.monday)
+        self.assertEqual(refresh_eta(), 20)
+        self.assertEqual(delivery_eta(self.location, self.monday), {
+            'p50_minutes': 15, 'p90_minutes': 15, 'source': 'history',
+        })
+
+    def test_refresh_only_folds_in_new_deliveries(self):
+        self.deliver(20, 12, self.monday)
+        refresh_eta()
+        self.assertEqual(refresh_eta(), 0)
+
+        self.deliver(20, 32, self.monday + timedelta(days=7))
+        self.assertEqual(refresh_eta(), 20)
+        self.assertEqual(eta_index.estimate('123456', self.monday), (15, 35))
+
+    def test_sparse_hours_fall_back_to_the_pincode_figures(self):
+        self.deliver(20, 12, self.monday)
+        self.deliver(1, 52, self.monday + timedelta(hours=5))
+        refresh_eta()
+        # One sample at 15:00 is too few, so the pincode-wide figures apply
+        self.assertEqual(eta_index.estimate('123456', self.monday + timedelta(hours=5)), (15, 15))
+
+    def test_locations_without_history_use_their_static_hours(self):
+        self.assertEqual(delivery_eta(self.location), {'p50_minutes': 120, 'p90_minutes': 120, 'source': 'static'})
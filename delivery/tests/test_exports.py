@@ -0,0 +1,63 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from inventory.factories import make_variants
+from ..models import Order, OrderItem
+from .base import DeliveryTestCase
+
+
+class OrderExportTests(DeliveryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save()
+        variant = make_variants(1)[0]
+        for status in ['placed', 'delivered']:
+            order = Order.objects.create(customer=self.user, delivery_address=self.address, status=status)
+            for _ in range(2):
+                OrderItem.objects.create(
+                    order=order, product_name=variant.sku, product_id=variant.id, variant=variant,
+                    quantity=2, price_per_item=Decimal('10.00'), total_price=Decimal('20.00'),
+                )
+
+    def download(self, query=''):
+        response = self.client.get(f'/api/exports/orders/{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_has_a_row_per_order_line(self):
+        rows = list(csv.reader(self.download().splitlines()))
+        self.assertEqual(rows[0][:3], ['order_number', 'created_at', 'status'])
+        self.assertEqual(len(rows), 5)
+
+    def test_jsonl_honours_status_and_date_filters(self):
+        today = timezone.localdate()
+        lines = self.download(f'?output=jsonl&status=delivered&start={today}&end={today}').splitlines()
+        self.assertEqual([json.loads(line)['status'] for line in lines], ['delivered', 'delivered'])
+        self.assertEqual(self.download(f'?start={today + timedelta(days=1)}').splitlines()[1:], [])
+
+    def test_bad_parameters_are_rejected(self):
+        for query in ['?output=xml', '?status=lost', '?start=yesterday']:
+            self.assertEqual(self.client.get(f'/api/exports/orders/{query}').status_code, 400, query)
+
+    def test_export_is_staff_only(self):
+        self.user.is_staff = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/exports/orders/').status_code, 403)
+
+    def test_command_writes_every_dataset(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for dataset, rows in [('orders', 4), ('inventory', 1), ('carts', 0)]:
+                path = os.path.join(directory, f'{dataset}.jsonl')
+                call_command('export_data', dataset, '--format', 'jsonl', '--output', path, stderr=StringIO())
+                with open(path, encoding='utf-8') as export:
+                    self.assertEqual(len(export.read().splitlines()), rows, dataset)
@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from ..models import IdempotencyKey, Payment
+from .base import DeliveryTestCase
+
+
+class IdempotencyTests(DeliveryTestCase):
+    def test_retry_replays_first_response(self):
+        order = self.make_order()
+        data = {'order_id': str(order.id), 'payment_method': 'upi'}
+
+        first = self.client.post('/api/payments/', data, format='json', HTTP_IDEMPOTENCY_KEY='pay-1')
+        retry = self.client.post('/api/payments/', data, format='json', HTTP_IDEMPOTENCY_KEY='pay-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json()['payment_id'], first.json()['payment_id'])
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_replay_survives_cache_loss(self):
+        order = self.make_order()
+        data = {'order_id': str(order.id), 'payment_method': 'upi'}
+        first = self.client.post('/api/payments/', data, format='json', HTTP_IDEMPOTENCY_KEY='pay-2')
+        cache.clear()
+
+        retry = self.client.post('/api/payments/', data, format='json', HTTP_IDEMPOTENCY_KEY='pay-2')
+
+        self.assertEqual(retry.json()['payment_id'], first.json()['payment_id'])
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_different_keys_run_separately(self):
+        order = self.make_order()
+        data = {'order_id': str(order.id), 'payment_method': 'upi'}
+        self.client.post('/api/payments/', data, format='json', HTTP_IDEMPOTENCY_KEY='pay-3')
+        self.client.post('/api/payments/', data, format='json', HTTP_IDEMPOTENCY_KEY='pay-4')
+        self.assertEqual(Payment.objects.count(), 2)
+
+    def claim(self, key, locked_until):
+        return IdempotencyKey.objects.create(
+            user=self.user, key=key, endpoint='create_payment', locked_until=locked_until,
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+
+    def test_duplicate_of_running_request_conflicts(self):
+        order = self.make_order()
+        self.claim('pay-5', timezone.now() + timedelta(seconds=60))
+        data = {'order_id': str(order.id), 'payment_method': 'upi'}
+
+        response = self.client.post('/api/payments/', data, format='json', HTTP_IDEMPOTENCY_KEY='pay-5')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_abandoned_claim_is_taken_over(self):
+        order = self.make_order()
+        self.claim('pay-6', timezone.now() - timedelta(seconds=1))
+        data = {'order_id': str(order.id), 'payment_method': 'upi'}
+
+        first = self.client.post('/api/payments/', data, format='json', HTTP_IDEMPOTENCY_KEY='pay-6')
+        cache.clear()
+        retry = self.client.post('/api/payments/', data, format='json', HTTP_IDEMPOTENCY_KEY='pay-6')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.json()['payment_id'], first.json()['payment_id'])
+        self.assertEqual(Payment.objects.count(), 1)
+        self.assertIsNone(IdempotencyKey.objects.get(key='pay-6').locked_until)
+
+    def test_malformed_order_id_is_a_bad_request(self):
+        response = self.client.post('/api/payments/', {'order_id': 'nope', 'payment_method': 'upi'}, format='json')
+        self.assertEqual(response.status_code, 400)
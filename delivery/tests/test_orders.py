@@ -0,0 +1,211 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from cart.models import Cart, CartItem
+from cart.quotes import read_quote
+from inventory.factories import make_variants
+from inventory.models import InventoryItem
+from ..models import CustomerAddress, DeliveryLocation, Order, OrderItem
+from ..orders import assemble_order, checkout_cart, price_order_lines
+from ..slots import generate_slots
+from .base import DeliveryTestCase
+
+
+class CheckoutTests(DeliveryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.variants = make_variants(2, stock=5)
+
+    def test_checkout_with_quote(self):
+        self.add_to_cart(self.variants[0], 2)
+        self.add_to_cart(self.variants[1], 3)
+        quote = self.client.get('/api/cart/summary/?pincode=123456').json()['quote']
+
+        response = self.client.post('/api/checkout/', {'address_id': self.address.id, 'quote': quote}, format='json')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        body = response.json()
+        self.assertTrue(body['quoted'])
+        self.assertEqual(body['items_total'], 50.0)
+        order = Order.objects.get(id=body['order_id'])
+        self.assertEqual(order.items.count(), 2)
+        self.assertEqual(
+            list(InventoryItem.objects.order_by('variant_id').values_list('quantity', flat=True)), [3, 2]
+        )
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_stale_quote_is_not_used(self):
+        self.add_to_cart(self.variants[0], 1)
+        quote = self.client.get('/api/cart/summary/?pincode=123456').json()['quote']
+        self.add_to_cart(self.variants[1], 1)
+
+        response = self.client.post('/api/checkout/', {'address_id': self.address.id, 'quote': quote}, format='json')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertFalse(response.json()['quoted'])
+        self.assertEqual(response.json()['items_total'], 20.0)
+
+    def test_cart_changed_after_quote_check_is_rejected(self):
+        self.add_to_cart(self.variants[0], 1)
+        token = self.client.get('/api/cart/summary/?pincode=123456').json()['quote']
+        cart = Cart.objects.get(user=self.user)
+        quote = read_quote(token, cart, '123456')
+        CartItem.objects.filter(cart=cart).update(quantity=2)
+
+        with self.assertRaises(ValueError):
+            checkout_cart(Cart.objects.get(user=self.user), self.address, quote=quote)
+        self.assertFalse(Order.objects.exists())
+
+    def test_out_of_stock_leaves_everything_untouched(self):
+        self.add_to_cart(self.variants[0], 4)
+        InventoryItem.objects.filter(variant=self.variants[0]).update(quantity=3)
+
+        response = self.client.post('/api/checkout/', {'address_id': self.address.id}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(CartItem.objects.get().quantity, 4)
+        self.assertEqual(InventoryItem.objects.get(variant=self.variants[0]).quantity, 3)
+
+    def test_slot_hold_must_match_delivery_location(self):
+        other = DeliveryLocation.objects.create(pincode='654321', area_name='North', city='Pune', state='MH')
+        generate_slots(days=2)
+        # Tomorrow's, today's may already be over
+        slot = other.slots.order_by('-date').first()
+        hold = self.client.post('/api/slots/hold/', {'slot_id': slot.id}, format='json').json()
+        self.add_to_cart(self.variants[0], 1)
+
+        response = self.client.post(
+            '/api/checkout/', {'address_id': self.address.id, 'slot_hold_id': hold['slot_hold_id']}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+
+class OrderAssemblyTests(DeliveryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.variants = make_variants(2)
+
+    def post_items(self, items):
+        return self.client.post(f'/api/order_item/?address_id={self.address.id}', {'items': items}, format='json')
+
+    def test_assemble_order_inserts_lines_and_writes_totals(self):
+        order = self.make_order()
+        lines = price_order_lines([
+            {'variant_id': self.variants[0].id, 'quantity': 2},
+            {'variant_id': str(self.variants[1].id), 'quantity': '1'},
+        ])
+        with self.assertNumQueries(2):
+            items = assemble_order(order, lines, self.location)
+
+        order.refresh_from_db()
+        self.assertEqual([item.total_price for item in items], [Decimal('20.00'), Decimal('10.00')])
+        self.assertEqual(order.items.count(), 2)
+        self.assertEqual(order.items_total, Decimal('30.00'))
+        # Below the location's minimum order
+        self.assertEqual(order.delivery_fee, Decimal('30.00'))
+        self.assertEqual(order.total_amount, Decimal('60.00'))
+
+    def test_add_order_items_creates_priced_order(self):
+        response = self.post_items([{'variant_id': self.variants[0].id, 'quantity': 5}])
+
+        self.assertEqual(response.status_code, 201, response.content)
+        order = Order.objects.get(id=response.json()['order_id'])
+        self.assertEqual(order.items_total, Decimal('50.00'))
+        self.assertEqual(order.delivery_fee, Decimal('0.00'))
+        self.assertEqual(order.items.get().variant_id, self.variants[0].id)
+
+    def test_invalid_quantities_are_rejected_before_ordering(self):
+        for quantity in [0, -2, 'two', None]:
+            response = self.post_items([
+                {'variant_id': self.variants[0].id, 'quantity': 1},
+                {'variant_id': self.variants[1].id, 'quantity': quantity},
+            ])
+            self.assertEqual(response.status_code, 400, quantity)
+        self.assertEqual(self.post_items('not a list').status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_bad_requests_create_no_order(self):
+        self.assertEqual(self.post_items([]).status_code, 400)
+        self.assertEqual(self.post_items([{'variant_id': 999, 'quantity': 1}]).status_code, 400)
+        for address_id in ['abc', '']:
+            response = self.client.post(f'/api/order_item/?address_id={address_id}', {'items': []}, format='json')
+            self.assertEqual(response.status_code, 400, address_id)
+        response = self.client.post('/api/order_item/?address_id=999', {'items': []}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Order.objects.exists())
+
+    def test_quote_of_a_deleted_variant_is_rejected(self):
+        self.add_to_cart(self.variants[0], 1)
+        self.add_to_cart(self.variants[1], 2)
+        token = self.client.get('/api/cart/summary/?pincode=123456').json()['quote']
+        quote = read_quote(token, Cart.objects.get(user=self.user), '123456')
+        deleted_id = self.variants[1].id
+        self.variants[1].delete()
+
+        # The quote as it was read, before the deletion touched the cart
+        with mock.patch('delivery.views.read_quote', return_value=quote):
+            response = self.post_items([])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['failed'], f"Variant {deleted_id} is not available")
+        self.assertFalse(Order.objects.exists())
+
+
+class OrderHistoryTests(DeliveryTestCase):
+    def setUp(self):
+        super().setUp()
+        variant = make_variants(1)[0]
+        self.orders = [self.make_order() for _ in range(5)]
+        for order in self.orders:
+            OrderItem.objects.create(
+                order=order, product_name=variant.sku, product_id=variant.id, variant=variant,
+                quantity=1, price_per_item=Decimal('10.00'), total_price=Decimal('10.00'),
+            )
+        other = User.objects.create_user('carol')
+        Order.objects.create(
+            customer=other, status='placed',
+            delivery_address=CustomerAddress.objects.create(user=other, full_address='x', pincode='123456', phone='1'),
+        )
+
+    def history(self, query=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/orders/{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), len(queries)
+
+    def test_cursor_walks_every_order_once_newest_first(self):
+        newest_first = sorted(self.orders, key=lambda order: (order.created_at, order.id), reverse=True)
+        seen, query = [], '?limit=2'
+        while True:
+            page, _ = self.history(query)
+            seen += [order['id'] for order in page['orders']]
+            if not page['has_more']:
+                break
+            query = f"?limit=2&cursor={page['next_cursor']}"
+        self.assertEqual(seen, [str(order.id) for order in newest_first])
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.history()
+        _, few = self.history('?limit=1')
+        large, many = self.history('?limit=5')
+        self.assertEqual(len(large['orders'][0]['items']), 1)
+        self.assertEqual(len(large['orders']), 5)
+        self.assertEqual(few, many)
+
+    def test_summary_mode_returns_plain_columns(self):
+        page, _ = self.history('?summary=1&limit=1')
+        self.assertEqual(set(page['orders'][0]), {
+            'id', 'order_number', 'status', 'payment_status', 'items_total', 'delivery_fee', 'total_amount',
+            'created_at',
+        })
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        self.assertEqual(self.client.get('/api/orders/?cursor=forged').status_code, 400)
+        self.assertEqual(self.client.get('/api/orders/?limit=many').status_code, 400)
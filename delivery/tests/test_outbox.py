@@ -0,0 +1,54 @@
+from django.utils import timezone
+
+from .. import outbox
+from ..models import OutboxEvent
+from .base import DeliveryTestCase
+
+
+class OutboxTests(DeliveryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.order = self.make_order()
+        self.other = self.make_order()
+        OutboxEvent.objects.all().delete()
+        self.events = [
+            OutboxEvent.record(self.order, 'order.status_changed', status=status)
+            for status in ('confirmed', 'preparing', 'delivered')
+        ]
+        OutboxEvent.record(self.other, 'order.status_changed', status='confirmed')
+        self.delivered = []
+
+    def handler(self, failing=()):
+        def deliver(event):
+            if event.payload['status'] in failing:
+                raise RuntimeError('downstream unavailable')
+            self.delivered.append((event.order_id, event.payload['status']))
+        return deliver
+
+    def test_events_are_delivered_in_order(self):
+        self.assertEqual(outbox.dispatch_batch(handlers=[self.handler()]), (4, 0))
+        statuses = [status for order_id, status in self.delivered if order_id == self.order.id]
+        self.assertEqual(statuses, ['confirmed', 'preparing', 'delivered'])
+
+    def test_failure_holds_back_later_events_of_the_order(self):
+        with self.assertLogs('delivery.outbox', 'ERROR'):
+            self.assertEqual(outbox.dispatch_batch(handlers=[self.handler(failing={'preparing'})]), (2, 1))
+        self.assertEqual(self.delivered, [(self.order.id, 'confirmed'), (self.other.id, 'confirmed')])
+
+        # Still waiting for its retry: nothing of the order is picked up
+        self.assertEqual(outbox.dispatch_batch(handlers=[self.handler()]), (0, 0))
+
+        OutboxEvent.objects.filter(dispatched_at__isnull=True).update(available_at=timezone.now())
+        self.assertEqual(outbox.dispatch_batch(handlers=[self.handler()]), (2, 0))
+        self.assertEqual(self.delivered[2:], [(self.order.id, 'preparing'), (self.order.id, 'delivered')])
+
+    def test_event_is_given_up_after_max_attempts(self):
+        with self.assertLogs('delivery.outbox', 'ERROR'):
+            for _ in range(outbox.MAX_ATTEMPTS):
+                OutboxEvent.objects.filter(dispatched_at__isnull=True).update(available_at=timezone.now())
+                outbox.dispatch_batch(handlers=[self.handler(failing={'preparing'})])
+
+        failed = OutboxEvent.objects.get(pk=self.events[1].pk)
+        self.assertIsNotNone(failed.failed_at)
+        self.assertEqual(failed.attempts, outbox.MAX_ATTEMPTS)
+        self.assertIn((self.order.id, 'delivered'), self.delivered)
@@ -0,0 +1,87 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from ..models import CustomerAddress, DeliveryLocation, IndexVersion
+from ..pincodes import PincodeIndex, pincode_index
+from .base import DeliveryTestCase
+
+
+class PincodeIndexTests(DeliveryTestCase):
+    def test_lookups_need_no_query_once_loaded(self):
+        pincode_index.get('123456')
+        with self.assertNumQueries(0):
+            self.assertEqual(pincode_index.get('123456'), self.location)
+            self.assertEqual(set(pincode_index.get_many(['123456', '999999'])), {'123456'})
+
+    def test_location_changes_invalidate_the_index(self):
+        self.assertIsNotNone(pincode_index.get('123456'))
+        self.location.is_available = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.location.save()
+        self.assertIsNone(pincode_index.get('123456'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DeliveryLocation.objects.create(pincode='654321', area_name='East', city='Pune', state='MH')
+        self.assertIsNotNone(pincode_index.get('654321'))
+
+    def test_other_processes_reload_after_the_check_interval(self):
+        other = PincodeIndex()
+        self.assertIsNotNone(other.get('123456'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.location.delete()
+        # Still within VERSION_CHECK_INTERVAL
+        self.assertIsNotNone(other.get('123456'))
+        other._checked_at = 0
+        self.assertIsNone(other.get('123456'))
+
+    def test_rolled_back_change_publishes_nothing(self):
+        self.assertIsNotNone(pincode_index.get('123456'))
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.location.delete()
+            # The bump waits for the commit, so none is read here
+            pincode_index._checked_at = 0
+            self.assertIsNotNone(pincode_index.get('123456'))
+            raise RuntimeError
+        self.assertFalse(IndexVersion.objects.exists())
+        self.assertIsNone(cache.get(PincodeIndex.version_key))
+        self.assertIsNotNone(pincode_index.get('123456'))
+
+    @mock.patch('delivery.indexes.cache_is_shared', return_value=True)
+    def test_version_checks_read_the_shared_cache(self, shared):
+        other = PincodeIndex()
+        other.get('123456')
+        other._checked_at = 0
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(other.get('123456'))
+
+        self.location.is_available = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.location.save()
+        other._checked_at = 0
+        self.assertIsNone(other.get('123456'))
+
+
+class AddressListTests(DeliveryTestCase):
+    def list_addresses(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/addresses/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['addresses'], len(queries)
+
+    def test_query_count_does_not_grow_with_addresses(self):
+        self.list_addresses()
+        _, single = self.list_addresses()
+        for pincode in ['123456', '999999', '123456']:
+            CustomerAddress.objects.create(user=self.user, full_address='2 Side St', pincode=pincode, phone='1')
+
+        addresses, many = self.list_addresses()
+
+        self.assertEqual(many, single)
+        self.assertEqual(len(addresses), 4)
+        available = {address['pincode']: address['delivery_available'] for address in addresses}
+        self.assertEqual(available, {'123456': True, '999999': False})
+        unknown = next(address for address in addresses if address['pincode'] == '999999')
+        self.assertEqual(unknown['delivery_info']['area_name'], 'Unknown')
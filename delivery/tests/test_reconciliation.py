@@ -0,0 +1,30 @@
+from decimal import Decimal
+
+from django.utils import timezone
+
+from ..models import Order, OutboxEvent, Payment, PaymentStatus
+from ..reconciliation import SettlementLine, apply_planned, plan_changes
+from .base import DeliveryTestCase
+
+
+class ReconciliationTests(DeliveryTestCase):
+    def test_payment_moved_meanwhile_is_a_conflict(self):
+        payments = [
+            Payment.objects.create(order=self.make_order(), amount=Decimal('40.00'), payment_method='upi')
+            for _ in range(2)
+        ]
+        lines = [
+            SettlementLine(number, payment.payment_id, f'tx-{number}', 'success', '40.00')
+            for number, payment in enumerate(payments, start=2)
+        ]
+        changes, outcomes = plan_changes(lines)
+        Payment.objects.filter(pk=payments[0].pk).update(status=PaymentStatus.FAILED)
+        OutboxEvent.objects.all().delete()
+
+        outcomes = apply_planned(changes, outcomes, timezone.now(), 'settlement')
+
+        self.assertEqual([outcome for _, outcome, _ in outcomes], ['conflict', 'applied'])
+        self.assertEqual(Payment.objects.get(pk=payments[0].pk).status, PaymentStatus.FAILED)
+        self.assertEqual(Payment.objects.get(pk=payments[1].pk).status, PaymentStatus.PAID)
+        self.assertEqual(Order.objects.get(pk=payments[0].order_id).payment_status, PaymentStatus.PENDING)
+        self.assertEqual(list(OutboxEvent.objects.values_list('order_id', flat=True)), [payments[1].order_id])
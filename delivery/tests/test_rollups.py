@@ -0,0 +1,34 @@
+from decimal import Decimal
+
+from inventory.factories import make_variants
+from ..models import OrderItem
+from ..rollups import refresh_sales_rollups
+from .base import DeliveryTestCase
+
+
+class SalesReportTests(DeliveryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save()
+        self.variants = make_variants(2)
+        order = self.make_order()
+        for variant, quantity in zip(self.variants, [2, 3]):
+            OrderItem.objects.create(
+                order=order, product_name=variant.sku, product_id=variant.id, variant=variant,
+                quantity=quantity, price_per_item=Decimal('10.00'), total_price=Decimal('10.00') * quantity,
+            )
+        refresh_sales_rollups()
+
+    def test_filters_by_variant(self):
+        response = self.client.get(f'/api/sales/?variant={self.variants[1].id}&group_by=variant')
+        series = response.json()['series']
+        self.assertEqual(len(series), 1)
+        self.assertEqual(series[0]['units'], 3)
+        self.assertEqual(Decimal(series[0]['revenue']), Decimal('30.00'))
+
+    def test_malformed_filters_are_a_bad_request(self):
+        for query in ['category=abc', 'variant=1.5', 'pincode=12-34', 'group_by=city',
+                      'end=2024-02-30', 'start=2024-13-01', 'start=soon']:
+            response = self.client.get(f'/api/sales/?{query}')
+            self.assertEqual(response.status_code, 400, query)
@@ -0,0 +1,82 @@
+import threading
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..sequences import BlockAllocator
+
+
+class BlockAllocatorTests(TransactionTestCase):
+    def test_ids_stay_unique_after_rollback(self):
+        allocator = BlockAllocator(block_size=3)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                allocator.next_id('test')
+                raise RuntimeError
+        ids = [allocator.next_id('test') for _ in range(10)]
+        with transaction.atomic():
+            ids += [allocator.next_id('test') for _ in range(5)]
+        ids += [allocator.next_id('test') for _ in range(5)]
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_allocators_never_share_ids(self):
+        first, second = BlockAllocator(block_size=4), BlockAllocator(block_size=4)
+        ids = []
+        for _ in range(10):
+            ids += [first.next_id('test'), second.next_id('test')]
+        with transaction.atomic():
+            ids += [first.next_id('test'), second.next_id('test')]
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_transaction_reserves_one_block_and_keeps_it_after_commit(self):
+        allocator = BlockAllocator(block_size=5)
+        with CaptureQueriesContext(connection) as queries, transaction.atomic():
+            ids = [allocator.next_id('test') for _ in range(3)]
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('UPDATE')]), 1)
+        with self.assertNumQueries(0):
+            ids += [allocator.next_id('test') for _ in range(2)]
+        self.assertEqual(ids, [1, 2, 3, 4, 5])
+
+    def test_block_of_a_rolled_back_savepoint_is_dropped(self):
+        allocator = BlockAllocator(block_size=5)
+        with transaction.atomic():
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                allocator.next_id('test')
+                raise RuntimeError
+            ids = [allocator.next_id('test') for _ in range(2)]
+        ids += [allocator.next_id('test') for _ in range(4)]
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(ids[:2], [1, 2])
+
+    def test_allocators_on_separate_connections_never_share_ids(self):
+        # One allocator per thread, and Django gives every thread its own
+        # connection. The test database is SQLite in memory, which doesn't
+        # wait for locks, so the threads take turns on `turn`.
+        turn = threading.Lock()
+        ids, errors = [], []
+
+        def work():
+            allocator = BlockAllocator(block_size=3)
+            try:
+                for i in range(10):
+                    with turn:
+                        if i % 3:
+                            ids.append(allocator.next_id('test'))
+                        else:
+                            with transaction.atomic():
+                                ids.extend(allocator.next_id('test') for _ in range(2))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(ids), 4 * 14)
+        self.assertEqual(len(set(ids)), len(ids))
@@ -0,0 +1,65 @@
+from datetime import datetime, time as dt_time, timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from ..models import DeliverySlot, SlotReservation
+from ..slots import SLOT_BOOKING_DAYS, generate_slots
+from .base import DeliveryTestCase
+
+
+class SlotHoldTests(DeliveryTestCase):
+    def test_malformed_slot_id_is_a_bad_request(self):
+        for slot_id in ['abc', None, [1]]:
+            response = self.client.post('/api/slots/hold/', {'slot_id': slot_id}, format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_unknown_slot_is_not_found(self):
+        response = self.client.post('/api/slots/hold/', {'slot_id': 999}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def make_slot(self, days, start_hour=9, end_hour=12):
+        return DeliverySlot.objects.create(
+            location=self.location, date=timezone.localdate() + timedelta(days=days),
+            start_time=dt_time(start_hour), end_time=dt_time(end_hour % 24), capacity=1,
+        )
+
+    def hold(self, slot):
+        return self.client.post('/api/slots/hold/', {'slot_id': slot.id}, format='json')
+
+    def test_slots_outside_the_booking_window_are_rejected(self):
+        self.assertEqual(self.hold(self.make_slot(-1)).status_code, 409)
+        self.assertEqual(self.hold(self.make_slot(SLOT_BOOKING_DAYS)).status_code, 409)
+        # A window of today that has ended, but not one running to midnight
+        evening = timezone.make_aware(datetime.combine(timezone.localdate(), dt_time(22)))
+        ended, until_midnight = self.make_slot(0), self.make_slot(0, 21, 24)
+        with mock.patch('django.utils.timezone.now', return_value=evening):
+            self.assertIn('over', self.hold(ended).json()['error'])
+            # Gets past the window checks, no shards were made for it
+            self.assertIn('full', self.hold(until_midnight).json()['error'])
+        self.assertFalse(SlotReservation.objects.exists())
+
+    def test_slots_of_a_location_no_longer_served_are_rejected(self):
+        generate_slots(days=2)
+        slot = self.location.slots.order_by('-date').first()
+        self.location.is_available = False
+        self.location.save()
+
+        response = self.hold(slot)
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('no longer available', response.json()['error'])
+
+    def test_generate_slots_needs_one_to_capacity_shards(self):
+        for shards in [0, -1, 3]:
+            with self.assertRaises(ValueError):
+                generate_slots(days=1, capacity=2, shards=shards)
+            with self.assertRaises(CommandError):
+                call_command('generate_slots', days=1, capacity=2, shards=shards)
+        self.assertFalse(DeliverySlot.objects.exists())
+
+    def test_impossible_listing_date_is_a_bad_request(self):
+        for date in ['2024-02-30', 'tomorrow']:
+            response = self.client.get(f'/api/slots/?pincode=123456&date={date}')
+            self.assertEqual(response.status_code, 400, date)
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from ..models import TrackingEvent
+from .base import DeliveryTestCase
+
+
+class TrackingTests(DeliveryTestCase):
+    def poll(self, order, after=None):
+        query = f'?after={after}' if after is not None else ''
+        return self.client.get(f'/api/orders/{order.id}/tracking/{query}').json()
+
+    def test_polling_returns_events_with_equal_or_earlier_timestamps(self):
+        order = self.make_order()
+        stamp = timezone.now()
+        TrackingEvent.objects.create(order=order, status='placed', timestamp=stamp)
+        first = self.poll(order)
+
+        TrackingEvent.objects.create(order=order, status='confirmed', timestamp=stamp)
+        # Stamped before the last event but committed after it
+        TrackingEvent.objects.create(order=order, status='packed', timestamp=stamp - timedelta(seconds=1))
+        second = self.poll(order, first['latest'])
+
+        self.assertEqual([event['status'] for event in first['events']], ['placed'])
+        self.assertEqual([event['status'] for event in second['events']], ['confirmed', 'packed'])
+        self.assertEqual(self.poll(order, second['latest'])['events'], [])
+
+    def test_malformed_cursor_is_a_bad_request(self):
+        order = self.make_order()
+        response = self.client.get(f'/api/orders/{order.id}/tracking/?after=yesterday')
+        self.assertEqual(response.status_code, 400)
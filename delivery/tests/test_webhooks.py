@@ -0,0 +1,69 @@
+import hashlib
+import hmac
+import json
+from collections import Counter
+from decimal import Decimal
+from unittest import mock
+
+from ..models import Order, Payment, PaymentStatus, PaymentWebhookEvent
+from ..webhooks import SIGNATURE_HEADER, parse_event, process_batch
+from .base import DeliveryTestCase
+
+
+@mock.patch('delivery.webhooks.WEBHOOK_SECRET', 'test-secret')
+class PaymentWebhookTests(DeliveryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.payment = Payment.objects.create(
+            order=self.make_order(), amount=Decimal('40.00'), payment_method='upi'
+        )
+
+    def event(self, event_id='evt-1', status='success', **data):
+        data = {'payment_id': self.payment.payment_id, 'status': status, 'amount': '40.00', **data}
+        return json.dumps({'id': event_id, 'type': 'payment.updated', 'data': data}).encode()
+
+    def post(self, body, signature=None):
+        if signature is None:
+            signature = hmac.new(b'test-secret', body, hashlib.sha256).hexdigest()
+        headers = {SIGNATURE_HEADER: signature} if signature else {}
+        return self.client.generic('POST', '/api/payments/webhook/', body, 'application/json', headers=headers)
+
+    def test_bad_or_missing_signature_is_unauthorized(self):
+        body = self.event()
+        for signature in ['', 'abc123', 'é' * 64]:
+            self.assertEqual(self.post(body, signature).status_code, 401, signature)
+        self.assertFalse(PaymentWebhookEvent.objects.exists())
+
+    def test_repeated_event_id_is_stored_once(self):
+        first = self.post(self.event())
+        second = self.post(self.event(amount='41.00'))
+
+        self.assertEqual(first.json(), {'success': True, 'duplicate': False})
+        self.assertEqual(second.json(), {'success': True, 'duplicate': True})
+        self.assertEqual(PaymentWebhookEvent.objects.get().payload['data']['amount'], '40.00')
+
+    def test_malformed_events_are_rejected(self):
+        bodies = [
+            b'not json', b'[]', json.dumps({'id': 'evt-1'}).encode(),
+            json.dumps({'type': 'payment.updated', 'data': {'payment_id': 'p', 'status': 'success'}}).encode(),
+            json.dumps({'id': 'evt-1', 'data': {'status': 'success'}}).encode(),
+            json.dumps({'id': 'evt-1', 'data': {'payment_id': 'p'}}).encode(),
+        ]
+        for body in bodies:
+            with self.assertRaises(ValueError):
+                parse_event(body)
+            self.assertEqual(self.post(body).status_code, 400, body)
+        self.assertFalse(PaymentWebhookEvent.objects.exists())
+
+    def test_processing_applies_payment_once(self):
+        self.post(self.event())
+
+        self.assertEqual(process_batch(), Counter({'applied': 1}))
+        self.assertEqual(Order.objects.get(pk=self.payment.order_id).payment_status, PaymentStatus.PAID)
+        self.assertEqual(process_batch(), Counter())
+
+        # Gateway resends the same notification under a new event id
+        self.post(self.event('evt-2'))
+        self.assertEqual(process_batch(), Counter({'unchanged': 1}))
+        self.assertEqual(Payment.objects.get(pk=self.payment.pk).status, PaymentStatus.PAID)
+        self.assertFalse(PaymentWebhookEvent.objects.filter(processed_at__isnull=True).exists())
@@ -8,5 +8,14 @@ urlpatterns=[
     path('set_default/', views.set_default_address, name='set_default_address'),
     path('set_default/', views.set_default_address, name='set_default_address'),
     path('order_item/',views.add_order_items,name='order_item'),
+    path('checkout/',views.checkout,name='checkout'),
+    path('payments/',views.create_payment,name='create_payment'),
+    path('payments/webhook/',views.payment_webhook,name='payment_webhook'),
+    path('orders/',views.order_history,name='order_history'),
+    path('slots/',views.delivery_slots,name='delivery_slots'),
+    path('slots/hold/',views.hold_delivery_slot,name='hold_delivery_slot'),
+    path('orders/<uuid:order_id>/tracking/',views.order_tracking,name='order_tracking'),
+    path('sales/',views.sales_report,name='sales_report'),
+    path('exports/orders/',views.export_orders,name='export_orders'),
 
 ]
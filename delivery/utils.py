@@ -0,0 +1,10 @@
+def chunks(iterable, size):
+    """Yield lists of up to `size` items from any iterable, without loading it all"""
+    chunk = []
+    for row in iterable:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
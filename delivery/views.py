@@ -1,16 +1,37 @@
 from django.shortcuts import render
 from rest_framework.decorators import api_view,permission_classes
-from rest_framework.permissions import IsAuthenticated,AllowAny
+from rest_framework.permissions import IsAuthenticated,AllowAny,IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from django.db.models import Q
 from django.db import transaction
 from django.shortcuts import get_object_or_404
+from django.http import Http404, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+import uuid
+from datetime import timedelta
 from decimal import Decimal
+from django.core import signing
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from cart.models import Cart,CartItem
+from cart.request_cart import get_request_cart, refresh_cart_items
+from cart.quotes import read_quote
 from inventory.models import ProductVariant
-from .models import DeliveryLocation,CustomerAddress,OrderItem,Order
-from .serializers import CustomerAddressSerializer
+from .models import DeliveryLocation,CustomerAddress,OrderItem,Order,Payment,DeliveryHelper,TrackingEvent,DeliverySlot
+from .idempotency import idempotent
+from .serializers import CustomerAddressSerializer,OrderSerializer,TrackingEventSerializer
+from .orders import (
+    price_order_lines, quote_order_lines, check_variants_exist, assemble_order, checkout_cart, line_quantity,
+    validate_order_items,
+)
+from .slots import available_slots, hold_slot
+from .eta import delivery_eta
+from .rollups import sales_series
+from .exports import order_export
+from saveMore.exports import export_download
+from .webhooks import SIGNATURE_HEADER, verify_signature, parse_event, store_event
 # Create your views here.
 
 @api_view(['GET'])
@@ -36,6 +57,7 @@ def check_delivery_location(request):
         
         if available:
             # Delivery is available
+            eta = delivery_eta(location)
             return Response({
                 'available': True,
                 'pincode': pincode,
@@ -47,12 +69,13 @@ def check_delivery_location(request):
                     'delivery_fee': Decimal(location.delivery_fee),
                     'minimum_order': Decimal(location.minimum_order),
                     'estimated_delivery_hours': location.estimated_delivery_hours,
+                    'eta': eta,
                     'free_delivery_above': Decimal(location.minimum_order) if location.delivery_fee > 0 else 0
                 },
                 'delivery_info': {
                     'fee': f"₹{location.delivery_fee}",
                     'min_order': f"₹{location.minimum_order}",
-                    'estimated_time': f"{location.estimated_delivery_hours} hours",
+                    'estimated_time': f"{eta['p50_minutes']}-{eta['p90_minutes']} minutes" if eta['source'] == 'history' else f"{location.estimated_delivery_hours} hours",
                     'free_delivery_text': f"Free delivery on orders above ₹{location.minimum_order}" if location.delivery_fee > 0 else "Free delivery"
                 }
             }, status=status.HTTP_200_OK)
@@ -78,12 +101,14 @@ def check_delivery_location(request):
 def CustomerAddressView(request):
     if request.method=='GET':
         user=request.user
-        addresses = CustomerAddress.objects.filter(user=user).order_by('-is_default', '-created_at')
-        serializer = CustomerAddressSerializer(addresses, many=True)
+        addresses = list(CustomerAddress.objects.filter(user=user).order_by('-is_default', '-created_at'))
+        serializer = CustomerAddressSerializer(
+            addresses, many=True, context=CustomerAddressSerializer.delivery_context(addresses)
+        )
         return Response({
             'success': True,
             'addresses': serializer.data,
-            'count': addresses.count()
+            'count': len(addresses)
         }, status=status.HTTP_200_OK)
     elif request.method=='POST':
         user=request.user
@@ -153,57 +178,334 @@ def set_default_address(request):
         return Response({'success': False, 'message': 'Address not found'}, status=404)
 
 
-def create_order(request):
-    address_id=request.GET.get('address_id')
-    fee=request.GET.get('fee')
-    if request.user.is_authenticated:
-        customer=get_object_or_404(CustomerAddress,user=request.user,id=address_id)
-        delivery_loc=get_object_or_404(DeliveryLocation,pincode=customer.pincode)
-        order = Order.objects.create(
-        customer=request.user,
-        delivery_address=customer
-        )
-        order.save()
-        return (order,delivery_loc)
+def _order_address(user, address_id):
+    """The user's address and its delivery location; raises Http404"""
+    address = get_object_or_404(CustomerAddress, user=user, id=address_id)
+    available, delivery_loc = DeliveryLocation.check_delivery_available(address.pincode)
+    if not available:
+        raise Http404("Delivery not available to this location")
+    return address, delivery_loc
+
+def _items_match_quote(items, quote):
+    """Check the posted items are exactly the quoted cart lines"""
+    posted = sorted((str(item.get('variant_id')), line_quantity(item)) for item in items)
+    quoted = sorted((str(variant_id), quantity) for variant_id, quantity, _, _ in quote['lines'])
+    return posted == quoted
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def add_order_items(request):
+    items = request.data.get('items', [])
+    try:
+        validate_order_items(items)
+    except ValueError as e:
+        return Response({'failed': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        address_id = int(request.GET.get('address_id'))
+    except (TypeError, ValueError):
+        return Response({'failed': 'address_id must be an address id'}, status=status.HTTP_400_BAD_REQUEST)
+    address, loc = _order_address(request.user, address_id)
+
+    # A quote from cart summary already holds the priced lines
+    quote = read_quote(request.data.get('quote'), get_request_cart(request), loc.pincode)
+    if quote and items and not _items_match_quote(items, quote):
+        quote = None
+    if not items and not quote:
+        return Response({'failed': 'No items provided'}, status=status.HTTP_400_BAD_REQUEST)
+    # Priced before the order is created, so a bad request writes nothing
+    try:
+        if quote:
+            lines = quote_order_lines(quote)
+            check_variants_exist(lines)
+        else:
+            lines = price_order_lines(items)
+    except ValueError as e:
+        return Response({'failed': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
     try:
         with transaction.atomic():  # ensures all-or-nothing
-            order,loc = create_order(request)
-
-            items = request.data.get('items', [])
-            if not items:
-                return Response({'failed': 'No items provided'}, status=400)
-
-            created_items = []
-            amount=0
-            for item in items:
-                variant_id = item.get('variant_id')
-                quantity = item.get('quantity', 1)
-
-                variant = get_object_or_404(ProductVariant, id=variant_id)
-
-                order_item = OrderItem.objects.create(
-                    order=order,
-                    product_name=f"{variant.product.name} {variant.sku}",
-                    product_id=variant_id,
-                    price_per_item=variant.get_final_price(),
-                    quantity=quantity
-                )
-                amount=amount+variant.get_final_price()*quantity
-                created_items.append(order_item.id)
-            if amount<loc.minimum_order:
-                order.delivery_fee=loc.delivery_fee
-            order.total_amount=order.items_total+order.delivery_fee
-            order.save()
+            order = Order.objects.create(customer=request.user, delivery_address=address)
+            delivery_fee = Decimal(quote['fee']) if quote else None
+            order_items = assemble_order(order, lines, loc, delivery_fee=delivery_fee)
+            created_items = [order_item.id for order_item in order_items]
             return Response({
                 'success': True,
                 'order_id': str(order.id),
-                'items_created': created_items
+                'items_created': created_items,
+                'quoted': bool(quote)
             }, status=status.HTTP_201_CREATED)
 
     except Exception as e:
         return Response({'failed': str(e)}, status=500)
 
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent
+def checkout(request):
+    """Place an order for everything in the user's cart"""
+    address_id = request.data.get('address_id')
+    address = CustomerAddress.objects.filter(id=address_id, user=request.user).first()
+    if address is None:
+        return Response({'success': False, 'error': 'Address not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    cart = get_request_cart(request)
+    if cart._state.adding:
+        return Response({'success': False, 'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
+    quote = read_quote(request.data.get('quote'), cart, address.pincode)
+    try:
+        order = checkout_cart(cart, address, quote=quote, slot_hold_id=request.data.get('slot_hold_id'))
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    refresh_cart_items(cart)
+
+    return Response({
+        'success': True,
+        'order_id': str(order.id),
+        'order_number': order.order_number,
+        'items_total': float(order.items_total),
+        'delivery_fee': float(order.delivery_fee),
+        'total_amount': float(order.total_amount),
+        'quoted': bool(quote)
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent
+def create_payment(request):
+    """Start a payment for one of the user's orders"""
+    try:
+        order_id = uuid.UUID(str(request.data.get('order_id')))
+    except ValueError:
+        return Response({'success': False, 'error': 'order_id must be a valid order id'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    order = Order.objects.filter(id=order_id, customer=request.user).first()
+    if order is None:
+        return Response({'success': False, 'error': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    payment_method = request.data.get('payment_method')
+    valid_methods = dict(Payment._meta.get_field('payment_method').choices)
+    if payment_method not in valid_methods:
+        return Response({
+            'success': False,
+            'error': f"payment_method must be one of {', '.join(valid_methods)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    payment = Payment.objects.create(order=order, amount=order.total_amount, payment_method=payment_method)
+    return Response({
+        'success': True,
+        'payment_id': payment.payment_id,
+        'order_id': str(order.id),
+        'amount': float(payment.amount),
+        'status': payment.status
+    }, status=status.HTTP_201_CREATED)
+
+
+def _query_date(request, name, default=None):
+    """?<name>=YYYY-MM-DD as a date, `default` when absent.
+
+    Raises ValueError for a malformed or impossible date (2024-02-30).
+    """
+    value = request.GET.get(name)
+    if not value:
+        return default
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f"{name} must be YYYY-MM-DD")
+    return day
+
+
+ORDER_SUMMARY_FIELDS = [
+    'id', 'order_number', 'status', 'payment_status',
+    'items_total', 'delivery_fee', 'total_amount', 'created_at'
+]
+
+
+def _order_cursor(order):
+    created_at = order['created_at'] if isinstance(order, dict) else order.created_at
+    order_id = order['id'] if isinstance(order, dict) else order.id
+    return signing.dumps([created_at.isoformat(), str(order_id)], salt='orders.cursor')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def order_history(request):
+    """Customer's orders, newest first, paged by a (created_at, id) cursor"""
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        return Response({'success': False, 'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+    orders = DeliveryHelper.get_customer_orders(request.user).order_by('-created_at', '-id')
+    if request.GET.get('status'):
+        orders = orders.filter(status=request.GET['status'])
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            created_at, order_id = signing.loads(cursor, salt='orders.cursor')
+            created_at = parse_datetime(created_at)
+        except (signing.BadSignature, ValueError, TypeError):
+            return Response({'success': False, 'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        orders = orders.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=order_id))
+
+    summary = request.GET.get('summary', '').lower() in ('1', 'true', 'yes')
+    if summary:
+        page = list(orders.values(*ORDER_SUMMARY_FIELDS)[:limit + 1])
+    else:
+        page = list(
+            orders.select_related('delivery_address')
+            .prefetch_related('items', 'payments')[:limit + 1]
+        )
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    return Response({
+        'success': True,
+        'orders': page if summary else OrderSerializer(page, many=True).data,
+        'count': len(page),
+        'has_more': has_more,
+        'next_cursor': _order_cursor(page[-1]) if has_more else None
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def order_tracking(request, order_id):
+    """Tracking timeline of an order; pass ?after=<event id> to poll for new events"""
+    order = Order.objects.filter(id=order_id, customer=request.user).only('id', 'status').first()
+    if order is None:
+        return Response({'success': False, 'error': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    after = request.GET.get('after') or None
+    if after:
+        try:
+            after = int(after)
+        except ValueError:
+            return Response({'success': False, 'error': 'after must be an event id'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+    events = list(TrackingEvent.after(order, after))
+    return Response({
+        'success': True,
+        'order_id': str(order.id),
+        'status': order.status,
+        'events': TrackingEventSerializer(events, many=True).data,
+        # Pass back as ?after= on the next poll
+        'latest': events[-1].id if events else after
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def delivery_slots(request):
+    """Delivery slots with remaining capacity for a pincode and day"""
+    pincode = request.GET.get('pincode')
+    available, location = DeliveryLocation.check_delivery_available(pincode) if pincode else (False, None)
+    if not available:
+        return Response({
+            'success': False,
+            'error': 'Delivery not available to this location',
+            'pincode': pincode
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        date = _query_date(request, 'date', timezone.localdate())
+    except ValueError:
+        return Response({'success': False, 'error': 'date must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'success': True,
+        'pincode': pincode,
+        'date': date,
+        'slots': available_slots(location, date)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def hold_delivery_slot(request):
+    """Hold a slot for a few minutes while the customer checks out"""
+    try:
+        slot_id = int(request.data.get('slot_id'))
+    except (TypeError, ValueError):
+        return Response({'success': False, 'error': 'slot_id must be a slot id'}, status=status.HTTP_400_BAD_REQUEST)
+    slot = DeliverySlot.objects.select_related('location').filter(id=slot_id).first()
+    if slot is None:
+        return Response({'success': False, 'error': 'Slot not found'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        hold = hold_slot(request.user, slot)
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_409_CONFLICT)
+    return Response({
+        'success': True,
+        'slot_hold_id': hold.id,
+        'expires_at': hold.expires_at
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def sales_report(request):
+    """Sales time series from the daily rollups.
+
+    ?start=&end= (YYYY-MM-DD, default the last 30 days), ?interval=day|week|month,
+    ?group_by=pincode,category,variant and ?pincode=&category=&variant= filters.
+    """
+    try:
+        end = _query_date(request, 'end', timezone.localdate())
+        start = _query_date(request, 'start')
+    except ValueError:
+        return Response({'success': False, 'error': 'start and end must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    start = start or end - timedelta(days=29)
+
+    interval = request.GET.get('interval', 'day')
+    if interval not in ('day', 'week', 'month'):
+        return Response({'success': False, 'error': 'interval must be day, week or month'}, status=status.HTTP_400_BAD_REQUEST)
+    group_by = [field for field in request.GET.get('group_by', '').split(',') if field]
+    if any(field not in ('pincode', 'category', 'variant') for field in group_by):
+        return Response({'success': False, 'error': 'group_by takes pincode, category and variant'}, status=status.HTTP_400_BAD_REQUEST)
+
+    filters = {}
+    for param, field in (('pincode', 'pincode'), ('category', 'category_id'), ('variant', 'variant_id')):
+        value = request.GET.get(param)
+        if not value:
+            continue
+        if not value.isdigit():
+            return Response({'success': False, 'error': f'{param} must be numeric'}, status=status.HTTP_400_BAD_REQUEST)
+        filters[field] = value if field == 'pincode' else int(value)
+
+    series = sales_series(start, end, interval, group_by, **filters)
+    return Response({
+        'success': True,
+        'start': start,
+        'end': end,
+        'interval': interval,
+        'series': series
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_orders(request):
+    """Stream orders with their lines as CSV or JSON Lines (staff only)"""
+    return export_download(request, 'orders', order_export)
+
+@csrf_exempt
+@require_POST
+async def payment_webhook(request):
+    """Gateway payment notifications: store and acknowledge, applied later by
+    the process_payment_webhooks worker. A plain async view so bursts don't
+    hold sync workers; repeats of an event id are acknowledged and ignored."""
+    if not verify_signature(request.body, request.headers.get(SIGNATURE_HEADER)):
+        return JsonResponse({'success': False, 'error': 'Invalid signature'}, status=status.HTTP_401_UNAUTHORIZED)
+    try:
+        event = parse_event(request.body)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    created = await store_event(event)
+    return JsonResponse({'success': True, 'duplicate': not created}, status=status.HTTP_200_OK)
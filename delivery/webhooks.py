@@ -0,0 +1,96 @@
+import hashlib
+import hmac
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PaymentWebhookEvent
+from .reconciliation import SettlementLine, apply_planned, plan_changes
+
+SIGNATURE_HEADER = 'X-Webhook-Signature'
+# Shared with the gateway; webhooks are refused until it is set
+WEBHOOK_SECRET = getattr(settings, 'PAYMENT_WEBHOOK_SECRET', '')
+
+
+def verify_signature(body, signature):
+    """Check the hex HMAC-SHA256 of the raw body sent by the gateway"""
+    if not WEBHOOK_SECRET or not signature:
+        return False
+    expected = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    # Compared as bytes, compare_digest refuses str holding non-ASCII
+    return hmac.compare_digest(expected.encode(), signature.encode())
+
+
+def parse_event(body):
+    """Validate a webhook body; returns the event dict or raises ValueError.
+
+    Expected shape: {"id", "type", "data": {"payment_id" or "transaction_id",
+    "status", "amount"}}.
+    """
+    try:
+        event = json.loads(body)
+    except (TypeError, ValueError):
+        raise ValueError("Body is not valid JSON")
+    if not isinstance(event, dict) or not isinstance(event.get('data'), dict):
+        raise ValueError("Expected an object with id, type and data")
+    if not event.get('id'):
+        raise ValueError("Event id is required")
+    data = event['data']
+    if not (data.get('payment_id') or data.get('transaction_id')):
+        raise ValueError("payment_id or transaction_id is required")
+    if not data.get('status'):
+        raise ValueError("status is required")
+    return event
+
+
+async def store_event(event):
+    """Save a validated event; returns False when its id was seen before"""
+    # get_or_create inserts under a savepoint, so a duplicate doesn't break
+    # an enclosing transaction and a racing insert is read back
+    _, created = await PaymentWebhookEvent.objects.aget_or_create(
+        gateway_event_id=str(event['id'])[:200],
+        defaults={'event_type': str(event.get('type', ''))[:100], 'payload': event},
+    )
+    return created
+
+
+def _event_line(event):
+    data = event.payload.get('data', {})
+    return SettlementLine(
+        event.id,
+        str(data.get('payment_id') or '').strip(),
+        str(data.get('transaction_id') or '').strip(),
+        str(data.get('status') or '').strip().lower(),
+        str(data.get('amount') or '').strip(),
+    )
+
+
+def process_batch(batch_size=500):
+    """Apply up to `batch_size` stored events, oldest first.
+
+    Uses the settlement reconciliation rules, so a repeated or out of date
+    notification is recorded as unchanged or mismatched instead of moving
+    the payment again. Locked rows are skipped, letting several workers
+    run side by side. Returns a Counter of outcomes.
+    """
+    with transaction.atomic():
+        events = list(
+            PaymentWebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True).order_by('id')[:batch_size]
+        )
+        if not events:
+            return Counter()
+        now = timezone.now()
+        changes, outcomes = plan_changes([_event_line(event) for event in events])
+        if changes:
+            outcomes = apply_planned(changes, outcomes, now, 'webhook')
+
+        by_outcome = {}
+        for line, outcome, detail in outcomes:
+            by_outcome.setdefault((outcome, detail[:200]), []).append(line.line)
+        for (outcome, detail), ids in by_outcome.items():
+            PaymentWebhookEvent.objects.filter(id__in=ids).update(processed_at=now, outcome=outcome, detail=detail)
+    return Counter(outcome for _, outcome, _ in outcomes)
@@ -1,15 +1,64 @@
 from django.contrib import admin
+from saveMore.paginators import EstimatedCountPaginator
 from .models import Category,Brand,Product,ProductVariant,InventoryItem,CategoryIcon,Best_deals
 # Register your models here.
-admin.site.register(Category)
-admin.site.register(Brand)
-admin.site.register(Product)
-admin.site.register(ProductVariant)
-admin.site.register(InventoryItem)
-admin.site.register(CategoryIcon)
-admin.site.register(Best_deals)
 
 
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'code', 'parent', 'is_active', 'sort_order')
+    # Category.__str__ reads the parent
+    list_select_related = ('parent',)
+    list_filter = ('is_active',)
+    search_fields = ('name', 'code')
+    autocomplete_fields = ('parent',)
 
 
+@admin.register(Brand)
+class BrandAdmin(admin.ModelAdmin):
+    list_display = ('name', 'website')
+    search_fields = ('name',)
 
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ('name', 'code', 'category', 'brand', 'base_price', 'is_active')
+    list_select_related = ('category__parent', 'brand')
+    list_filter = ('is_active',)
+    search_fields = ('name', '=code')
+    autocomplete_fields = ('category', 'brand')
+
+
+@admin.register(ProductVariant)
+class ProductVariantAdmin(admin.ModelAdmin):
+    list_display = ('sku', 'product', 'variant_name', 'additional_price', 'is_active')
+    list_select_related = ('product',)
+    search_fields = ('=sku', 'product__name')
+    autocomplete_fields = ('product',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(InventoryItem)
+class InventoryItemAdmin(admin.ModelAdmin):
+    list_display = ('variant', 'quantity', 'last_updated')
+    list_select_related = ('variant__product',)
+    search_fields = ('=variant__sku',)
+    raw_id_fields = ('variant',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(CategoryIcon)
+class CategoryIconAdmin(admin.ModelAdmin):
+    list_display = ('icon', 'category', 'sort_order')
+    list_select_related = ('category__parent',)
+    autocomplete_fields = ('category',)
+
+
+@admin.register(Best_deals)
+class BestDealsAdmin(admin.ModelAdmin):
+    list_display = ('item', 'discount')
+    list_select_related = ('item__product',)
+    search_fields = ('=item__sku',)
+    raw_id_fields = ('item',)
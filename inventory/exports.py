@@ -0,0 +1,36 @@
+from saveMore.exports import CHUNK_SIZE, day_bounds
+
+from .models import InventoryItem
+
+INVENTORY_EXPORT_HEADER = [
+    'sku', 'product', 'variant', 'category', 'brand', 'is_active', 'quantity', 'last_updated',
+]
+# status filter -> InventoryItem lookup
+INVENTORY_STATUSES = {
+    'in_stock': {'quantity__gt': 0},
+    'out_of_stock': {'quantity': 0},
+}
+
+
+def inventory_export(start=None, end=None, status=None, chunk_size=CHUNK_SIZE):
+    """(header, rows) with one row per stocked variant.
+
+    The date range applies to last_updated; status is in_stock or
+    out_of_stock. Raises ValueError for a bad date or status.
+    """
+    if status and status not in INVENTORY_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(INVENTORY_STATUSES)}")
+    since, until = day_bounds(start, end)
+    items = InventoryItem.objects.all()
+    if since:
+        items = items.filter(last_updated__gte=since)
+    if until:
+        items = items.filter(last_updated__lt=until)
+    if status:
+        items = items.filter(**INVENTORY_STATUSES[status])
+    rows = items.order_by('id').values_list(
+        'variant__sku', 'variant__product__name', 'variant__variant_name',
+        'variant__product__category__name', 'variant__product__brand__name',
+        'variant__is_active', 'quantity', 'last_updated',
+    ).iterator(chunk_size=chunk_size)
+    return INVENTORY_EXPORT_HEADER, rows
@@ -0,0 +1,19 @@
+"""Catalog rows for tests of any app"""
+from decimal import Decimal
+
+from .models import Brand, Category, InventoryItem, Product, ProductVariant
+
+
+def make_variants(count, stock=10):
+    """`count` variants of separate products priced 10.00, each with `stock` units"""
+    category = Category.objects.create(name='Staples', code='staples')
+    brand = Brand.objects.create(name='Acme')
+    variants = []
+    for i in range(count):
+        product = Product.objects.create(
+            name=f'Product {i}', code=f'p{i}', category=category, brand=brand, base_price=Decimal('10.00')
+        )
+        variant = ProductVariant.objects.create(product=product, variant_name='1 kg', sku=f'sku-{i}')
+        InventoryItem.objects.create(variant=variant, quantity=stock)
+        variants.append(variant)
+    return variants
@@ -102,7 +102,8 @@ class ProductVariant(models.Model):
 class InventoryItem(models.Model):
     variant = models.OneToOneField(ProductVariant, on_delete=models.CASCADE, related_name='inventory')
     quantity = models.PositiveIntegerField(default=0)
-    last_updated = models.DateTimeField(auto_now=True)
+    # Indexed for date-ranged inventory exports
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.variant.sku} - {self.quantity} items"
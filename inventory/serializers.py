@@ -1,7 +1,90 @@
 from rest_framework import serializers
 from .models import Category, Brand, Product, ProductVariant, InventoryItem,Best_deals
 
-class CategorySerializer(serializers.ModelSerializer):
+
+def _split_param(value):
+    """Turn 'a,b.c' into {'a', 'b.c'}; None when the parameter is absent"""
+    if value is None:
+        return None
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+
+def sparse_context(request):
+    """Serializer context carrying the ?fields= and ?expand= query parameters"""
+    params = getattr(request, 'query_params', request.GET)
+    return {
+        'fields': _split_param(params.get('fields')),
+        'expand': _split_param(params.get('expand')),
+    }
+
+
+def field_requested(context, name):
+    """Whether a top-level field will be serialized, so views can skip its prefetch"""
+    if context.get('fields') is None:
+        return True
+    selected = context['fields'] | (context.get('expand') or set())
+    return any(item == name or item.startswith(name + '.') for item in selected)
+
+
+def wants_compact(request):
+    """True when the client asked for the compact list format (?compact=1)"""
+    params = getattr(request, 'query_params', request.GET)
+    return params.get('compact', '').lower() in ('1', 'true', 'yes')
+
+
+def compact_rows(data):
+    """Turn a list of dicts into column names plus array-of-tuples rows"""
+    rows = list(data)
+    columns = list(rows[0].keys()) if rows else []
+    return {
+        'columns': columns,
+        'rows': [[row[column] for column in columns] for row in rows],
+    }
+
+
+class SparseFieldsMixin:
+    """Only serialize the fields named in context['fields'].
+
+    Nested fields are selected with dotted paths (`variant.price`); naming a
+    nested field, or listing it in context['expand'], includes it whole.
+    Unrequested fields are dropped before serialization, so their method
+    fields never run. Without context['fields'] all fields are returned.
+    """
+
+    def _field_path(self):
+        names = []
+        node = self
+        while node is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return '.'.join(reversed(names))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get('fields')
+        if requested is None:
+            return fields
+        selected = requested | (self.context.get('expand') or set())
+
+        path = self._field_path()
+        if path:
+            parts = path.split('.')
+            # Whole nested object asked for, directly or through a parent
+            if any('.'.join(parts[:i]) in selected for i in range(1, len(parts) + 1)):
+                return fields
+            prefix = path + '.'
+        else:
+            prefix = ''
+
+        return {
+            name: field for name, field in fields.items()
+            if prefix + name in selected
+            or any(item.startswith(prefix + name + '.') for item in selected)
+        }
+
+
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     subcategories = serializers.SerializerMethodField()
     icon = serializers.SerializerMethodField()
     color=serializers.SerializerMethodField()
@@ -16,7 +99,7 @@ class CategorySerializer(serializers.ModelSerializer):
 
     def get_subcategories(self, obj):
         children = obj.subcategories.filter(is_active=True)
-        return CategorySerializer(children, many=True).data
+        return CategorySerializer(children, many=True, context=self.context).data
 
     def get_icon(self, obj):
         icon_obj = obj.icons.first()
@@ -26,12 +109,12 @@ class CategorySerializer(serializers.ModelSerializer):
         return icon_obj.color if icon_obj else None
 
     
-class BrandSerializer(serializers.ModelSerializer):
+class BrandSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model= Brand
         fields=['id','name','website','logo','description']
 
-class ProductVariationSerializer(serializers.ModelSerializer):
+class ProductVariationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     price=serializers.SerializerMethodField('actual_price')
     class Meta:
         model=ProductVariant
@@ -39,14 +122,14 @@ class ProductVariationSerializer(serializers.ModelSerializer):
     def actual_price(self,obj):
         return obj.get_final_price()
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
    
     product_varients = ProductVariationSerializer(many=True, read_only=True)
     class Meta:
         model = Product
         fields = ['id','name', 'code', 'category', 'brand', 'description', 'image', 'base_price', 'created_at', 'is_active', 'product_varients']
 
-class BestdealSerializer(serializers.ModelSerializer):
+class BestdealSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     originalPrice=serializers.SerializerMethodField()
     salePrice=serializers.SerializerMethodField()
     name=serializers.SerializerMethodField()
@@ -1,3 +1,55 @@
+from decimal import Decimal
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .exports import inventory_export
+from .factories import make_variants
+from .models import InventoryItem
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        make_variants(2)
+        self.client = APIClient()
+
+    def test_without_parameters_output_is_unchanged(self):
+        products = self.client.get('/api/product/').json()
+        self.assertIn('description', products[0])
+        self.assertEqual(set(products[0]['product_varients'][0]), {
+            'id', 'product', 'variant_name', 'sku', 'additional_price', 'is_active', 'price',
+        })
+
+    def test_fields_trim_the_output_and_skip_the_variant_prefetch(self):
+        with self.assertNumQueries(1):
+            products = self.client.get('/api/product/?fields=id,name').json()
+        self.assertEqual([set(product) for product in products], [{'id', 'name'}] * 2)
+
+    def test_dotted_fields_reach_nested_serializers(self):
+        products = self.client.get('/api/product/?fields=name,product_varients.price').json()
+        self.assertEqual(set(products[0]), {'name', 'product_varients'})
+        variants = products[0]['product_varients']
+        self.assertEqual([set(variant) for variant in variants], [{'price'}])
+        self.assertEqual(Decimal(str(variants[0]['price'])), Decimal('10.00'))
+
+    def test_expand_includes_a_nested_object_whole(self):
+        products = self.client.get('/api/product/?fields=id&expand=product_varients').json()
+        self.assertEqual(set(products[0]), {'id', 'product_varients'})
+        self.assertIn('sku', products[0]['product_varients'][0])
+
+    def test_compact_mode_returns_columns_and_rows(self):
+        data = self.client.get('/api/product/?fields=code,name&compact=1').json()
+        self.assertEqual(data['columns'], ['name', 'code'])
+        self.assertEqual(sorted(data['rows']), [['Product 0', 'p0'], ['Product 1', 'p1']])
+
+
+class InventoryExportTests(TestCase):
+    def test_rows_filtered_by_stock_status(self):
+        variants = make_variants(2, stock=4)
+        InventoryItem.objects.filter(variant=variants[0]).update(quantity=0)
 
-# Create your tests here.
+        header, rows = inventory_export(status='out_of_stock', chunk_size=1)
+        rows = [dict(zip(header, row)) for row in rows]
+        self.assertEqual([(row['sku'], row['quantity'], row['brand']) for row in rows], [('sku-0', 0, 'Acme')])
+        with self.assertRaises(ValueError):
+            inventory_export(status='low')
@@ -10,5 +10,6 @@ urlpatterns = [
     path('search/',views.search_products,name='search_products'),
     path('parent/',views.SingleCategoryViewSet,name='categorysingle'),
     path('all_products/',views.AllProductViewSet,name='all_products'),
+    path('exports/inventory/',views.export_inventory,name='export_inventory'),
 
 ]
@@ -1,6 +1,7 @@
 from django.shortcuts import render
 from .models import Brand,Product,ProductVariant,InventoryItem,Category,Best_deals
 from .serializers import CategorySerializer,BrandSerializer,ProductSerializer,ProductVariationSerializer,BestdealSerializer
+from .serializers import sparse_context,field_requested,wants_compact,compact_rows
 from rest_framework import generics
 from rest_framework import viewsets,response
 from rest_framework.decorators import api_view,permission_classes
@@ -8,7 +9,28 @@ from django_filters.rest_framework import DjangoFilterBackend
 from .filters import CategoryFilter,ProductFilter,BrandFilter
 from rest_framework import permissions
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db.models import Q,Prefetch
+from saveMore.exports import export_download
+from .exports import inventory_export
+
+
+def variants_prefetch():
+    """Prefetch variants with what get_final_price needs"""
+    return Prefetch('product_varients', queryset=ProductVariant.objects.select_related('product','deals'))
+
+
+class SparseListMixin:
+    """?fields= / ?expand= and ?compact=1 support for read-only viewsets"""
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context.update(sparse_context(self.request))
+        return context
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if wants_compact(request):
+            response.data = compact_rows(response.data)
+        return response
 
 
 # class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
@@ -18,7 +40,7 @@ from django.db.models import Q
 #     filter_backends = [DjangoFilterBackend]
 #     filterset_class = CategoryFilter
 
-class ParentCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class ParentCategoryViewSet(SparseListMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.AllowAny]
 
     queryset = Category.objects.filter(parent__isnull=True)
@@ -31,7 +53,7 @@ class ParentCategoryViewSet(viewsets.ReadOnlyModelViewSet):
 def SingleCategoryViewSet(request):
     id=request.GET.get('categoryId')
     object=Category.objects.get(id=id)
-    serialized_item=CategorySerializer(object)
+    serialized_item=CategorySerializer(object,context=sparse_context(request))
     return Response(serialized_item.data)
 
 
@@ -50,15 +72,16 @@ def SingleCategoryViewSet(request):
 def BrandViewSet(request):
     category_id=request.GET.get('category_id')
     brands = Brand.objects.filter(products__category=category_id).distinct()
-    serialized_items=BrandSerializer(brands,many=True)
+    serialized_items=BrandSerializer(brands,many=True,context=sparse_context(request))
+    data=serialized_items.data
     return Response({
         "success": True,
-        "count": len(serialized_items.data),
-        "brands": serialized_items.data
+        "count": len(data),
+        "brands": compact_rows(data) if wants_compact(request) else data
     })
 
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductViewSet(SparseListMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.AllowAny]
 
     queryset=Product.objects.filter(is_active=True)
@@ -66,26 +89,36 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_class=ProductFilter
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if field_requested(sparse_context(self.request), 'product_varients'):
+            queryset = queryset.prefetch_related(variants_prefetch())
+        return queryset
+
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def ProductVariantsByProductView(request):
-    items=ProductVariant.objects.select_related('product').all()
+    items=ProductVariant.objects.select_related('product','deals').all()
     id=request.GET.get('id')
     product=request.GET.get('product')
     if(id):
         items=items.filter(id=id)
     if(product):
         items=items.filter(product__id=product)
-    serialized_item=ProductVariationSerializer(items,many=True)
+    serialized_item=ProductVariationSerializer(items,many=True,context=sparse_context(request))
+    if wants_compact(request):
+        return Response(compact_rows(serialized_item.data))
     return Response(serialized_item.data)
     
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def BestDealView(request):
-    items=Best_deals.objects.all()
-    serialized_item=BestdealSerializer(items,many=True)
+    items=Best_deals.objects.select_related('item__product')
+    serialized_item=BestdealSerializer(items,many=True,context=sparse_context(request))
+    if wants_compact(request):
+        return Response(compact_rows(serialized_item.data))
     return Response(serialized_item.data)
 
 @api_view(['GET'])
@@ -100,11 +133,15 @@ def search_products(request):
         Q(description__icontains=query)|
         Q(brand__name__icontains=query) |
         Q(category__name__icontains=query)
-    ).select_related('category').distinct()[:20]
-    serialized_items=ProductSerializer(products,many=True)
+    ).select_related('category').distinct()
+    context=sparse_context(request)
+    if field_requested(context,'product_varients'):
+        products=products.prefetch_related(variants_prefetch())
+    serialized_items=ProductSerializer(products[:20],many=True,context=context)
+    data=serialized_items.data  # Important: Add .data
     return Response({
-        'products': serialized_items.data,  # Important: Add .data
-        'total': len(serialized_items.data),
+        'products': compact_rows(data) if wants_compact(request) else data,
+        'total': len(data),
         'query': query
     })
 
@@ -115,6 +152,18 @@ def AllProductViewSet(request):
     category=Category.objects.filter(parent=id)
     ids=[i.id for i in category]
     products = Product.objects.filter(category__in=ids)
-    serialized_products = ProductSerializer(products, many=True)
+    context=sparse_context(request)
+    if field_requested(context,'product_varients'):
+        products=products.prefetch_related(variants_prefetch())
+    serialized_products = ProductSerializer(products, many=True, context=context)
+    if wants_compact(request):
+        return Response(compact_rows(serialized_products.data))
     return Response(serialized_products.data)
     
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_inventory(request):
+    """Stream stock levels as CSV or JSON Lines (staff only)"""
+    return export_download(request, 'inventory', inventory_export)
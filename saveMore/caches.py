@@ -0,0 +1,16 @@
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def cache_is_shared():
+    """Whether the default cache is an in-memory store seen by every process.
+
+    LocMem and dummy caches are per-process and file caches per-host. A
+    database cache is shared but turns every cache read back into a query,
+    which is what the token cache, signed tokens and index version checks
+    exist to avoid.
+    """
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache, FileBasedCache, DatabaseCache))
@@ -8,6 +8,7 @@ CSRF_TRUSTED_ORIGINS=['https://'+os.environ.get('RENDER_EXTERNAL_HOSTNAME')]
 
 DEBUG=False
 SECRET_KEY=os.environ.get('SECRET_KEY')
+PAYMENT_WEBHOOK_SECRET=os.environ.get('PAYMENT_WEBHOOK_SECRET', '')
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -32,6 +33,15 @@ STORAGES={
         "BACKEND":"whitenoise.storage.CompressedStaticFilesStorage",
     },
 }
+# Shared by every worker, so token cache invalidations and access token
+# revocations reach all of them without a database query
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
 DATABASES = {
     'default': dj_database_url.config(
         default=os.environ['DATABASE_URL'],
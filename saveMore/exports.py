@@ -0,0 +1,81 @@
+import csv
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import status
+from rest_framework.response import Response
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+# Rows fetched per round trip from the server-side cursor
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object handing back what csv.writer writes"""
+
+    def write(self, value):
+        return value
+
+
+def stream_rows(header, rows, output='csv'):
+    """Encode (header, tuples) as CSV or JSON Lines, one line at a time"""
+    if output == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            yield encoder.encode(dict(zip(header, row))) + '\n'
+
+
+def export_response(name, header, rows, output='csv'):
+    """Stream an export as a file download without holding it in memory"""
+    response = StreamingHttpResponse(stream_rows(header, rows, output), content_type=FORMATS[output])
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M')
+    response['Content-Disposition'] = f'attachment; filename="{name}-{stamp}.{output}"'
+    return response
+
+
+def day_bounds(start=None, end=None):
+    """Aware datetimes for [start day 00:00, day after end 00:00), local time.
+
+    `start` and `end` are YYYY-MM-DD strings or dates; either may be empty.
+    Raises ValueError for malformed dates. Comparing the timestamp itself,
+    rather than its __date, keeps range filters on an index.
+    """
+    bounds = []
+    for value, shift in ((start, 0), (end, 1)):
+        if not value:
+            bounds.append(None)
+            continue
+        day = parse_date(value) if isinstance(value, str) else value
+        if day is None:
+            raise ValueError("Dates must be YYYY-MM-DD")
+        bounds.append(timezone.make_aware(datetime.combine(day + timedelta(days=shift), time.min)))
+    return tuple(bounds)
+
+
+def export_download(request, name, export):
+    """Shared body of the staff export views.
+
+    ?output=csv|jsonl (not ?format=, which DRF reserves), ?start=&end=
+    (YYYY-MM-DD, inclusive) and ?status= are passed to `export`.
+    """
+    output = request.GET.get('output', 'csv')
+    if output not in FORMATS:
+        return Response({'success': False, 'error': 'output must be csv or jsonl'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        header, rows = export(
+            start=request.GET.get('start'), end=request.GET.get('end'), status=request.GET.get('status'),
+        )
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return export_response(name, header, rows, output)